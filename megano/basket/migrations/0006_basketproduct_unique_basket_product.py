@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:43
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    """
+    Объединяет повторяющиеся строки корзины с одним и тем же товаром в одну строку с суммарным количеством,
+    чтобы можно было создать ограничение уникальности (basket, product).
+    """
+    BasketProduct = apps.get_model("basket", "BasketProduct")
+
+    duplicates = (
+        BasketProduct.objects.values("basket", "product")
+        .annotate(lines=Count("pk"), first_pk=Min("pk"), total=Sum("quantity"))
+        .filter(lines__gt=1)
+    )
+    for duplicate in duplicates:
+        lines = BasketProduct.objects.filter(
+            basket=duplicate["basket"], product=duplicate["product"]
+        )
+        lines.filter(pk=duplicate["first_pk"]).update(quantity=duplicate["total"])
+        lines.exclude(pk=duplicate["first_pk"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("basket", "0005_alter_basket_user"),
+        ("catalogs", "0039_alter_product_category_alter_sale_datefrom_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_lines, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="basketproduct",
+            constraint=models.UniqueConstraint(
+                fields=("basket", "product"), name="unique_basket_product"
+            ),
+        ),
+    ]
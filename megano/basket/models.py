@@ -1,5 +1,8 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Least
+
 from catalogs.models import Product
 
 
@@ -10,9 +13,7 @@ class Basket(models.Model):
     и каждый продукт может иметь связь сразу с несколькими корзинами в БД.
     """
 
-    user = models.OneToOneField(
-        User, on_delete=models.CASCADE, null=True, blank=True
-    )
+    user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
     session_key = models.CharField(max_length=32, null=True, blank=True, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     products = models.ManyToManyField(
@@ -32,5 +33,35 @@ class BasketProduct(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["basket", "product"], name="unique_basket_product"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.product.title} - {self.quantity} шт."
+
+    @classmethod
+    @transaction.atomic
+    def add(cls, basket: Basket, product: Product, quantity: int) -> None:
+        """
+        Метод для добавления товара в корзину: строка (корзина, товар) создается или количество в ней
+        увеличивается одним UPDATE с F-выражением, но не больше остатка товара на складе.
+        При одновременном добавлении одного товара get_or_create получает ошибку уникальности при создании строки,
+        повторяет чтение и находит строку, созданную другим запросом, поэтому количества обоих запросов складываются.
+
+        :param basket: корзина
+        :param product: товар
+        :param quantity: добавляемое количество
+        """
+        line, created = cls.objects.get_or_create(
+            basket=basket,
+            product=product,
+            defaults={"quantity": min(quantity, product.count)},
+        )
+        if not created:
+            cls.objects.filter(pk=line.pk).update(
+                quantity=Least(F("quantity") + quantity, product.count)
+            )
@@ -1,3 +1,79 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
 from django.test import TestCase
 
-# Create your tests here.
+from catalogs.models import Product
+from .models import Basket, BasketProduct
+
+
+class BasketAddTestCase(TestCase):
+    """
+    Класс с методами для тестирования добавления товара в корзину пользователя.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД пользователя с корзиной и товара с остатком 5 штук.
+        """
+        cls.user = User.objects.create_user(username="tester", password="Test24@")
+        cls.basket = Basket.objects.create(user=cls.user)
+        cls.product = Product.objects.create(
+            title="Платье", price=Decimal(100), count=5
+        )
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом.
+        """
+        self.client.force_login(self.user)
+
+    def add(self, count: int):
+        """
+        Метод для добавления товара в корзину в формате фронтенда.
+        """
+        return self.client.post(
+            "/api/basket/",
+            {"id": self.product.pk, "count": count},
+            content_type="application/json",
+        )
+
+    def test_add_same_product(self) -> None:
+        """
+        Тест для проверки, что повторное добавление товара увеличивает количество в той же строке корзины,
+        но не больше остатка на складе.
+        """
+        self.assertEqual(self.add(2).status_code, 200)
+        self.assertEqual(self.add(2).status_code, 200)
+        self.assertEqual(BasketProduct.objects.get(basket=self.basket).quantity, 4)
+
+        self.assertEqual(self.add(3).status_code, 200)
+        self.assertEqual(BasketProduct.objects.get(basket=self.basket).quantity, 5)
+
+    def test_concurrent_add(self) -> None:
+        """
+        Тест для проверки одновременного добавления одного товара: строку уже создал другой запрос
+        после того, как этот запрос не нашел ее, - количества складываются без ошибки уникальности.
+        """
+        BasketProduct.objects.create(
+            basket=self.basket, product=self.product, quantity=1
+        )
+        original_get = QuerySet.get
+        missed: list[bool] = []
+
+        def get_after_other_request(queryset: QuerySet, *args, **kwargs):
+            # первое чтение строки корзины выполняется до того, как другой запрос ее создал
+            if queryset.model is BasketProduct and not missed:
+                missed.append(True)
+                raise BasketProduct.DoesNotExist
+            return original_get(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "get", get_after_other_request):
+            response = self.add(2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(missed, [True])
+        self.assertEqual(BasketProduct.objects.get(basket=self.basket).quantity, 3)
@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import BasketView
+from .views import BasketView, BasketRecommendationsView
 
 
 app_name = "basket"
 
 urlpatterns = [
     path("api/basket/", BasketView.as_view()),
+    path("api/basket/recommendations/", BasketRecommendationsView.as_view()),
 ]
@@ -9,7 +9,10 @@ from ast import literal_eval
 from .serializers import BasketSerializer
 
 from catalogs.models import Product
-from .models import Basket, BasketProduct
+from catalogs.recommendations import get_recommended_products
+from catalogs.serializers import ProductSerializer
+from site_auth.backends import get_user_basket
+from .models import BasketProduct
 
 
 class PlainTextParser(BaseParser):
@@ -46,10 +49,7 @@ class BasketView(APIView):
 
         # Если пользователь аутентифицировался, то достаем из БД его корзину. Если ее нет, то создаем для него корзину.
         if request.user.is_authenticated:
-            basket = Basket.objects.filter(user=request.user).first()
-
-            if not basket:
-                basket = Basket.objects.create(user=request.user)
+            basket = get_user_basket(request.user, create=True)
 
             # Если в куках хранится информация о товарах корзины,
             # то мы переносим эти товары в корзину из базы данных и затем очищаем куки.
@@ -121,27 +121,8 @@ class BasketView(APIView):
 
         # если пользователь аутентифицирован, то достаем из БД корзину и меняем или добавляем количество товара
         if request.user.is_authenticated:
-            basket = Basket.objects.filter(user=request.user).first()
-            basket_product = BasketProduct.objects.filter(
-                basket=basket, product=product
-            ).first()
-            if basket_product:
-                if basket_product.quantity + quantity <= product.count:
-                    basket_product.quantity += quantity
-                else:
-                    basket_product.quantity = product.count
-                basket_product.save()
-
-            else:
-                if quantity <= product.count:
-                    basket.products.add(
-                        product.pk, through_defaults={"quantity": quantity}
-                    )
-                else:
-                    basket.products.add(
-                        product.pk, through_defaults={"quantity": product.count}
-                    )
-                    basket.save()
+            basket = get_user_basket(request.user, create=True)
+            BasketProduct.add(basket, product, quantity)
 
             products_in_basket = basket.products.all()
             serialized = BasketSerializer(
@@ -215,7 +196,7 @@ class BasketView(APIView):
 
         # если пользователь аутентифицирован, то достаем из БД корзину и меняем количество выбранного товара:
         if request.user.is_authenticated:
-            basket = Basket.objects.filter(user=request.user).first()
+            basket = get_user_basket(request.user)
             basket_product = BasketProduct.objects.filter(
                 basket=basket, product=product
             ).first()
@@ -255,3 +236,44 @@ class BasketView(APIView):
                 key="basket", value=json.dumps(basket_in_cookies), max_age=360000000
             )
             return response
+
+
+class BasketRecommendationsView(APIView):
+    """
+    API-класс с методом get для передачи на фронтэнд товаров, которые часто покупают вместе с товарами корзины.
+    """
+
+    use_replica = True
+
+    def get(self, request: Request) -> Response:
+        """
+        Метод получает товары корзины (из БД или из куки, как и BasketView)
+        и складывает заранее посчитанные рекомендации всех товаров корзины.
+        :return: Response со списком рекомендованных товаров
+        """
+        if request.user.is_authenticated:
+            product_ids: list[int] = list(
+                BasketProduct.objects.filter(
+                    basket=get_user_basket(request.user)
+                ).values_list("product_id", flat=True)
+            )
+        else:
+            try:
+                basket_in_cookies = json.loads(request.COOKIES.get("basket", "{}"))
+            except ValueError:
+                basket_in_cookies = {}
+            if not isinstance(basket_in_cookies, dict):
+                basket_in_cookies = {}
+            product_ids: list[int] = [
+                int(product_id)
+                for product_id in basket_in_cookies
+                if str(product_id).isdigit()
+            ]
+
+        if not product_ids:
+            return Response([])
+        products = get_recommended_products(product_ids).prefetch_related(
+            "tags", "images"
+        )
+        serialized = ProductSerializer(products, many=True)
+        return Response(serialized.data)
@@ -1,5 +1,21 @@
-from django.contrib import admin
-from .models import Category, Product, ProductImage, Review, Specification, Tag, Sale
+from django.contrib import admin, messages
+from django.db.models import Count
+from django.template.response import TemplateResponse
+
+from .admin_tools import PaginatedReadOnlyInline, ScalableModelAdmin
+from .campaigns import create_campaign, end_campaign, rollback_campaign
+from .facets import schedule_facets_rebuild
+from .forms import SaleCampaignForm
+from .models import (
+    Category,
+    Product,
+    ProductImage,
+    Review,
+    Specification,
+    Tag,
+    Sale,
+    SaleCampaign,
+)
 
 
 class ProductImageInline(admin.TabularInline):
@@ -16,6 +32,7 @@ class TagInline(admin.StackedInline):
     """
 
     model = Product.tags.through
+    autocomplete_fields = ("tag",)
 
 
 class SpecificationInline(admin.TabularInline):
@@ -24,14 +41,19 @@ class SpecificationInline(admin.TabularInline):
     """
 
     model = Product.specifications.through
+    autocomplete_fields = ("specification",)
 
 
-class ReviewInline(admin.TabularInline):
+class ReviewInline(PaginatedReadOnlyInline):
     """
     Класс для просмотра отзывов товара внутри деталей товара в админ-панели.
+    Отзывов у товара может быть очень много, поэтому они выводятся постранично и только для чтения.
     """
 
     model = Review
+    fields = "author", "email", "rate", "text", "date"
+    readonly_fields = fields
+    ordering = ("-date",)
 
 
 @admin.register(Category)
@@ -51,7 +73,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ScalableModelAdmin):
     """
     Класс для отображения объектов товара в админ-панели
     """
@@ -64,16 +86,79 @@ class ProductAdmin(admin.ModelAdmin):
     )
     list_display = "pk", "title", "category", "description", "price", "count", "rating"
     list_display_links = "pk", "title", "price"
+    list_filter = "category", "tags"
+    list_select_related = ("category",)
+    ordering = ("-pk",)
+    # поиск по началу названия и точному артикулу использует индексы, а не перебор всей таблицы
+    search_fields = "^title", "sku__exact"
+    actions = ("create_sale_campaign",)
+
+    def save_related(self, request, form, formsets, change) -> None:
+        """
+        Метод для сохранения связанных объектов товара. Связи с характеристиками сохраняются встроенным блоком
+        напрямую через промежуточную таблицу, для которой Django не отправляет сигналы,
+        поэтому фильтры по характеристикам категории товара пересчитываются здесь.
+        """
+        super().save_related(request, form, formsets, change)
+        if any(
+            formset.model is Product.specifications.through and formset.has_changed()
+            for formset in formsets
+        ):
+            schedule_facets_rebuild([form.instance.category_id])
+
+    @admin.action(description="Создать распродажу для выбранных товаров")
+    def create_sale_campaign(self, request, queryset):
+        """
+        Действие для создания массовой акции сразу для всех выбранных товаров.
+        Сначала показывает форму с параметрами распродажи, после ее отправки создает акции.
+        """
+        if "apply" in request.POST:
+            form = SaleCampaignForm(request.POST)
+            if form.is_valid():
+                campaign = create_campaign(
+                    title=form.cleaned_data["title"],
+                    date_from=form.cleaned_data["dateFrom"],
+                    date_to=form.cleaned_data["dateTo"],
+                    products=queryset,
+                    percent=form.cleaned_data["percent"],
+                    sale_price=form.cleaned_data["salePrice"],
+                )
+                self.message_user(
+                    request,
+                    f"Создана распродажа {campaign.title!r}: "
+                    f"акций на товары - {campaign.sales.count()}",
+                    messages.SUCCESS,
+                )
+                return None
+        else:
+            form = SaleCampaignForm()
+
+        return TemplateResponse(
+            request,
+            "admin/catalogs/product/sale_campaign.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": "Новая распродажа",
+                "form": form,
+                "products_count": queryset.count(),
+                "select_across": request.POST.get("select_across", "0"),
+                "selected": request.POST.getlist(admin.helpers.ACTION_CHECKBOX_NAME),
+            },
+        )
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(ScalableModelAdmin):
     """
     Класс для отображения объектов отзыва в админ-панели
     """
 
     list_display = "pk", "author", "email", "rate", "text"
     list_display_links = "author", "rate"
+    # фильтр по товару выводил бы в боковой панели все товары каталога, поэтому отзывы ищутся по товару
+    search_fields = "^product__title", "=product__sku"
+    autocomplete_fields = ("product",)
+    raw_id_fields = ("profile",)
 
 
 @admin.register(Specification)
@@ -88,6 +173,7 @@ class SpecificationAdmin(admin.ModelAdmin):
         "value",
     )
     list_display_links = "name", "value"
+    search_fields = "^name", "^value"
 
 
 @admin.register(Tag)
@@ -101,10 +187,11 @@ class TagAdmin(admin.ModelAdmin):
         "name",
     )
     list_display_links = ("name",)
+    search_fields = ("^name",)
 
 
 @admin.register(Sale)
-class SaleAdmin(admin.ModelAdmin):
+class SaleAdmin(ScalableModelAdmin):
     """
     Класс для отображения акций на товары в админ-панели
     """
@@ -119,15 +206,62 @@ class SaleAdmin(admin.ModelAdmin):
         "discount_percentage",
     )
     list_display_links = "pk", "product_name", "salePrice", "dateFrom", "dateTo"
+    list_filter = ("campaign",)
+    list_select_related = ("product",)
+    autocomplete_fields = ("product",)
 
+    @admin.display(description="Цена товара", ordering="product__price")
     def product_price(self, obj: Sale):
         """
         Метод для отображения обычной цены товара по акции
         """
         return obj.product.price
 
+    @admin.display(description="Товар", ordering="product__title")
     def product_name(self, obj: Sale):
         """
         Метод для отображения названия товара по акции
         """
         return obj.product.title
+
+
+@admin.register(SaleCampaign)
+class SaleCampaignAdmin(admin.ModelAdmin):
+    """
+    Класс для отображения массовых акций (распродаж) в админ-панели
+    """
+
+    list_display = "pk", "title", "dateFrom", "dateTo", "sales_count"
+    list_display_links = "pk", "title"
+    actions = ("end_campaigns", "rollback_campaigns")
+
+    def get_queryset(self, request):
+        """
+        Метод для подсчета количества акций каждой распродажи одним запросом
+        """
+        return super().get_queryset(request).annotate(sales_count=Count("sales"))
+
+    @admin.display(description="Акций на товары", ordering="sales_count")
+    def sales_count(self, obj: SaleCampaign) -> int:
+        """
+        Метод для отображения количества акций на товары в распродаже
+        """
+        return obj.sales_count
+
+    @admin.action(description="Завершить выбранные распродажи")
+    def end_campaigns(self, request, queryset) -> None:
+        """
+        Действие для досрочного завершения распродаж: их акции заканчиваются вчерашним днем.
+        """
+        ended: int = sum(end_campaign(campaign) for campaign in queryset)
+        self.message_user(request, f"Завершено акций на товары: {ended}")
+
+    @admin.action(
+        description="Отменить выбранные распродажи (удалить вместе с акциями)"
+    )
+    def rollback_campaigns(self, request, queryset) -> None:
+        """
+        Действие для отмены распродаж: распродажи удаляются вместе со всеми их акциями.
+        """
+        deleted: int = sum(rollback_campaign(campaign) for campaign in queryset)
+        self.message_user(request, f"Удалено акций на товары: {deleted}")
@@ -0,0 +1,144 @@
+"""
+Модуль со вспомогательными классами для админ-панели, рассчитанными на большие таблицы:
+пагинатор с приблизительным подсчетом строк и постраничные inline-блоки только для чтения.
+"""
+
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+# начиная с какого количества строк в таблице вместо точного COUNT(*) используется оценка из статистики БД
+ESTIMATED_COUNT_THRESHOLD: int = 100_000
+
+
+def get_estimated_count(model, using: str = "default") -> int | None:
+    """
+    Функция для получения приблизительного количества строк таблицы из статистики БД,
+    без полного просмотра таблицы: в SQLite - из sqlite_stat1 (заполняется командой ANALYZE),
+    в PostgreSQL - из pg_class.reltuples.
+
+    :param model: класс модели
+    :param using: псевдоним БД
+    :return: приблизительное количество строк или None, если статистики нет
+    """
+    connection = connections[using]
+    table: str = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            # первое число в stat - количество строк таблицы (или индекса) на момент ANALYZE
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+            row = cursor.fetchone()
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [table],
+            )
+            row = cursor.fetchone()
+        else:
+            return None
+    if row is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    return count if count >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор для списков объектов в админ-панели. Если список не отфильтрован и таблица большая,
+    то количество строк берется из статистики БД, а не считается запросом COUNT(*) по всей таблице.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimated: int | None = get_estimated_count(queryset.model, queryset.db)
+            if estimated is not None and estimated >= ESTIMATED_COUNT_THRESHOLD:
+                return estimated
+        return super().count
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """
+    Базовый класс админ-панели для больших таблиц: приблизительный подсчет строк
+    и без дополнительного подсчета всех строк таблицы при поиске и фильтрации.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """
+    Набор форм inline-блока, который показывает только одну страницу связанных объектов.
+    Номер страницы передается в параметре адреса страницы с названием "<prefix>-page".
+    """
+
+    per_page: int = 20
+
+    @cached_property
+    def page_param(self) -> str:
+        return f"{self.prefix}-page"
+
+    @cached_property
+    def total_count(self) -> int:
+        return super().get_queryset().count()
+
+    @cached_property
+    def num_pages(self) -> int:
+        return max(1, -(-self.total_count // self.per_page))
+
+    @cached_property
+    def page(self) -> int:
+        try:
+            page = int(self.request.GET.get(self.page_param, 1))
+        except (AttributeError, ValueError):
+            page = 1
+        return min(max(page, 1), self.num_pages)
+
+    def get_queryset(self):
+        if not hasattr(self, "_page_queryset"):
+            offset: int = (self.page - 1) * self.per_page
+            self._page_queryset = super().get_queryset()[
+                offset : offset + self.per_page
+            ]
+        return self._page_queryset
+
+
+class PaginatedReadOnlyInline(admin.TabularInline):
+    """
+    Inline-блок только для просмотра связанных объектов, разбитых на страницы.
+    Подходит для связей, у которых могут быть тысячи объектов (отзывы товара, строки заказа).
+    """
+
+    formset = PaginatedInlineFormSet
+    template = "admin/edit_inline/paginated_tabular.html"
+    per_page: int = 20
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        # набору форм нужен запрос, чтобы узнать номер страницы
+        return type(
+            formset.__name__,
+            (formset,),
+            {"request": request, "per_page": self.per_page},
+        )
+
+    def has_add_permission(self, request, obj=None) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+    def has_delete_permission(self, request, obj=None) -> bool:
+        return False
@@ -0,0 +1,164 @@
+"""
+Модуль для массовых акций (распродаж): создание акций Sale сразу для множества товаров,
+а также завершение и отмена всей распродажи одной операцией.
+
+Цена по акции для всех выбранных товаров вычисляется одним запросом к БД, а строки Sale
+сохраняются через bulk_create в одной транзакции - без сохранения и сигналов для каждой акции по отдельности.
+"""
+
+from collections.abc import Iterable
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    DecimalField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    QuerySet,
+    Value,
+)
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .models import Product, Sale, SaleCampaign
+
+# количество акций, сохраняемых одним INSERT
+CAMPAIGN_BATCH_SIZE: int = 1000
+
+
+class CampaignError(ValueError):
+    """
+    Ошибка в параметрах массовой акции.
+    """
+
+
+def select_campaign_products(
+    category_ids: Iterable[int] = (),
+    tag_ids: Iterable[int] = (),
+    product_ids: Iterable[int] = (),
+) -> QuerySet:
+    """
+    Функция для выбора товаров распродажи по категориям (включая дочерние), тэгам и номерам товаров.
+    Товар попадает в распродажу, если подходит хотя бы под одно из условий.
+
+    :param category_ids: номера категорий
+    :param tag_ids: номера тэгов
+    :param product_ids: номера товаров
+    :return: QuerySet с выбранными товарами
+    """
+    condition = Q()
+    if category_ids:
+        condition |= Q(category__in=category_ids) | Q(category__parent__in=category_ids)
+    if tag_ids:
+        condition |= Q(tags__in=tag_ids)
+    if product_ids:
+        condition |= Q(pk__in=product_ids)
+    if not condition:
+        raise CampaignError("Не выбраны категории, тэги или товары для распродажи")
+    return Product.objects.filter(condition).distinct()
+
+
+@transaction.atomic
+def create_campaign(
+    title: str,
+    date_from: date,
+    date_to: date,
+    products: QuerySet,
+    percent: Decimal | None = None,
+    sale_price: Decimal | None = None,
+) -> SaleCampaign:
+    """
+    Функция для создания распродажи: для каждого выбранного товара создается акция
+    со скидкой percent процентов или с фиксированной ценой sale_price.
+    Товары, цена которых не станет ниже, и товары, у которых уже есть акция в эти даты, в распродажу не попадают:
+    у товара в каждый день должно быть не больше одной действующей акции.
+
+    :param title: название распродажи
+    :param date_from: дата начала
+    :param date_to: дата окончания
+    :param products: QuerySet товаров
+    :param percent: размер скидки в процентах (от 0 до 100)
+    :param sale_price: фиксированная цена по акции
+    :return: созданная распродажа
+    """
+    if (percent is None) == (sale_price is None):
+        raise CampaignError("Нужно указать либо процент скидки, либо цену по акции")
+    if percent is not None and not 0 < percent < 100:
+        raise CampaignError("Процент скидки должен быть больше 0 и меньше 100")
+    if sale_price is not None and sale_price <= 0:
+        raise CampaignError("Цена по акции должна быть больше 0")
+    if date_from > date_to:
+        raise CampaignError("Дата начала распродажи позже даты окончания")
+
+    # цена по акции для всех товаров вычисляется в БД одним запросом
+    price_field = DecimalField(max_digits=10, decimal_places=2)
+    if percent is not None:
+        # множитель передается дробным числом: в SQLite произведение и деление целых чисел - целочисленные
+        factor: Decimal = (Decimal(100) - percent) / Decimal(100)
+        new_price = ExpressionWrapper(
+            Round(F("price") * Value(factor), 2), output_field=price_field
+        )
+    else:
+        new_price = Value(sale_price, output_field=price_field)
+    overlapping_sales = Sale.objects.filter(
+        product=OuterRef("pk"), dateFrom__lte=date_to, dateTo__gte=date_from
+    )
+    prices = (
+        products.order_by()
+        .exclude(Exists(overlapping_sales))
+        .annotate(new_price=new_price)
+        .filter(price__gt=F("new_price"), new_price__gt=0)
+        .values_list("pk", "new_price")
+    )
+
+    campaign = SaleCampaign.objects.create(
+        title=title, dateFrom=date_from, dateTo=date_to
+    )
+    Sale.objects.bulk_create(
+        (
+            Sale(
+                product_id=product_id,
+                campaign=campaign,
+                salePrice=price,
+                dateFrom=date_from,
+                dateTo=date_to,
+            )
+            for product_id, price in prices.iterator(chunk_size=CAMPAIGN_BATCH_SIZE)
+        ),
+        batch_size=CAMPAIGN_BATCH_SIZE,
+    )
+    return campaign
+
+
+@transaction.atomic
+def end_campaign(campaign: SaleCampaign) -> int:
+    """
+    Функция для досрочного завершения распродажи: все ее акции заканчиваются вчерашним днем.
+    Сами акции остаются в БД для истории.
+
+    :param campaign: распродажа
+    :return: количество завершенных акций
+    """
+    yesterday: date = timezone.localdate() - timedelta(days=1)
+    ended: int = campaign.sales.filter(dateTo__gt=yesterday).update(dateTo=yesterday)
+    if campaign.dateTo > yesterday:
+        campaign.dateTo = yesterday
+        campaign.save(update_fields=["dateTo"])
+    return ended
+
+
+@transaction.atomic
+def rollback_campaign(campaign: SaleCampaign) -> int:
+    """
+    Функция для отмены распродажи: распродажа удаляется вместе со всеми ее акциями.
+
+    :param campaign: распродажа
+    :return: количество удаленных акций
+    """
+    deleted: int = campaign.sales.all().delete()[0]
+    campaign.delete()
+    return deleted
@@ -0,0 +1,26 @@
+"""
+Модуль с деревом категорий для меню каталога, которое хранится в памяти процесса (см. megano/process_cache.py).
+Дерево сбрасывается при изменении категорий (catalogs/signals.py) и перечитывается не реже,
+чем раз в CATEGORY_TREE_MAX_AGE секунд, чтобы изменения из других процессов тоже появлялись.
+"""
+
+from django.conf import settings
+
+from megano.process_cache import ProcessCache
+from .models import Category
+from .serializers import CategorySerializer
+
+CATEGORY_TREE_MAX_AGE: int | None = getattr(settings, "CATEGORY_TREE_MAX_AGE", 60)
+
+
+def load_category_tree() -> list[dict]:
+    """
+    Функция для получения из БД категорий верхнего уровня со всеми подкатегориями в виде для фронтэнда.
+    """
+    categories = Category.objects.filter(level=0).prefetch_related("subcategories")
+    return list(CategorySerializer(categories, many=True).data)
+
+
+category_tree: ProcessCache[list[dict]] = ProcessCache(
+    load_category_tree, CATEGORY_TREE_MAX_AGE
+)
@@ -0,0 +1,159 @@
+"""
+Модуль для фильтрации каталога по характеристикам товаров (размер, цвет, материал и т.д.).
+
+Таблица связи спецификаций с товарами используется как обратный индекс: по нормализованной паре
+(название, значение) индекс specification_key_idx находит спецификации, а уникальный индекс таблицы связи -
+номера товаров. Поэтому фильтр по характеристике - это подзапрос по индексам без JOIN и distinct().
+Списки значений характеристик для каждой категории хранятся заранее посчитанными в SpecificationFacet.
+"""
+
+import re
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, QuerySet, Sum
+
+from .models import Product, Specification, SpecificationFacet, normalize_attribute
+
+# параметр фильтра по характеристике в querystring: filter[spec][Размер]=M
+SPEC_FILTER_PATTERN = re.compile(r"^filter\[spec\]\[(.+)\]$")
+
+
+def get_specification_filters(query_params) -> dict[str, list[str]]:
+    """
+    Функция для получения из querystring фильтров по характеристикам.
+    Если у характеристики передано несколько значений, то подходит товар с любым из них.
+
+    :param query_params: параметры запроса (QueryDict)
+    :return: словарь {нормализованное название: список нормализованных значений}
+    """
+    filters: dict[str, list[str]] = {}
+    for key in query_params.keys():
+        match = SPEC_FILTER_PATTERN.match(key)
+        if not match:
+            continue
+        values: list[str] = [
+            normalize_attribute(value)
+            for value in query_params.getlist(key)
+            if value.strip()
+        ]
+        if values:
+            filters.setdefault(normalize_attribute(match.group(1)), []).extend(values)
+    return filters
+
+
+def filter_by_specifications(
+    products: QuerySet, filters: dict[str, list[str]]
+) -> QuerySet:
+    """
+    Функция для фильтрации товаров по характеристикам: товар должен иметь каждую из указанных характеристик
+    с одним из указанных значений.
+
+    :param products: QuerySet товаров
+    :param filters: словарь из get_specification_filters
+    :return: отфильтрованный QuerySet товаров
+    """
+    through = Specification.product.through
+    for name_key, value_keys in filters.items():
+        products = products.filter(
+            pk__in=through.objects.filter(
+                specification__name_key=name_key,
+                specification__value_key__in=value_keys,
+            ).values("product_id")
+        )
+    return products
+
+
+def get_category_facets(category_ids: Iterable[int]) -> list[dict]:
+    """
+    Функция для получения значений фильтров по характеристикам для категорий из заранее посчитанной таблицы.
+
+    :param category_ids: номера категорий
+    :return: список характеристик со значениями и количеством товаров для каждого значения
+    """
+    rows = (
+        SpecificationFacet.objects.filter(category__in=category_ids)
+        .values("name_key", "value_key")
+        .annotate(name=Min("name"), value=Min("value"), count=Sum("products_count"))
+        .order_by("name_key", "value_key")
+    )
+    facets: dict[str, dict] = {}
+    for row in rows:
+        facet: dict = facets.setdefault(
+            row["name_key"], {"name": row["name"], "key": row["name_key"], "values": []}
+        )
+        facet["values"].append(
+            {"value": row["value"], "key": row["value_key"], "count": row["count"]}
+        )
+    return list(facets.values())
+
+
+@transaction.atomic
+def rebuild_facets(category_ids: Iterable[int] | None = None) -> int:
+    """
+    Функция для пересчета значений фильтров по характеристикам одним агрегирующим запросом.
+
+    :param category_ids: номера категорий для пересчета (None - все категории)
+    :return: количество сохраненных значений фильтров
+    """
+    through = Specification.product.through
+    links = through.objects.exclude(specification__value_key="").filter(
+        product__category__isnull=False
+    )
+    facets = SpecificationFacet.objects.all()
+    if category_ids is not None:
+        category_ids = set(category_ids) - {None}
+        if not category_ids:
+            return 0
+        links = links.filter(product__category__in=category_ids)
+        facets = facets.filter(category__in=category_ids)
+
+    rows = (
+        links.values(
+            "product__category_id",
+            "specification__name_key",
+            "specification__value_key",
+        )
+        .annotate(
+            # для показа берется одно из написаний (у "M" и "m" одинаковый ключ)
+            name=Max("specification__name"),
+            value=Max("specification__value"),
+            count=Count("product_id", distinct=True),
+        )
+        .order_by()
+    )
+    facets.delete()
+    created = SpecificationFacet.objects.bulk_create(
+        SpecificationFacet(
+            category_id=row["product__category_id"],
+            name_key=row["specification__name_key"],
+            value_key=row["specification__value_key"],
+            name=" ".join(row["name"].split()),
+            value=" ".join(row["value"].split()),
+            products_count=row["count"],
+        )
+        for row in rows
+    )
+    return len(created)
+
+
+def schedule_facets_rebuild(category_ids: Iterable[int | None]) -> None:
+    """
+    Функция для пересчета значений фильтров категорий после успешного завершения транзакции.
+
+    :param category_ids: номера категорий, товары или характеристики которых изменились
+    """
+    category_ids = set(category_ids) - {None}
+    if category_ids:
+        transaction.on_commit(lambda: rebuild_facets(category_ids))
+
+
+def get_product_categories(product_ids: Iterable[int]) -> set[int]:
+    """
+    Функция для получения категорий товаров (для пересчета их фильтров).
+    """
+    return set(
+        Product.objects.filter(pk__in=product_ids)
+        .exclude(category__isnull=True)
+        .values_list("category_id", flat=True)
+    )
@@ -0,0 +1,204 @@
+"""
+Модуль для выгрузки всего каталога товаров для маркетплейсов и поисковых партнеров.
+
+Выгрузка формируется потоково: товары читаются из БД через QuerySet.iterator() пачками,
+фото, тэги и действующие акции подгружаются одним запросом на пачку (prefetch_related),
+а каждая запись сразу превращается в строку NDJSON или элемент XML (формат YML).
+Поэтому потребление памяти не зависит от размера каталога.
+"""
+
+import json
+from collections.abc import Iterator
+from datetime import date
+from decimal import Decimal
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import Category, Product, Sale
+
+# количество товаров, которые читаются из БД и дополняются связанными данными за один раз
+FEED_CHUNK_SIZE: int = getattr(settings, "FEED_CHUNK_SIZE", 500)
+
+FEED_CONTENT_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "yml": "application/xml; charset=utf-8",
+}
+
+
+def get_category_paths() -> dict[int, str]:
+    """
+    Функция для получения полного пути каждой категории (например, "Одежда/Платья").
+    Категорий немного, поэтому они загружаются в память целиком одним запросом.
+
+    :return: словарь {pk категории: путь категории}
+    """
+    categories: dict[int, tuple[str, int | None]] = {
+        pk: (title, parent_id)
+        for pk, title, parent_id in Category.objects.values_list(
+            "pk", "title", "parent_id"
+        )
+    }
+    paths: dict[int, str] = {}
+    for pk in categories:
+        titles: list[str] = []
+        current: int | None = pk
+        while current is not None and current in categories and len(titles) < 10:
+            title, current = categories[current]
+            titles.append(title)
+        paths[pk] = "/".join(reversed(titles))
+    return paths
+
+
+def iter_feed_products(chunk_size: int = FEED_CHUNK_SIZE) -> Iterator[Product]:
+    """
+    Генератор всех товаров каталога (кроме товаров без категории) с фото, тэгами и действующими акциями.
+    Связанные данные подгружаются одним запросом на каждую пачку из chunk_size товаров.
+
+    :param chunk_size: количество товаров в пачке
+    :return: итератор товаров
+    """
+    today: date = timezone.localdate()
+    active_sales = Sale.objects.filter(dateFrom__lte=today, dateTo__gte=today)
+    return (
+        Product.objects.filter(category__isnull=False)
+        .order_by("pk")
+        .prefetch_related(
+            "images",
+            "tags",
+            Prefetch("sales", queryset=active_sales, to_attr="active_sales"),
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def get_feed_item(
+    product: Product, category_paths: dict[int, str], base_url: str
+) -> dict:
+    """
+    Функция для представления товара в выгрузке: итоговая цена с учетом действующей акции,
+    остаток, путь категории, ссылки на фото и тэги.
+
+    :param product: товар с подгруженными images, tags и active_sales
+    :param category_paths: словарь с путями категорий из get_category_paths
+    :param base_url: адрес сайта без завершающего "/", добавляемый к ссылкам
+    :return: словарь с данными товара
+    """
+    price: Decimal = product.price
+    if product.active_sales:
+        price = min(price, *(sale.salePrice for sale in product.active_sales))
+    return {
+        "id": product.pk,
+        "sku": product.sku,
+        "title": product.title,
+        "description": product.description,
+        "url": f"{base_url}/product/{product.pk}/",
+        "price": str(price),
+        "oldPrice": str(product.price) if price != product.price else None,
+        "count": product.count,
+        "available": product.count > 0,
+        "freeDelivery": product.freeDelivery,
+        "categoryId": product.category_id,
+        "category": category_paths.get(product.category_id, ""),
+        "images": [
+            f"{base_url}{image.image.url}"
+            for image in product.images.all()
+            if image.image
+        ],
+        "tags": [tag.name for tag in product.tags.all()],
+    }
+
+
+def generate_ndjson_feed(
+    base_url: str, chunk_size: int = FEED_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Генератор выгрузки в формате NDJSON: одна строка JSON на каждый товар.
+
+    :param base_url: адрес сайта без завершающего "/"
+    :param chunk_size: количество товаров в пачке
+    :return: итератор строк выгрузки
+    """
+    category_paths: dict[int, str] = get_category_paths()
+    for product in iter_feed_products(chunk_size):
+        item: dict = get_feed_item(product, category_paths, base_url)
+        yield json.dumps(item, ensure_ascii=False) + "\n"
+
+
+def generate_yml_feed(
+    base_url: str, chunk_size: int = FEED_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Генератор выгрузки в формате YML (XML-формат каталогов маркетплейсов):
+    сначала список категорий, затем предложения (offer) по каждому товару.
+
+    :param base_url: адрес сайта без завершающего "/"
+    :param chunk_size: количество товаров в пачке
+    :return: итератор фрагментов XML
+    """
+    category_paths: dict[int, str] = get_category_paths()
+    generated: str = timezone.localtime().strftime("%Y-%m-%dT%H:%M")
+
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f"<yml_catalog date={quoteattr(generated)}>\n<shop>\n"
+    yield f"<name>Megano</name>\n<company>Megano</company>\n<url>{escape(base_url)}/</url>\n"
+    yield '<currencies><currency id="RUR" rate="1"/></currencies>\n<categories>\n'
+    for pk, title, parent_id in Category.objects.order_by("pk").values_list(
+        "pk", "title", "parent_id"
+    ):
+        parent: str = f" parentId={quoteattr(str(parent_id))}" if parent_id else ""
+        yield f"<category id={quoteattr(str(pk))}{parent}>{escape(title)}</category>\n"
+    yield "</categories>\n<offers>\n"
+
+    for product in iter_feed_products(chunk_size):
+        item: dict = get_feed_item(product, category_paths, base_url)
+        available: str = "true" if item["available"] else "false"
+        parts: list[str] = [
+            f"<offer id={quoteattr(str(item['id']))} available={quoteattr(available)}>",
+            f"<url>{escape(item['url'])}</url>",
+            f"<price>{item['price']}</price>",
+        ]
+        if item["oldPrice"]:
+            parts.append(f"<oldprice>{item['oldPrice']}</oldprice>")
+        parts += [
+            "<currencyId>RUR</currencyId>",
+            f"<categoryId>{item['categoryId']}</categoryId>",
+            *(f"<picture>{escape(image)}</picture>" for image in item["images"]),
+            f"<name>{escape(item['title'])}</name>",
+            f"<description>{escape(item['description'])}</description>",
+            f"<count>{item['count']}</count>",
+        ]
+        if item["sku"]:
+            parts.append(f"<vendorCode>{escape(item['sku'])}</vendorCode>")
+        parts += [f'<param name="Тэг">{escape(tag)}</param>' for tag in item["tags"]]
+        parts.append("</offer>\n")
+        yield "".join(parts)
+
+    yield "</offers>\n</shop>\n</yml_catalog>\n"
+
+
+FEED_GENERATORS: dict = {"ndjson": generate_ndjson_feed, "yml": generate_yml_feed}
+
+
+def encode_feed(parts: Iterator[str], buffer_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Генератор, объединяющий мелкие фрагменты выгрузки в блоки байтов примерно по buffer_size,
+    чтобы не отправлять клиенту (и не сжимать) каждую строку по отдельности.
+
+    :param parts: итератор строк выгрузки
+    :param buffer_size: примерный размер блока в байтах
+    :return: итератор блоков в кодировке UTF-8
+    """
+    buffer: list[bytes] = []
+    size: int = 0
+    for part in parts:
+        data: bytes = part.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
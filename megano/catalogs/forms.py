@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from django import forms
+from django.utils import timezone
+
+
+class SaleCampaignForm(forms.Form):
+    """
+    Форма для создания массовой акции (распродажи) из админ-панели.
+    """
+
+    title = forms.CharField(label="Название распродажи", max_length=150)
+    dateFrom = forms.DateField(label="Дата начала", initial=timezone.localdate)
+    dateTo = forms.DateField(label="Дата окончания")
+    percent = forms.DecimalField(
+        label="Скидка, %",
+        required=False,
+        min_value=Decimal("0.01"),
+        max_value=Decimal("99.99"),
+        decimal_places=2,
+    )
+    salePrice = forms.DecimalField(
+        label="Или фиксированная цена",
+        required=False,
+        min_value=Decimal("0.01"),
+        max_digits=10,
+        decimal_places=2,
+    )
+
+    def clean(self) -> dict:
+        """
+        Метод для проверки, что указан ровно один способ расчета цены и даты идут по порядку.
+        """
+        cleaned_data: dict = super().clean()
+        if (cleaned_data.get("percent") is None) == (
+            cleaned_data.get("salePrice") is None
+        ):
+            raise forms.ValidationError(
+                "Нужно указать либо процент скидки, либо цену по акции"
+            )
+        date_from, date_to = cleaned_data.get("dateFrom"), cleaned_data.get("dateTo")
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("Дата начала распродажи позже даты окончания")
+        return cleaned_data
@@ -0,0 +1,209 @@
+"""
+Модуль с функциями для создания уменьшенных копий (вариантов) загруженных изображений.
+
+Для каждого изображения создаются копии фиксированной ширины из настройки IMAGE_VARIANT_WIDTHS
+в исходном формате и в формате WebP. Копии хранятся рядом с оригиналом в папке variants.
+Модуль не импортирует модели, поэтому его функции можно вызывать в отдельных процессах.
+"""
+
+import logging
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# ширины создаваемых копий изображения в пикселях
+IMAGE_VARIANT_WIDTHS: tuple[int, ...] = getattr(
+    settings, "IMAGE_VARIANT_WIDTHS", (200, 400, 800)
+)
+
+# форматы Pillow для расширений файлов, в которых сохраняются копии в исходном формате
+PIL_FORMATS: dict[str, str] = {
+    ".jpg": "JPEG",
+    ".jpeg": "JPEG",
+    ".png": "PNG",
+    ".webp": "WEBP",
+}
+
+# параметры сохранения копий для каждого формата (оптимизация PNG слишком медленная и почти не уменьшает файл)
+SAVE_OPTIONS: dict[str, dict] = {
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+    "PNG": {},
+    "WEBP": {"quality": 80},
+}
+
+# через сколько секунд изображение без копий проверяется снова (копии могут создаваться другим процессом)
+IMAGE_VARIANT_RECHECK: int = getattr(settings, "IMAGE_VARIANT_RECHECK", 60)
+
+# реальная ширина самой большой копии для изображений, копии которых созданы, и время последней проверки
+# для изображений без копий (чтобы не обращаться к файлам при каждом запросе)
+_variant_widths: dict[str, int] = {}
+_missing_checked: dict[str, float] = {}
+
+# фоновый пул потоков, в котором создаются копии после загрузки изображения
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_variant_name(name: str, width: int, webp: bool = False) -> str:
+    """
+    Функция для получения пути к копии изображения определенной ширины.
+
+    :param name: путь к оригиналу изображения в хранилище
+    :param width: ширина копии
+    :param webp: True, если нужен путь к копии в формате WebP
+    :return: путь к копии изображения в хранилище
+    """
+    directory, filename = posixpath.split(name)
+    stem, extension = posixpath.splitext(filename)
+    if webp or extension.lower() not in PIL_FORMATS:
+        extension = ".webp"
+    return posixpath.join(directory, "variants", f"{stem}_{width}w{extension}")
+
+
+def get_largest_variant_width(name: str) -> int | None:
+    """
+    Функция для получения реальной ширины самой большой копии изображения (меньше требуемой,
+    если оригинал уже требуемой ширины). Результат запоминается, а отсутствие копий перепроверяется
+    не чаще, чем раз в IMAGE_VARIANT_RECHECK секунд.
+
+    :param name: путь к оригиналу изображения в хранилище
+    :return: ширина самой большой копии или None, если копии еще не созданы
+    """
+    width: int | None = _variant_widths.get(name)
+    if width is not None:
+        return width
+    checked: float | None = _missing_checked.get(name)
+    if checked is not None and time.monotonic() - checked < IMAGE_VARIANT_RECHECK:
+        return None
+
+    largest: str = get_variant_name(name, IMAGE_VARIANT_WIDTHS[-1], webp=True)
+    try:
+        # Pillow при открытии читает только заголовок файла
+        with default_storage.open(largest) as file, Image.open(file) as image:
+            width = image.width
+    except OSError:
+        _missing_checked[name] = time.monotonic()
+        return None
+    _missing_checked.pop(name, None)
+    _variant_widths[name] = width
+    return width
+
+
+def variants_ready(name: str) -> bool:
+    """
+    Функция проверяет, созданы ли уже копии изображения.
+
+    :param name: путь к оригиналу изображения в хранилище
+    :return: True, если все копии изображения существуют
+    """
+    return get_largest_variant_width(name) is not None
+
+
+def clear_variants_cache() -> None:
+    """
+    Функция для очистки запомненных результатов проверки копий (например, после удаления файлов).
+    """
+    _variant_widths.clear()
+    _missing_checked.clear()
+
+
+def get_srcset(name: str, webp: bool = False) -> str | None:
+    """
+    Функция для получения значения атрибута srcset по созданным копиям изображения.
+    В srcset указывается реальная ширина копий: маленькое изображение не увеличивается,
+    поэтому копии нескольких ширин могут совпадать, и в srcset попадает только одна из них.
+
+    :param name: путь к оригиналу изображения в хранилище
+    :param webp: True, если нужен srcset из копий в формате WebP
+    :return: строка srcset или None, если копии еще не созданы
+    """
+    largest: int | None = get_largest_variant_width(name) if name else None
+    if largest is None:
+        return None
+    # {реальная ширина копии: ширина в названии файла копии}
+    variants: dict[int, int] = {}
+    for width in IMAGE_VARIANT_WIDTHS:
+        variants.setdefault(min(width, largest), width)
+    return ", ".join(
+        f"{default_storage.url(get_variant_name(name, width, webp))} {real_width}w"
+        for real_width, width in variants.items()
+    )
+
+
+def generate_variants(name: str, force: bool = False) -> int:
+    """
+    Функция для создания копий изображения всех ширин в исходном формате и в формате WebP.
+    Изображение не увеличивается, если его ширина меньше требуемой.
+
+    :param name: путь к оригиналу изображения в хранилище
+    :param force: True, если нужно пересоздать уже существующие копии
+    :return: количество созданных файлов
+    """
+    if not force and variants_ready(name):
+        return 0
+
+    with default_storage.open(name) as file:
+        with Image.open(file) as original:
+            original.load()
+            image = ImageOps.exif_transpose(original)
+
+    extension = posixpath.splitext(name)[1].lower()
+    created: int = 0
+
+    for width in IMAGE_VARIANT_WIDTHS:
+        variant = image.copy()
+        variant.thumbnail((width, variant.height), Image.Resampling.LANCZOS)
+
+        for webp in (False, True):
+            pil_format = "WEBP" if webp else PIL_FORMATS.get(extension, "WEBP")
+            variant_name = get_variant_name(name, width, webp)
+            converted = variant
+            if pil_format == "JPEG" and variant.mode not in ("RGB", "L"):
+                converted = variant.convert("RGB")
+
+            buffer = BytesIO()
+            converted.save(buffer, format=pil_format, **SAVE_OPTIONS[pil_format])
+
+            if default_storage.exists(variant_name):
+                default_storage.delete(variant_name)
+            default_storage.save(variant_name, ContentFile(buffer.getvalue()))
+            created += 1
+
+    _missing_checked.pop(name, None)
+    _variant_widths[name] = variant.width
+    return created
+
+
+def schedule_variants(name: str) -> None:
+    """
+    Функция для создания копий изображения в фоновом потоке, чтобы не задерживать ответ на запрос.
+
+    :param name: путь к оригиналу изображения в хранилище
+    """
+    global _executor
+
+    if not name or variants_ready(name):
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "IMAGE_VARIANT_WORKERS", 2),
+            thread_name_prefix="image-variants",
+        )
+    _executor.submit(_generate_variants_safely, name)
+
+
+def _generate_variants_safely(name: str) -> None:
+    """
+    Функция для вызова generate_variants в фоновом потоке с записью ошибок в лог.
+    """
+    try:
+        generate_variants(name)
+    except Exception:
+        logger.exception("Не удалось создать копии изображения %s", name)
@@ -0,0 +1,474 @@
+"""
+Модуль для потокового импорта каталога товаров из файлов поставщика (JSON Lines или CSV).
+
+Файл читается построчно, записи обрабатываются пачками: для каждой пачки в одной транзакции
+товары создаются и обновляются через bulk_create/bulk_update, а категории, тэги, спецификации,
+фото и акции привязываются к товарам такими же групповыми запросами. Категории, тэги и спецификации
+находятся по естественным ключам (названию) через словари в памяти, товары - по артикулу (sku).
+Поэтому потребление памяти не зависит от размера файла, а количество запросов - от количества товаров в пачке.
+
+Формат записи (одна строка JSON Lines):
+    {"sku": "A-1", "title": "Платье", "price": "10.00", "count": 5,
+     "category": "Одежда/Платья", "description": "...", "fullDescription": "...",
+     "freeDelivery": false, "limited_edition": false,
+     "images": ["products/a1.jpg"], "tags": ["Лето"],
+     "specifications": [{"name": "Размер", "value": "XL"}],
+     "sales": [{"salePrice": "8.00", "dateFrom": "2024-03-01", "dateTo": "2024-03-31"}]}
+
+В CSV те же названия колонок, списки разделяются символом "|", спецификации записываются
+как "Размер=XL", а акции как "8.00;2024-03-01;2024-03-31".
+Если поле images, tags, specifications или sales в записи отсутствует, то соответствующие связи товара
+не изменяются, а если указано - заменяются указанными в файле.
+"""
+
+import csv
+import json
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import reset_queries, transaction
+
+from .models import Category, Product, ProductImage, Sale, Specification, Tag
+
+# разделитель уровней в пути категории, например "Одежда/Платья"
+CATEGORY_SEPARATOR: str = "/"
+
+# разделитель элементов списка в колонке CSV
+LIST_SEPARATOR: str = "|"
+
+# поля товара, которые заполняются из файла при создании и обновлении
+PRODUCT_FIELDS: tuple[str, ...] = (
+    "title",
+    "price",
+    "count",
+    "category",
+    "description",
+    "fullDescription",
+    "freeDelivery",
+    "limited_edition",
+)
+
+TRUE_VALUES: set[str] = {"1", "true", "yes", "да"}
+
+
+class ImportRecordError(ValueError):
+    """
+    Ошибка в отдельной записи файла импорта. Такая запись пропускается, а импорт продолжается.
+    """
+
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"Строка {line}: {message}")
+
+
+def parse_bool(value) -> bool:
+    """
+    Функция для приведения значения из файла к bool.
+
+    :param value: bool, число или строка ("1", "true", "yes", "да")
+    :return: True или False
+    """
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def parse_decimal(value, field: str) -> Decimal:
+    """
+    Функция для приведения значения из файла к Decimal.
+
+    :param value: число или строка с числом
+    :param field: название поля для сообщения об ошибке
+    :return: Decimal
+    """
+    try:
+        return Decimal(str(value).strip())
+    except (InvalidOperation, AttributeError):
+        raise ValueError(f"некорректное значение поля {field}: {value!r}")
+
+
+def normalize_record(raw: dict, line: int) -> dict:
+    """
+    Функция для проверки записи из файла и приведения ее полей к нужным типам.
+
+    :param raw: словарь с данными товара из файла
+    :param line: номер строки в файле (для сообщения об ошибке)
+    :return: словарь с проверенными данными товара
+    """
+    if not isinstance(raw, dict):
+        raise ImportRecordError(line, "запись должна быть объектом JSON")
+    try:
+        sku: str = str(raw.get("sku") or "").strip()
+        title: str = str(raw.get("title") or "").strip()
+        if not sku or not title:
+            raise ValueError("не заполнены обязательные поля sku и title")
+
+        record: dict = {
+            "sku": sku,
+            "title": title,
+            "price": parse_decimal(raw.get("price"), "price"),
+            "count": int(raw.get("count") or 0),
+            "category": str(raw.get("category") or "").strip(),
+            "description": str(raw.get("description") or ""),
+            "fullDescription": str(raw.get("fullDescription") or ""),
+            "freeDelivery": parse_bool(raw.get("freeDelivery", False)),
+            "limited_edition": parse_bool(raw.get("limited_edition", False)),
+        }
+
+        if raw.get("images") is not None:
+            record["images"] = [str(image) for image in raw["images"] if image]
+        if raw.get("tags") is not None:
+            record["tags"] = [str(tag).strip() for tag in raw["tags"] if tag]
+        if raw.get("specifications") is not None:
+            record["specifications"] = [
+                (str(spec["name"]).strip(), str(spec.get("value", "")).strip())
+                for spec in raw["specifications"]
+            ]
+        if raw.get("sales") is not None:
+            record["sales"] = [
+                (
+                    parse_decimal(sale["salePrice"], "salePrice"),
+                    date.fromisoformat(sale["dateFrom"]),
+                    date.fromisoformat(sale["dateTo"]),
+                )
+                for sale in raw["sales"]
+            ]
+    except (KeyError, TypeError, ValueError) as error:
+        raise ImportRecordError(line, str(error))
+    return record
+
+
+def read_json_lines(file) -> Iterator[tuple[int, dict]]:
+    """
+    Генератор, построчно читающий файл в формате JSON Lines.
+
+    :param file: открытый текстовый файл
+    :return: пары (номер строки, словарь с данными товара или None, если строка не является JSON)
+    """
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except json.JSONDecodeError:
+            yield line, None
+
+
+def read_csv(file) -> Iterator[tuple[int, dict]]:
+    """
+    Генератор, построчно читающий файл в формате CSV с заголовком и преобразующий
+    колонки-списки к тому же виду, что и в JSON Lines.
+
+    :param file: открытый текстовый файл
+    :return: пары (номер строки, словарь с данными товара)
+    """
+    reader = csv.DictReader(file)
+    for row in reader:
+        raw: dict = dict(row)
+        for field in ("images", "tags"):
+            if field in raw:
+                raw[field] = split_list(raw[field])
+        if "specifications" in raw:
+            raw["specifications"] = [
+                dict(zip(("name", "value"), item.split("=", 1)))
+                for item in split_list(raw["specifications"])
+            ]
+        if "sales" in raw:
+            raw["sales"] = [
+                dict(zip(("salePrice", "dateFrom", "dateTo"), item.split(";")))
+                for item in split_list(raw["sales"])
+            ]
+        yield reader.line_num, raw
+
+
+def split_list(value: str | None) -> list[str]:
+    """
+    Функция для разбиения значения колонки CSV на список по символу "|".
+    """
+    if not value:
+        return []
+    return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+
+
+class CatalogImporter:
+    """
+    Класс для импорта товаров пачками. Хранит в памяти только словари категорий, тэгов и спецификаций
+    (их немного), а товары текущей пачки ищет в БД по артикулам.
+    """
+
+    def __init__(self, chunk_size: int = 1000) -> None:
+        self.chunk_size: int = chunk_size
+        self.created: int = 0
+        self.updated: int = 0
+        self.unchanged: int = 0
+        self.skipped: int = 0
+        self.errors: list[str] = []
+
+        self.categories: dict[tuple[int | None, str], int] = {
+            (parent_id, title): pk
+            for pk, parent_id, title in Category.objects.values_list(
+                "pk", "parent_id", "title"
+            )
+        }
+        self.tags: dict[str, int] = {
+            name: pk for pk, name in Tag.objects.values_list("pk", "name")
+        }
+        self.specifications: dict[tuple[str, str | None], int] = {
+            (name, value): pk
+            for pk, name, value in Specification.objects.values_list(
+                "pk", "name", "value"
+            )
+        }
+
+    def run(
+        self,
+        rows: Iterable[tuple[int, dict]],
+        progress: Callable[[int], None] | None = None,
+    ) -> None:
+        """
+        Метод для импорта всех записей. Каждая пачка сохраняется в отдельной транзакции.
+
+        :param rows: пары (номер строки, словарь с данными товара), например из read_json_lines
+        :param progress: функция, которая вызывается после каждой пачки с количеством обработанных записей
+        """
+        processed: int = 0
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            records: dict[str, dict] = {}
+            for line, raw in chunk:
+                try:
+                    record = normalize_record(raw, line)
+                except ImportRecordError as error:
+                    self.skipped += 1
+                    self.errors.append(str(error))
+                    continue
+                # если артикул встречается в пачке несколько раз, то используется последняя запись
+                records[record["sku"]] = record
+
+            with transaction.atomic():
+                self.import_chunk(list(records.values()))
+            # при DEBUG = True Django запоминает текст каждого запроса, а запросы пачек очень длинные
+            reset_queries()
+
+            processed += len(chunk)
+            if progress is not None:
+                progress(processed)
+
+    def import_chunk(self, records: list[dict]) -> None:
+        """
+        Метод для сохранения одной пачки товаров и их связей.
+
+        :param records: проверенные записи товаров с уникальными артикулами
+        """
+        if not records:
+            return
+
+        existing: dict[str, Product] = Product.objects.in_bulk(
+            [record["sku"] for record in records], field_name="sku"
+        )
+        to_create: list[Product] = []
+        to_update: list[Product] = []
+        for record in records:
+            product: Product | None = existing.get(record["sku"])
+            if product is None:
+                product = Product(sku=record["sku"])
+                to_create.append(product)
+            elif self.is_changed(product, record):
+                to_update.append(product)
+            else:
+                self.unchanged += 1
+                continue
+            for field in PRODUCT_FIELDS:
+                if field == "category":
+                    product.category_id = self.get_category_id(record["category"])
+                else:
+                    setattr(product, field, record[field])
+
+        Product.objects.bulk_create(to_create)
+        # обновляются только товары, данные которых отличаются от файла
+        Product.objects.bulk_update(to_update, PRODUCT_FIELDS)
+        self.created += len(to_create)
+        self.updated += len(to_update)
+
+        product_ids: dict[str, int] = dict(
+            Product.objects.filter(
+                sku__in=[record["sku"] for record in records]
+            ).values_list("sku", "pk")
+        )
+        self.import_images(records, product_ids)
+        self.import_tags(records, product_ids)
+        self.import_specifications(records, product_ids)
+        self.import_sales(records, product_ids)
+
+    def is_changed(self, product: Product, record: dict) -> bool:
+        """
+        Метод для проверки, отличаются ли данные товара в БД от данных в файле.
+
+        :param product: товар из БД
+        :param record: проверенная запись товара из файла
+        :return: True, если хотя бы одно поле товара нужно обновить
+        """
+        if product.category_id != self.get_category_id(record["category"]):
+            return True
+        return any(
+            getattr(product, field) != record[field]
+            for field in PRODUCT_FIELDS
+            if field != "category"
+        )
+
+    def get_category_id(self, path: str) -> int | None:
+        """
+        Метод для получения pk категории по ее пути (например, "Одежда/Платья").
+        Недостающие категории создаются.
+
+        :param path: путь категории с разделителем "/"
+        :return: pk последней категории в пути или None, если путь пустой
+        """
+        parent_id: int | None = None
+        for level, title in enumerate(
+            part.strip() for part in path.split(CATEGORY_SEPARATOR) if part.strip()
+        ):
+            key = (parent_id, title)
+            if key not in self.categories:
+                self.categories[key] = Category.objects.create(
+                    title=title, level=level, parent_id=parent_id
+                ).pk
+            parent_id = self.categories[key]
+        return parent_id
+
+    def import_images(self, records: list[dict], product_ids: dict[str, int]) -> None:
+        """
+        Метод для замены фото товаров пачки: лишние фото удаляются, новые добавляются.
+        Копии изображений разного размера при этом не создаются - для этого есть команда generate_image_variants.
+        """
+        wanted: dict[int, list[str]] = {
+            product_ids[record["sku"]]: record["images"]
+            for record in records
+            if "images" in record
+        }
+        if not wanted:
+            return
+
+        existing: set[tuple[int, str]] = set(
+            ProductImage.objects.filter(product_id__in=wanted).values_list(
+                "product_id", "image"
+            )
+        )
+        keep: set[tuple[int, str]] = {
+            (product_id, image)
+            for product_id, images in wanted.items()
+            for image in images
+        }
+        for product_id, image in existing - keep:
+            ProductImage.objects.filter(product_id=product_id, image=image).delete()
+        ProductImage.objects.bulk_create(
+            ProductImage(product_id=product_id, image=image)
+            for product_id, image in keep - existing
+        )
+
+    def import_tags(self, records: list[dict], product_ids: dict[str, int]) -> None:
+        """
+        Метод для замены тэгов товаров пачки. Недостающие тэги создаются.
+        """
+        wanted: dict[int, list[str]] = {
+            product_ids[record["sku"]]: record["tags"]
+            for record in records
+            if "tags" in record
+        }
+        if not wanted:
+            return
+
+        missing: set[str] = {
+            name for names in wanted.values() for name in names
+        } - self.tags.keys()
+        for tag in Tag.objects.bulk_create(Tag(name=name) for name in missing):
+            self.tags[tag.name] = tag.pk
+
+        through = Tag.products.through
+        through.objects.filter(product_id__in=wanted).delete()
+        through.objects.bulk_create(
+            through(product_id=product_id, tag_id=tag_id)
+            for product_id, tag_id in {
+                (product_id, self.tags[name])
+                for product_id, names in wanted.items()
+                for name in names
+            }
+        )
+
+    def import_specifications(
+        self, records: list[dict], product_ids: dict[str, int]
+    ) -> None:
+        """
+        Метод для замены спецификаций товаров пачки. Недостающие спецификации создаются.
+        """
+        wanted: dict[int, list[tuple[str, str | None]]] = {
+            product_ids[record["sku"]]: record["specifications"]
+            for record in records
+            if "specifications" in record
+        }
+        if not wanted:
+            return
+
+        missing: set[tuple[str, str | None]] = {
+            key for keys in wanted.values() for key in keys
+        } - self.specifications.keys()
+        # bulk_create не вызывает save(), поэтому нормализованные ключи заполняются вручную
+        new_specifications: list[Specification] = [
+            Specification(name=name, value=value) for name, value in missing
+        ]
+        for specification in new_specifications:
+            specification.fill_keys()
+        for specification in Specification.objects.bulk_create(new_specifications):
+            self.specifications[(specification.name, specification.value)] = (
+                specification.pk
+            )
+
+        through = Specification.product.through
+        through.objects.filter(product_id__in=wanted).delete()
+        through.objects.bulk_create(
+            through(product_id=product_id, specification_id=specification_id)
+            for product_id, specification_id in {
+                (product_id, self.specifications[key])
+                for product_id, keys in wanted.items()
+                for key in keys
+            }
+        )
+
+    def import_sales(self, records: list[dict], product_ids: dict[str, int]) -> None:
+        """
+        Метод для замены акций товаров пачки. Акции с теми же датами обновляются, остальные заменяются.
+        """
+        wanted: dict[tuple[int, date, date], Decimal] = {}
+        products_with_sales: set[int] = set()
+        for record in records:
+            if "sales" not in record:
+                continue
+            product_id: int = product_ids[record["sku"]]
+            products_with_sales.add(product_id)
+            for sale_price, date_from, date_to in record["sales"]:
+                wanted[(product_id, date_from, date_to)] = sale_price
+        if not products_with_sales:
+            return
+
+        to_update: list[Sale] = []
+        to_delete: list[int] = []
+        for sale in Sale.objects.filter(product_id__in=products_with_sales):
+            key = (sale.product_id, sale.dateFrom, sale.dateTo)
+            if key in wanted:
+                sale.salePrice = wanted.pop(key)
+                to_update.append(sale)
+            else:
+                to_delete.append(sale.pk)
+
+        Sale.objects.filter(pk__in=to_delete).delete()
+        Sale.objects.bulk_update(to_update, ["salePrice"])
+        Sale.objects.bulk_create(
+            Sale(
+                product_id=product_id,
+                salePrice=sale_price,
+                dateFrom=date_from,
+                dateTo=date_to,
+            )
+            for (product_id, date_from, date_to), sale_price in wanted.items()
+        )
@@ -0,0 +1,34 @@
+"""
+Команда для пересчета рекомендаций "часто покупают вместе" по истории оплаченных заказов.
+Рассчитана на периодический запуск (например, раз в сутки по cron).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalogs.recommendations import RECOMMENDATIONS_TOP, build_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рекомендации товаров по совместным покупкам в оплаченных заказах"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=RECOMMENDATIONS_TOP,
+            help="Количество рекомендаций для одного товара",
+        )
+        parser.add_argument(
+            "--min-together",
+            type=int,
+            default=1,
+            help="Минимальное количество заказов, в которых товары были вместе",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["top"] < 1 or options["min_together"] < 1:
+            raise CommandError("Параметры --top и --min-together должны быть больше 0")
+        saved: int = build_recommendations(options["top"], options["min_together"])
+        self.stdout.write(self.style.SUCCESS(f"Сохранено рекомендаций: {saved}"))
@@ -0,0 +1,75 @@
+"""
+Команда для выгрузки всего каталога товаров в файл NDJSON или YML (при необходимости сжатый gzip).
+"""
+
+import gzip
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalogs.feeds import FEED_CHUNK_SIZE, FEED_GENERATORS, encode_feed
+
+
+class Command(BaseCommand):
+    help = "Выгружает каталог товаров в формате NDJSON или YML для маркетплейсов и партнеров"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--format",
+            choices=FEED_GENERATORS.keys(),
+            default="ndjson",
+            help="Формат выгрузки",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Путь к файлу выгрузки ('-' - вывод в stdout). Файл с расширением .gz сжимается gzip",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Сжать выгрузку gzip")
+        parser.add_argument(
+            "--base-url",
+            default="http://127.0.0.1:8000",
+            help="Адрес сайта, добавляемый к ссылкам на товары и фото",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=FEED_CHUNK_SIZE,
+            help="Количество товаров, читаемых из БД за один раз",
+        )
+
+    def handle(self, *args, **options) -> None:
+        output: str = options["output"]
+        use_gzip: bool = options["gzip"] or output.endswith(".gz")
+        content = encode_feed(
+            FEED_GENERATORS[options["format"]](
+                options["base_url"].rstrip("/"), options["chunk_size"]
+            )
+        )
+
+        if output == "-":
+            stream = sys.stdout.buffer
+            if use_gzip:
+                stream = gzip.GzipFile(fileobj=stream, mode="wb")
+            for block in content:
+                stream.write(block)
+            stream.flush()
+            if use_gzip:
+                stream.close()
+            return
+
+        # выгрузка пишется во временный файл, который затем заменяет старый,
+        # чтобы забирающие файл партнеры никогда не получили недописанную выгрузку
+        temp_output: str = f"{output}.tmp"
+        try:
+            with open(temp_output, "wb") as file:
+                stream = gzip.GzipFile(fileobj=file, mode="wb") if use_gzip else file
+                with stream:
+                    for block in content:
+                        stream.write(block)
+        except OSError as error:
+            raise CommandError(f"Не удалось записать выгрузку в {output}: {error}")
+        os.replace(temp_output, output)
+
+        self.stdout.write(self.style.SUCCESS(f"Каталог выгружен в {output}"))
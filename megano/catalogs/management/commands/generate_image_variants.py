@@ -0,0 +1,72 @@
+"""
+Команда для создания уменьшенных копий всех уже загруженных изображений:
+фото товаров, фото категорий и аватаров пользователей.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from catalogs.images import generate_variants
+from catalogs.models import Category, ProductImage
+from profile_user.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает копии изображений фиксированной ширины (в т.ч. WebP) для всех загрузок"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Количество процессов для обработки изображений",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Пересоздать копии, даже если они уже существуют",
+        )
+
+    def get_image_names(self) -> set[str]:
+        """
+        Метод для получения путей ко всем загруженным изображениям.
+
+        :return: множество путей к изображениям в хранилище
+        """
+        names: set[str] = set()
+        names.update(ProductImage.objects.values_list("image", flat=True))
+        names.update(Category.objects.values_list("image", flat=True))
+        names.update(Profile.objects.values_list("avatar", flat=True))
+        names.discard(None)
+        names.discard("")
+        return names
+
+    def handle(self, *args, **options) -> None:
+        names: set[str] = self.get_image_names()
+        total: int = len(names)
+        created: int = 0
+        failed: int = 0
+
+        self.stdout.write(f"Изображений для обработки: {total}")
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = {
+                executor.submit(generate_variants, name, options["force"]): name
+                for name in names
+            }
+            for number, future in enumerate(as_completed(futures), start=1):
+                try:
+                    created += future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f"{futures[future]}: {error}")
+                if number % 50 == 0 or number == total:
+                    self.stdout.write(f"Обработано {number} из {total}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Создано файлов: {created}, ошибок: {failed}")
+        )
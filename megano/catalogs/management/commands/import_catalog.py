@@ -0,0 +1,76 @@
+"""
+Команда для потокового импорта каталога товаров из файла поставщика в формате JSON Lines или CSV.
+"""
+
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalogs.facets import rebuild_facets
+from catalogs.importer import CatalogImporter, read_csv, read_json_lines
+
+READERS: dict = {"jsonl": read_json_lines, "csv": read_csv}
+
+
+class Command(BaseCommand):
+    help = "Импортирует товары, категории, фото, тэги, спецификации и акции из файла JSON Lines или CSV"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("path", help="Путь к файлу импорта ('-' - читать из stdin)")
+        parser.add_argument(
+            "--format",
+            choices=READERS.keys(),
+            help="Формат файла (по умолчанию определяется по расширению, для stdin - jsonl)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Количество товаров, сохраняемых в одной транзакции",
+        )
+
+    def handle(self, *args, **options) -> None:
+        path: str = options["path"]
+        file_format: str | None = options["format"]
+        if file_format is None:
+            extension: str = os.path.splitext(path)[1].lower().lstrip(".")
+            file_format = "csv" if extension == "csv" else "jsonl"
+
+        if options["chunk_size"] < 1:
+            raise CommandError("Размер пачки должен быть положительным числом")
+
+        importer = CatalogImporter(chunk_size=options["chunk_size"])
+
+        def report_progress(processed: int) -> None:
+            for error in importer.errors:
+                self.stderr.write(error)
+            importer.errors.clear()
+            self.stdout.write(
+                f"Обработано записей: {processed} (создано {importer.created}, "
+                f"обновлено {importer.updated}, без изменений {importer.unchanged}, "
+                f"пропущено {importer.skipped})"
+            )
+
+        if path == "-":
+            importer.run(READERS[file_format](sys.stdin), progress=report_progress)
+        else:
+            try:
+                file = open(path, encoding="utf-8-sig", newline="")
+            except OSError as error:
+                raise CommandError(f"Не удалось открыть файл {path}: {error}")
+            with file:
+                importer.run(READERS[file_format](file), progress=report_progress)
+
+        # массовое сохранение не вызывает сигналы, поэтому фильтры по характеристикам пересчитываются один раз в конце
+        facets: int = rebuild_facets()
+        self.stdout.write(f"Пересчитаны фильтры по характеристикам: {facets}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импорт завершен: создано {importer.created}, обновлено {importer.updated}, "
+                f"без изменений {importer.unchanged}, пропущено {importer.skipped}"
+            )
+        )
+        self.stdout.write(
+            "Для создания копий фото товаров разного размера выполните команду generate_image_variants"
+        )
@@ -0,0 +1,37 @@
+"""
+Команда для полного пересчета фильтров по характеристикам товаров (например, после загрузки фикстур).
+"""
+
+from django.core.management.base import BaseCommand
+
+from catalogs.facets import rebuild_facets
+from catalogs.models import Specification
+
+
+class Command(BaseCommand):
+    help = "Заполняет нормализованные ключи характеристик и пересчитывает фильтры по характеристикам всех категорий"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--category",
+            type=int,
+            action="append",
+            help="Номер категории (по умолчанию пересчитываются все категории)",
+        )
+
+    def handle(self, *args, **options) -> None:
+        # ключи могут быть не заполнены у характеристик, сохраненных в обход save() (loaddata, bulk_create)
+        specifications: list[Specification] = []
+        for specification in Specification.objects.filter(name_key="").iterator():
+            specification.fill_keys()
+            specifications.append(specification)
+        Specification.objects.bulk_update(
+            specifications, ["name_key", "value_key"], batch_size=1000
+        )
+
+        count: int = rebuild_facets(options["category"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обновлено характеристик: {len(specifications)}, сохранено значений фильтров: {count}"
+            )
+        )
@@ -0,0 +1,103 @@
+"""
+Команда для управления массовыми акциями (распродажами): создание, завершение, отмена и просмотр списка.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from catalogs.campaigns import (
+    CampaignError,
+    create_campaign,
+    end_campaign,
+    rollback_campaign,
+    select_campaign_products,
+)
+from catalogs.models import SaleCampaign
+
+
+class Command(BaseCommand):
+    help = "Создает, завершает или отменяет распродажу сразу для множества товаров"
+
+    def add_arguments(self, parser) -> None:
+        subparsers = parser.add_subparsers(dest="operation", required=True)
+
+        create = subparsers.add_parser("create", help="Создать распродажу")
+        create.add_argument("--title", required=True, help="Название распродажи")
+        create.add_argument(
+            "--from", dest="date_from", type=date.fromisoformat, required=True
+        )
+        create.add_argument(
+            "--to", dest="date_to", type=date.fromisoformat, required=True
+        )
+        price = create.add_mutually_exclusive_group(required=True)
+        price.add_argument("--percent", type=Decimal, help="Скидка в процентах")
+        price.add_argument("--price", type=Decimal, help="Фиксированная цена по акции")
+        create.add_argument(
+            "--category", type=int, action="append", default=[], help="Номер категории"
+        )
+        create.add_argument(
+            "--tag", type=int, action="append", default=[], help="Номер тэга"
+        )
+        create.add_argument(
+            "--product", type=int, action="append", default=[], help="Номер товара"
+        )
+
+        for operation, help_text in (
+            ("end", "Завершить распродажу вчерашним днем"),
+            ("rollback", "Отменить распродажу и удалить все ее акции"),
+        ):
+            subparser = subparsers.add_parser(operation, help=help_text)
+            subparser.add_argument("campaign_id", type=int, help="Номер распродажи")
+
+        subparsers.add_parser("list", help="Показать все распродажи")
+
+    def handle(self, *args, **options) -> None:
+        operation: str = options["operation"]
+
+        if operation == "list":
+            for campaign in SaleCampaign.objects.annotate(
+                sales_count=Count("sales")
+            ).order_by("-pk"):
+                self.stdout.write(
+                    f"{campaign.pk}: {campaign} - акций на товары {campaign.sales_count}"
+                )
+            return
+
+        if operation == "create":
+            try:
+                campaign = create_campaign(
+                    title=options["title"],
+                    date_from=options["date_from"],
+                    date_to=options["date_to"],
+                    products=select_campaign_products(
+                        options["category"], options["tag"], options["product"]
+                    ),
+                    percent=options["percent"],
+                    sale_price=options["price"],
+                )
+            except CampaignError as error:
+                raise CommandError(str(error))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Создана распродажа №{campaign.pk}: акций на товары {campaign.sales.count()}"
+                )
+            )
+            return
+
+        campaign = SaleCampaign.objects.filter(pk=options["campaign_id"]).first()
+        if campaign is None:
+            raise CommandError(f"Распродажа №{options['campaign_id']} не найдена")
+
+        if operation == "end":
+            ended: int = end_campaign(campaign)
+            self.stdout.write(
+                self.style.SUCCESS(f"Распродажа завершена, акций на товары: {ended}")
+            )
+        else:
+            deleted: int = rollback_campaign(campaign)
+            self.stdout.write(
+                self.style.SUCCESS(f"Распродажа отменена, удалено акций: {deleted}")
+            )
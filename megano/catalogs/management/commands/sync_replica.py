@@ -0,0 +1,59 @@
+"""
+Команда для копирования основной базы данных SQLite в реплику (для локальной проверки чтения из реплики).
+"""
+
+import os
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from megano.db_routers import REPLICA_DATABASE
+
+
+class Command(BaseCommand):
+    help = "Копирует основную базу данных SQLite в реплику (однократно или с заданным интервалом)"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Повторять копирование каждые N секунд (по умолчанию - однократно)",
+        )
+
+    def copy_database(self, source: str, target: str) -> None:
+        """
+        Метод для согласованного копирования базы данных через backup API SQLite.
+        Копия сначала записывается во временный файл, который затем атомарно заменяет реплику,
+        поэтому читающие реплику процессы никогда не видят частично записанный файл.
+
+        :param source: путь к файлу основной базы
+        :param target: путь к файлу реплики
+        """
+        temp_target = f"{target}.tmp"
+        source_connection = sqlite3.connect(source)
+        target_connection = sqlite3.connect(temp_target)
+        try:
+            source_connection.backup(target_connection)
+        finally:
+            target_connection.close()
+            source_connection.close()
+        os.replace(temp_target, target)
+
+    def handle(self, *args, **options) -> None:
+        if REPLICA_DATABASE not in connections.settings:
+            raise CommandError(
+                "Реплика не настроена: укажите путь к ней в переменной окружения MEGANO_REPLICA_DB"
+            )
+
+        source = str(connections.settings["default"]["NAME"])
+        target = str(connections.settings[REPLICA_DATABASE]["NAME"])
+
+        while True:
+            self.copy_database(source, target)
+            self.stdout.write(f"База данных скопирована в {target}")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,70 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:43
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_reviews(apps, schema_editor):
+    """
+    Удаляет повторные отзывы пользователя на один и тот же товар (остается самый первый),
+    чтобы можно было создать ограничение уникальности (product, profile).
+    """
+    Review = apps.get_model("catalogs", "Review")
+
+    duplicates = (
+        Review.objects.values("product", "profile")
+        .annotate(reviews=Count("pk"), first_pk=Min("pk"))
+        .filter(reviews__gt=1)
+    )
+    for duplicate in duplicates:
+        Review.objects.filter(
+            product=duplicate["product"], profile=duplicate["profile"]
+        ).exclude(pk=duplicate["first_pk"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalogs", "0039_alter_product_category_alter_sale_datefrom_and_more"),
+        ("profile_user", "0003_alter_profile_email"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "price"], name="product_category_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["limited_edition", "count"], name="product_limited_count_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["freeDelivery", "count"], name="product_delivery_count_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sale",
+            index=models.Index(
+                fields=["product", "dateFrom", "dateTo"], name="sale_product_dates_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sale",
+            index=models.Index(fields=["dateTo", "dateFrom"], name="sale_dates_idx"),
+        ),
+        migrations.RunPython(
+            remove_duplicate_reviews, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="review",
+            constraint=models.UniqueConstraint(
+                fields=("product", "profile"), name="unique_review_product_profile"
+            ),
+        ),
+    ]
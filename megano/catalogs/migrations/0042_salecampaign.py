@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalogs", "0041_product_sku"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SaleCampaign",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=150)),
+                ("dateFrom", models.DateField(default=django.utils.timezone.now)),
+                ("dateTo", models.DateField(default=django.utils.timezone.now)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="sale",
+            name="campaign",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sales",
+                to="catalogs.salecampaign",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:00
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalogs", "0042_salecampaign"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                django.db.models.functions.comparison.Collate("title", "NOCASE"),
+                name="product_title_nocase_idx",
+            ),
+        ),
+    ]
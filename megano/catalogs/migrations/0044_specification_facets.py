@@ -0,0 +1,114 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_specification_keys(apps, schema_editor):
+    """
+    Заполнение нормализованных названий и значений у существующих характеристик
+    и первоначальный расчет фильтров по характеристикам для всех категорий.
+    """
+    Specification = apps.get_model("catalogs", "Specification")
+    SpecificationFacet = apps.get_model("catalogs", "SpecificationFacet")
+
+    def normalize(text):
+        return " ".join((text or "").split()).lower()
+
+    specifications = list(Specification.objects.all())
+    for specification in specifications:
+        specification.name_key = normalize(specification.name)
+        specification.value_key = normalize(specification.value)
+    Specification.objects.bulk_update(
+        specifications, ["name_key", "value_key"], batch_size=1000
+    )
+
+    facets = {}
+    products = {}
+    for specification in Specification.objects.exclude(value_key="").prefetch_related(
+        "product"
+    ):
+        for product in specification.product.all():
+            if product.category_id is None:
+                continue
+            key = (product.category_id, specification.name_key, specification.value_key)
+            facets.setdefault(
+                key,
+                SpecificationFacet(
+                    category_id=product.category_id,
+                    name=specification.name,
+                    value=specification.value,
+                    name_key=specification.name_key,
+                    value_key=specification.value_key,
+                ),
+            )
+            products.setdefault(key, set()).add(product.pk)
+    for key, facet in facets.items():
+        facet.products_count = len(products[key])
+    SpecificationFacet.objects.bulk_create(facets.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalogs", "0043_product_title_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpecificationFacet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=150)),
+                ("value", models.CharField(max_length=200)),
+                ("name_key", models.CharField(max_length=150)),
+                ("value_key", models.CharField(max_length=200)),
+                ("products_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="specification",
+            name="name_key",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=150
+            ),
+        ),
+        migrations.AddField(
+            model_name="specification",
+            name="value_key",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=200
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="specification",
+            index=models.Index(
+                fields=["name_key", "value_key"], name="specification_key_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="specificationfacet",
+            name="category",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="facets",
+                to="catalogs.category",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="specificationfacet",
+            constraint=models.UniqueConstraint(
+                fields=("category", "name_key", "value_key"),
+                name="unique_facet_category_key",
+            ),
+        ),
+        migrations.RunPython(fill_specification_keys, migrations.RunPython.noop),
+    ]
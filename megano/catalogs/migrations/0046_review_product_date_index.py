@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalogs", "0045_product_recommendations"),
+        ("profile_user", "0003_alter_profile_email"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                models.F("product"),
+                models.OrderBy(models.F("date"), descending=True),
+                name="review_product_date_idx",
+            ),
+        ),
+    ]
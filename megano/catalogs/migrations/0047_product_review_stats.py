@@ -0,0 +1,47 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:21
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_review_stats(apps, schema_editor):
+    """
+    Заполнение количества отзывов и суммы оценок у существующих товаров одним UPDATE с подзапросами.
+    """
+    Product = apps.get_model("catalogs", "Product")
+    Review = apps.get_model("catalogs", "Review")
+    reviews = Review.objects.filter(product=OuterRef("pk")).order_by().values("product")
+    Product.objects.update(
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(count=Count("pk")).values("count")),
+            0,
+            output_field=IntegerField(),
+        ),
+        rating_total=Coalesce(
+            Subquery(reviews.annotate(total=Sum("rate")).values("total")),
+            0,
+            output_field=IntegerField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalogs", "0046_review_product_date_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="rating_total",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="reviews_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_review_stats, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 from datetime import datetime
 from django.utils.timezone import now
 from django.db import models
-from django.db.models import Avg
+from django.db.models import Avg, Case, F, FloatField, When
+from django.db.models.functions import Cast, Collate, Greatest, Round
 from profile_user.models import Profile
 
 
@@ -69,11 +70,43 @@ class Product(models.Model):
     fullDescription = models.TextField(blank=True)
     freeDelivery = models.BooleanField(default=False)
     rating = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
+    # количество отзывов и сумма их оценок, по которым рейтинг пересчитывается без чтения всех отзывов
+    reviews_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_total = models.PositiveIntegerField(default=0, editable=False)
     limited_edition = models.BooleanField(default=False)
+    # артикул товара у поставщика, по которому товар находится при повторном импорте каталога
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # индекс для поиска по началу названия без учета регистра (поиск в админ-панели)
+            models.Index(Collate("title", "NOCASE"), name="product_title_nocase_idx"),
+            # составные индексы под фильтры каталога, главной страницы и лимитированных товаров
+            models.Index(
+                fields=["category", "price"], name="product_category_price_idx"
+            ),
+            models.Index(
+                fields=["limited_edition", "count"], name="product_limited_count_idx"
+            ),
+            models.Index(
+                fields=["freeDelivery", "count"], name="product_delivery_count_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title}, №{self.pk}, цена - {self.price}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Метод для создания товара из строки БД, запоминающий загруженную категорию,
+        чтобы при сохранении узнать о переносе товара в другую категорию без дополнительного запроса.
+        """
+        instance = super().from_db(db, field_names, values)
+        if "category_id" in field_names:
+            instance._loaded_category_id = values[field_names.index("category_id")]
+        return instance
+
     @property
     def avg_rating(self) -> int:
         """
@@ -91,6 +124,33 @@ class Product(models.Model):
         self.rating = value
         self.save()
 
+    @classmethod
+    def update_review_stats(
+        cls, product_id: int, count_delta: int, rate_delta: int
+    ) -> int:
+        """
+        Метод для пересчета количества отзывов и рейтинга товара одним UPDATE с F-выражениями.
+        Значения вычисляются в БД из текущих, поэтому одновременные отзывы не теряют обновления друг друга.
+
+        :param product_id: номер товара
+        :param count_delta: изменение количества отзывов (1 - отзыв добавлен, -1 - удален)
+        :param rate_delta: изменение суммы оценок
+        :return: количество обновленных товаров (0, если товара нет)
+        """
+        # значения не опускаются ниже нуля, даже если отзывы создавались в обход сигналов (bulk_create)
+        count = Greatest(F("reviews_count") + count_delta, 0)
+        total = Greatest(F("rating_total") + rate_delta, 0)
+        return cls.objects.filter(pk=product_id).update(
+            reviews_count=count,
+            rating_total=total,
+            rating=Case(
+                # после удаления последнего отзыва рейтинга у товара нет
+                When(reviews_count__lte=-count_delta, then=None),
+                default=Round(Cast(total, FloatField()) / count, 1),
+                output_field=models.DecimalField(max_digits=2, decimal_places=1),
+            ),
+        )
+
 
 class ProductImage(models.Model):
     """
@@ -116,19 +176,87 @@ class Tag(models.Model):
         return f"#{self.name}"
 
 
+def normalize_attribute(text: str | None) -> str:
+    """
+    Функция для приведения названия или значения характеристики товара к ключу для поиска и фильтрации:
+    без пробелов по краям, в нижнем регистре и с одинарными пробелами между словами.
+
+    :param text: название или значение характеристики
+    :return: нормализованный ключ
+    """
+    return " ".join((text or "").split()).lower()
+
+
 class Specification(models.Model):
     """
     Модель представляющая спецификацию товара. У одного товара может быть несколько спецификаций.
     А также одна спецификация может быть прикреплена сразу к нескольким товарам.
+    Таблица связи спецификаций с товарами служит обратным индексом для фильтрации каталога по характеристикам.
     """
 
     product = models.ManyToManyField(Product, related_name="specifications", blank=True)
     name = models.CharField(max_length=150)
     value = models.CharField(max_length=200, blank=True, null=True)
+    # нормализованные название и значение, по которым фильтруется каталог
+    name_key = models.CharField(max_length=150, blank=True, default="", editable=False)
+    value_key = models.CharField(max_length=200, blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["name_key", "value_key"], name="specification_key_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} - {self.value}"
 
+    def fill_keys(self) -> None:
+        """
+        Метод для заполнения нормализованных названия и значения характеристики.
+        Вызывается при сохранении, а при массовом создании (bulk_create) - вручную.
+        """
+        self.name_key = normalize_attribute(self.name)
+        self.value_key = normalize_attribute(self.value)
+
+    def save(self, *args, **kwargs) -> None:
+        self.fill_keys()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {
+                *kwargs["update_fields"],
+                "name_key",
+                "value_key",
+            }
+        super().save(*args, **kwargs)
+
+
+class SpecificationFacet(models.Model):
+    """
+    Модель, представляющая заранее посчитанное значение фильтра по характеристике для категории:
+    сколько товаров категории имеют характеристику name со значением value.
+    Пересчитывается при изменении характеристик и категорий товаров.
+    """
+
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="facets"
+    )
+    name = models.CharField(max_length=150)
+    value = models.CharField(max_length=200)
+    name_key = models.CharField(max_length=150)
+    value_key = models.CharField(max_length=200)
+    products_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["category", "name_key", "value_key"],
+                name="unique_facet_category_key",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.category_id}: {self.name} - {self.value} ({self.products_count})"
+
 
 class Review(models.Model):
     """
@@ -148,10 +276,39 @@ class Review(models.Model):
     rate = models.IntegerField()
     date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # один пользователь может оставить только один отзыв на товар
+            models.UniqueConstraint(
+                fields=["product", "profile"], name="unique_review_product_profile"
+            ),
+        ]
+        indexes = [
+            # отзывы товара от новых к старым (постраничный вывод отзывов и последние отзывы на странице товара)
+            models.Index(
+                "product", models.F("date").desc(), name="review_product_date_idx"
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"{self.rate} {self.date} {self.author}"
 
 
+class SaleCampaign(models.Model):
+    """
+    Модель, представляющая массовую акцию (распродажу) - набор акций Sale на множество товаров,
+    которые создаются, завершаются и отменяются одной операцией.
+    """
+
+    title = models.CharField(max_length=150)
+    dateFrom = models.DateField(default=now)
+    dateTo = models.DateField(default=now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"Распродажа {self.title!r} c {self.dateFrom} по {self.dateTo}"
+
+
 class Sale(models.Model):
     """
     Модель, представляющая акцию на товар. Одна акция на товар sale может быть связана только с одним товаром.
@@ -159,10 +316,28 @@ class Sale(models.Model):
     """
 
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sales")
+    # массовая акция, в рамках которой создана акция на товар (при удалении распродажи удаляются и ее акции)
+    campaign = models.ForeignKey(
+        SaleCampaign,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="sales",
+    )
     salePrice = models.DecimalField(max_digits=10, decimal_places=2, blank=True)
     dateFrom = models.DateField(default=now)
     dateTo = models.DateField(default=now)
 
+    class Meta:
+        indexes = [
+            # поиск действующей акции конкретного товара (оплата заказа, карточка товара)
+            models.Index(
+                fields=["product", "dateFrom", "dateTo"], name="sale_product_dates_idx"
+            ),
+            # список всех действующих акций
+            models.Index(fields=["dateTo", "dateFrom"], name="sale_dates_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.product} {self.salePrice} c {self.dateFrom} по {self.dateTo}"
 
@@ -172,3 +347,36 @@ class Sale(models.Model):
         :return: int - процент скидки
         """
         return ((self.product.price - self.salePrice) / self.product.price) * 100
+
+
+class ProductRecommendation(models.Model):
+    """
+    Модель, представляющая рекомендацию "часто покупают вместе": товар recommended, который покупали вместе с product.
+    Таблица заполняется целиком командой build_recommendations по истории оплаченных заказов.
+    """
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="recommendations"
+    )
+    recommended = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="recommended_for"
+    )
+    # сходство товаров (косинусная мера по заказам, от 0 до 1) и количество заказов, в которых они были вместе
+    score = models.FloatField()
+    together = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "recommended"], name="unique_product_recommendation"
+            ),
+        ]
+        indexes = [
+            # рекомендации товара сразу в порядке убывания сходства
+            models.Index(
+                "product", models.F("score").desc(), name="recommendation_score_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} -> {self.recommended_id} ({self.score:.3f})"
@@ -0,0 +1,18 @@
+"""
+Модуль с классами пагинации списков каталога.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class ReviewCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация отзывов товара: от новых к старым.
+    Следующая страница находится по индексу (product, -date) с условием date < курсора, без OFFSET,
+    поэтому время ответа не зависит ни от номера страницы, ни от общего количества отзывов.
+    """
+
+    page_size = 10
+    page_size_query_param = "limit"
+    max_page_size = 50
+    ordering = ("-date", "-pk")
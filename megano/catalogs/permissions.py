@@ -0,0 +1,29 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+
+FEED_TOKEN_PARAM: str = "token"
+FEED_TOKEN_HEADER: str = "HTTP_X_FEED_TOKEN"
+
+
+class HasFeedAccess(BasePermission):
+    """
+    Класс разрешения для выгрузки каталога: сотрудникам и партнерам с токеном из настройки FEED_TOKENS.
+    Токен передается в заголовке X-Feed-Token или в параметре ?token= (если маркетплейс принимает только адрес).
+    """
+
+    message = "Для выгрузки каталога нужен токен партнера"
+
+    def has_permission(self, request: Request, view) -> bool:
+        if request.user and request.user.is_staff:
+            return True
+        token: str = request.META.get(FEED_TOKEN_HEADER) or request.query_params.get(
+            FEED_TOKEN_PARAM, ""
+        )
+        # сравнение за постоянное время, чтобы токен нельзя было подобрать по времени ответа
+        return bool(token) and any(
+            hmac.compare_digest(token.encode(), feed_token.encode())
+            for feed_token in settings.FEED_TOKENS
+        )
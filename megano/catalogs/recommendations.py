@@ -0,0 +1,139 @@
+"""
+Модуль для рекомендаций "часто покупают вместе" по истории оплаченных заказов.
+
+Матрица совместных покупок (товар x товар) считается в БД одним агрегирующим запросом: таблица строк заказов
+соединяется сама с собой по номеру заказа и группируется по паре товаров. Поэтому в Python нет цикла по заказам -
+обрабатываются только уже посчитанные пары товаров, отсортированные по первому товару пары.
+Сходство пары нормализуется косинусной мерой: together / sqrt(orders(a) * orders(b)),
+чтобы товары, которые есть почти в каждом заказе, не попадали в рекомендации ко всем товарам.
+Для каждого товара сохраняются top лучших соседей в таблицу ProductRecommendation.
+"""
+
+import heapq
+import math
+from collections.abc import Iterable, Iterator
+from itertools import groupby, islice
+
+from django.db import transaction
+from django.db.models import Count, F, Q, QuerySet, Sum
+
+from order.models import OrderProduct
+from .models import Product, ProductRecommendation
+
+PAID_STATUS: str = "Оплачен"
+
+# количество рекомендаций, сохраняемых для каждого товара
+RECOMMENDATIONS_TOP: int = 10
+
+# количество строк, сохраняемых одним INSERT и читаемых из БД за один раз
+RECOMMENDATIONS_BATCH_SIZE: int = 2000
+
+
+def get_paid_lines() -> QuerySet:
+    """
+    Функция для получения строк оплаченных заказов.
+    """
+    return OrderProduct.objects.filter(order__status__title=PAID_STATUS)
+
+
+def get_product_orders() -> dict[int, int]:
+    """
+    Функция для подсчета количества оплаченных заказов с каждым товаром.
+
+    :return: словарь {номер товара: количество заказов}
+    """
+    return dict(
+        get_paid_lines()
+        .values("product")
+        .annotate(orders=Count("order"))
+        .values_list("product", "orders")
+    )
+
+
+def iter_pairs(min_together: int = 1) -> Iterator[tuple[int, int, int]]:
+    """
+    Генератор пар товаров, которые были вместе хотя бы в min_together оплаченных заказах.
+    Каждая пара выдается в обоих направлениях, пары отсортированы по первому товару.
+
+    :param min_together: минимальное количество общих заказов
+    :return: итератор кортежей (товар, другой товар, количество общих заказов)
+    """
+    return (
+        get_paid_lines()
+        .annotate(other=F("order__orderproduct__product"))
+        .filter(Q(other__lt=F("product")) | Q(other__gt=F("product")))
+        .values("product", "other")
+        .annotate(together=Count("order"))
+        .filter(together__gte=min_together)
+        .order_by("product")
+        .values_list("product", "other", "together")
+        .iterator(chunk_size=RECOMMENDATIONS_BATCH_SIZE)
+    )
+
+
+def iter_recommendations(
+    top: int = RECOMMENDATIONS_TOP, min_together: int = 1
+) -> Iterator[ProductRecommendation]:
+    """
+    Генератор рекомендаций: для каждого товара - top самых похожих по совместным покупкам товаров.
+
+    :param top: количество рекомендаций для одного товара
+    :param min_together: минимальное количество общих заказов
+    :return: итератор несохраненных объектов ProductRecommendation
+    """
+    orders: dict[int, int] = get_product_orders()
+    for product_id, pairs in groupby(
+        iter_pairs(min_together), key=lambda pair: pair[0]
+    ):
+        scored: Iterator[tuple[float, int, int]] = (
+            (together / math.sqrt(orders[product_id] * orders[other]), other, together)
+            for _, other, together in pairs
+        )
+        for score, other, together in heapq.nlargest(top, scored):
+            yield ProductRecommendation(
+                product_id=product_id,
+                recommended_id=other,
+                score=score,
+                together=together,
+            )
+
+
+@transaction.atomic
+def build_recommendations(top: int = RECOMMENDATIONS_TOP, min_together: int = 1) -> int:
+    """
+    Функция для полного пересчета таблицы рекомендаций в одной транзакции:
+    пока она не завершена, сайт показывает прежние рекомендации.
+
+    :param top: количество рекомендаций для одного товара
+    :param min_together: минимальное количество общих заказов
+    :return: количество сохраненных рекомендаций
+    """
+    ProductRecommendation.objects.all().delete()
+    saved: int = 0
+    recommendations: Iterator[ProductRecommendation] = iter_recommendations(
+        top, min_together
+    )
+    while batch := list(islice(recommendations, RECOMMENDATIONS_BATCH_SIZE)):
+        ProductRecommendation.objects.bulk_create(batch)
+        saved += len(batch)
+    return saved
+
+
+def get_recommended_products(
+    product_ids: Iterable[int], limit: int = RECOMMENDATIONS_TOP
+) -> QuerySet:
+    """
+    Функция для получения рекомендаций к одному товару или к нескольким товарам (корзине).
+    Товары из product_ids в рекомендации не попадают, сходство с несколькими товарами складывается.
+
+    :param product_ids: номера товаров
+    :param limit: количество рекомендаций
+    :return: QuerySet рекомендованных товаров в порядке убывания сходства
+    """
+    product_ids = list(product_ids)
+    return (
+        Product.objects.filter(recommended_for__product__in=product_ids)
+        .exclude(pk__in=product_ids)
+        .annotate(recommendation_score=Sum("recommended_for__score"))
+        .order_by("-recommendation_score", "pk")[:limit]
+    )
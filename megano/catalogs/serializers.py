@@ -3,6 +3,23 @@ from rest_framework import serializers
 from .models import Category, Product, ProductImage, Tag, Review, Specification, Sale
 from rest_framework_recursive.fields import RecursiveField
 from django.core.exceptions import ObjectDoesNotExist
+from .images import get_srcset
+
+
+def get_image_representation(image) -> dict:
+    """
+    Функция для представления данных о картинке: ссылка на оригинал, а также
+    srcset из уменьшенных копий в исходном формате и в формате WebP (если копии уже созданы).
+
+    :param image: файл изображения из поля модели
+    :return: словарь с данными о картинке
+    """
+    return {
+        "src": image.url,
+        "alt": image.name,
+        "srcset": get_srcset(image.name),
+        "webpSrcset": get_srcset(image.name, webp=True),
+    }
 
 
 class ImageFieldSerializer(serializers.Field):
@@ -11,10 +28,7 @@ class ImageFieldSerializer(serializers.Field):
     """
 
     def to_representation(self, value):
-        return {
-            "src": value.url,
-            "alt": value.name,
-        }
+        return get_image_representation(value)
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -23,10 +37,7 @@ class ProductImageSerializer(serializers.ModelSerializer):
     """
 
     def to_representation(self, instance: ProductImage):
-        return {
-            "src": instance.image.url,
-            "alt": instance.image.name,
-        }
+        return get_image_representation(instance.image)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -47,6 +58,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ["author", "email", "text", "rate", "date"]
+        extra_kwargs = {"rate": {"min_value": 1, "max_value": 5}}
 
 
 class SpecificationSerializer(serializers.ModelSerializer):
@@ -123,11 +135,11 @@ class ProductSerializer(serializers.ModelSerializer):
 
     def get_reviews(self, instance):
         """
-        Метод, который подсчитывает и возвращает количество отзывов, связанных с товаров.
+        Метод, который возвращает количество отзывов товара (хранится у товара и обновляется при изменении отзывов).
         :param instance: экземпляр модели продукта
         :return: количество отзывов у продукта
         """
-        return instance.reviews.count()
+        return instance.reviews_count
 
 
 class AloneProductSerializer(serializers.ModelSerializer):
@@ -139,7 +151,9 @@ class AloneProductSerializer(serializers.ModelSerializer):
 
     images = ProductImageSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
-    reviews = ReviewSerializer(many=True, read_only=True)
+    # только последние отзывы (см. ProductRetrieveView), остальные - через /api/product/<id>/reviews/
+    reviews = ReviewSerializer(source="latest_reviews", many=True, read_only=True)
+    reviewsCount = serializers.IntegerField(source="reviews_count", read_only=True)
     specifications = SpecificationSerializer(many=True, read_only=True)
     price = serializers.SerializerMethodField()
 
@@ -158,6 +172,7 @@ class AloneProductSerializer(serializers.ModelSerializer):
             "images",
             "tags",
             "reviews",
+            "reviewsCount",
             "specifications",
             "rating",
         ]
@@ -0,0 +1,259 @@
+"""
+Модуль с обработчиками сигналов приложения каталога.
+"""
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from profile_user.models import Profile
+from .categories import category_tree
+from .facets import get_product_categories, schedule_facets_rebuild
+from .images import schedule_variants
+from .models import (
+    Category,
+    Product,
+    ProductImage,
+    Review,
+    Specification,
+    Tag,
+)
+from .suggest import Suggestion, suggest_index
+
+
+def schedule_image_variants(image, raw: bool) -> None:
+    """
+    Функция ставит в очередь создание копий изображения после успешного завершения транзакции.
+    При загрузке фикстур (raw=True) копии не создаются - для этого есть команда generate_image_variants.
+
+    :param image: файл изображения из поля модели
+    :param raw: True, если объект сохраняется при загрузке фикстуры
+    """
+    if not raw and image and image.name:
+        name: str = image.name
+        transaction.on_commit(lambda: schedule_variants(name))
+
+
+@receiver(post_save, sender=ProductImage)
+def product_image_saved(
+    sender, instance: ProductImage, raw: bool = False, **kwargs
+) -> None:
+    """
+    Обработчик сигнала, создающий копии нового или измененного фото товара.
+    """
+    schedule_image_variants(instance.image, raw)
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance: Category, raw: bool = False, **kwargs) -> None:
+    """
+    Обработчик сигнала, создающий копии нового или измененного фото категории.
+    """
+    schedule_image_variants(instance.image, raw)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_tree_changed(sender, **kwargs) -> None:
+    """
+    Обработчик сигнала, сбрасывающий дерево категорий в памяти процесса при изменении категории
+    (и еще раз после завершения транзакции, чтобы в дерево не попали данные, прочитанные до нее).
+    """
+    category_tree.clear()
+    transaction.on_commit(category_tree.clear)
+
+
+@receiver(post_save, sender=Profile)
+def profile_saved(sender, instance: Profile, raw: bool = False, **kwargs) -> None:
+    """
+    Обработчик сигнала, создающий копии нового или измененного аватара пользователя.
+    """
+    schedule_image_variants(instance.avatar, raw)
+
+
+@receiver(m2m_changed, sender=Specification.product.through)
+def specification_products_changed(
+    sender, instance, action: str, reverse: bool, pk_set: set | None, **kwargs
+) -> None:
+    """
+    Обработчик сигнала, пересчитывающий фильтры по характеристикам категорий,
+    товары которых получили или потеряли характеристику.
+    """
+    if action not in ("pre_clear", "post_add", "post_remove"):
+        return
+    if reverse:
+        # характеристики изменились у одного товара (product.specifications.add(...))
+        schedule_facets_rebuild([instance.category_id])
+    elif action == "pre_clear":
+        # до очистки связи еще известно, к каким товарам была прикреплена характеристика
+        schedule_facets_rebuild(get_product_categories(instance.product.values("pk")))
+    else:
+        schedule_facets_rebuild(get_product_categories(pk_set or ()))
+
+
+@receiver(post_save, sender=Specification)
+def specification_saved(
+    sender, instance: Specification, created: bool, raw: bool = False, **kwargs
+) -> None:
+    """
+    Обработчик сигнала, пересчитывающий фильтры при изменении названия или значения характеристики.
+    """
+    if not raw and not created:
+        schedule_facets_rebuild(get_product_categories(instance.product.values("pk")))
+
+
+@receiver(pre_delete, sender=Specification)
+def specification_deleted(sender, instance: Specification, **kwargs) -> None:
+    """
+    Обработчик сигнала, пересчитывающий фильтры после удаления характеристики.
+    """
+    schedule_facets_rebuild(get_product_categories(instance.product.values("pk")))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(
+    sender, instance: Product, created: bool, raw: bool = False, **kwargs
+) -> None:
+    """
+    Обработчик сигнала, пересчитывающий фильтры обеих категорий, если товар перенесен в другую категорию.
+    Прежняя категория запоминается при загрузке товара из БД (Product.from_db) и после каждого сохранения.
+    """
+    if raw:
+        return
+    previous: int | None = instance.__dict__.get(
+        "_loaded_category_id", instance.category_id
+    )
+    instance._loaded_category_id = instance.category_id
+    if not created and previous != instance.category_id:
+        schedule_facets_rebuild([previous, instance.category_id])
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance: Product, **kwargs) -> None:
+    """
+    Обработчик сигнала, пересчитывающий фильтры категории удаленного товара.
+    """
+    schedule_facets_rebuild([instance.category_id])
+
+
+def update_suggestions(callback) -> None:
+    """
+    Функция для изменения индекса подсказок поиска после успешного завершения транзакции.
+    Пока индекс не построен, изменения не нужны - он будет загружен из БД при первом запросе.
+
+    :param callback: функция, изменяющая индекс
+    """
+    if suggest_index.is_built:
+        transaction.on_commit(callback)
+
+
+@receiver(post_save, sender=Product)
+def product_suggestion_saved(
+    sender, instance: Product, raw: bool = False, **kwargs
+) -> None:
+    """
+    Обработчик сигнала, добавляющий новый или переименованный товар в подсказки поиска.
+    """
+    if not raw:
+        suggestion = Suggestion("product", instance.pk, instance.title)
+        update_suggestions(lambda: suggest_index.add(suggestion))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+def suggestion_saved(sender, instance, raw: bool = False, **kwargs) -> None:
+    """
+    Обработчик сигнала, добавляющий новый или переименованный тэг или категорию в подсказки поиска.
+    """
+    if raw:
+        return
+    if sender is Tag:
+        suggestion = Suggestion("tag", instance.pk, instance.name)
+    else:
+        suggestion = Suggestion("category", instance.pk, instance.title)
+    update_suggestions(lambda: suggest_index.add(suggestion))
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Category)
+def suggestion_deleted(sender, instance, **kwargs) -> None:
+    """
+    Обработчик сигнала, удаляющий товар, тэг или категорию из подсказок поиска.
+    """
+    kind: str = {Product: "product", Tag: "tag", Category: "category"}[sender]
+    pk: int = instance.pk
+    update_suggestions(lambda: suggest_index.remove(kind, pk))
+
+
+@receiver(m2m_changed, sender=Tag.products.through)
+def tag_products_changed(
+    sender, instance, action: str, reverse: bool, pk_set: set | None, **kwargs
+) -> None:
+    """
+    Обработчик сигнала, обновляющий популярность тэгов (количество их товаров) в подсказках поиска.
+    """
+    if not suggest_index.is_built or action not in (
+        "post_add",
+        "post_remove",
+        "post_clear",
+    ):
+        return
+    tags = Tag.objects.annotate(products_count=Count("products"))
+    if not reverse:
+        tags = tags.filter(pk=instance.pk)
+    elif pk_set:
+        tags = tags.filter(pk__in=pk_set)
+    # после очистки тэгов товара (pk_set пустой) неизвестно, какие тэги были, поэтому пересчитываются все
+    counts: list[tuple[int, int]] = list(tags.values_list("pk", "products_count"))
+
+    def set_popularity() -> None:
+        for pk, count in counts:
+            suggest_index.set_popularity("tag", pk, count)
+
+    update_suggestions(set_popularity)
+
+
+@receiver(pre_save, sender=Review)
+def review_rate_changing(sender, instance: Review, raw: bool = False, **kwargs) -> None:
+    """
+    Обработчик сигнала, запоминающий прежнюю оценку отзыва перед его изменением (например, в админ-панели).
+    """
+    if not raw and instance.pk:
+        instance._previous_rate = (
+            Review.objects.filter(pk=instance.pk).values_list("rate", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def review_saved(
+    sender, instance: Review, created: bool, raw: bool = False, **kwargs
+) -> None:
+    """
+    Обработчик сигнала, пересчитывающий количество отзывов и рейтинг товара при создании или изменении отзыва.
+    """
+    if raw:
+        return
+    if created:
+        Product.update_review_stats(instance.product_id, 1, int(instance.rate))
+        return
+    previous: int | None = instance.__dict__.pop("_previous_rate", None)
+    if previous is not None and previous != int(instance.rate):
+        Product.update_review_stats(
+            instance.product_id, 0, int(instance.rate) - previous
+        )
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance: Review, **kwargs) -> None:
+    """
+    Обработчик сигнала, пересчитывающий количество отзывов и рейтинг товара после удаления отзыва.
+    """
+    Product.update_review_stats(instance.product_id, -1, -int(instance.rate))
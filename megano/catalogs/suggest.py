@@ -0,0 +1,408 @@
+"""
+Модуль для подсказок в строке поиска по первым буквам названий товаров, тэгов и категорий.
+
+Все названия хранятся в памяти процесса в префиксном индексе: слова, начинающиеся с введенного текста,
+находятся двоичным поиском в отсортированном списке слов, поэтому подсказки выдаются без запросов к БД. Индекс строится из БД один раз при первом запросе, а затем обновляется
+по сигналам сохранения и удаления товаров, тэгов и категорий. Индекс общий для всех потоков процесса.
+Изменения, сделанные другими процессами, попадают в индекс при периодической фоновой перестройке
+(через SUGGEST_INDEX_MAX_AGE секунд).
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections.abc import Iterator
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Sum
+
+from order.models import OrderProduct
+from .models import Category, Product, Tag
+
+log = logging.getLogger(__name__)
+
+# через сколько секунд индекс перестраивается из БД целиком (None - только по сигналам)
+SUGGEST_INDEX_MAX_AGE: int | None = getattr(settings, "SUGGEST_INDEX_MAX_AGE", 600)
+
+# сколько разных запросов хранится в кэше результатов до его очистки
+SUGGEST_CACHE_SIZE: int = 2048
+
+# сколько подсказок самое большее просматривается для запроса из нескольких слов
+SUGGEST_SCAN_LIMIT: int = 5000
+
+# начиная с какого количества подходящих слов для начала слова заранее хранятся самые популярные подсказки,
+# и сколько таких подсказок хранится
+SUGGEST_HEAVY_PREFIX_WORDS: int = 200
+SUGGEST_TOP_SIZE: int = 50
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def get_words(text: str) -> list[str]:
+    """
+    Функция для разбиения текста на слова для поиска: в нижнем регистре и с заменой "ё" на "е".
+
+    :param text: название товара, тэга или категории
+    :return: список слов
+    """
+    return WORD_PATTERN.findall(text.lower().replace("ё", "е"))
+
+
+class Suggestion:
+    """
+    Класс, представляющий одну подсказку: товар, тэг или категорию с ее популярностью.
+    """
+
+    __slots__ = ("kind", "pk", "title", "popularity", "words")
+
+    def __init__(self, kind: str, pk: int, title: str, popularity: int = 0) -> None:
+        self.kind = kind
+        self.pk = pk
+        self.title = title
+        self.popularity = popularity
+        self.words: list[str] = get_words(title)
+
+    @property
+    def key(self) -> tuple[str, int]:
+        return self.kind, self.pk
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.kind,
+            "id": self.pk,
+            "title": self.title,
+            "popularity": self.popularity,
+        }
+
+
+def remove_entry(entries: list[tuple], entry: tuple) -> None:
+    """
+    Функция для удаления элемента из отсортированного списка.
+    """
+    position: int = bisect_left(entries, entry)
+    if position < len(entries) and entries[position] == entry:
+        del entries[position]
+
+
+def get_top_entries(
+    vocabulary: list[str],
+    postings: dict[str, list[tuple[int, tuple[str, int]]]],
+    prefix: str,
+) -> list[tuple[int, tuple[str, int]]]:
+    """
+    Функция для выбора самых популярных подсказок со словами, начинающимися с prefix.
+
+    :param vocabulary: отсортированный список слов
+    :param postings: списки подсказок каждого слова
+    :param prefix: начало слова
+    :return: до SUGGEST_TOP_SIZE различных подсказок по убыванию популярности
+    """
+    entries: list[tuple[int, tuple[str, int]]] = []
+    position: int = bisect_left(vocabulary, prefix)
+    while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+        entries += postings[vocabulary[position]][:SUGGEST_TOP_SIZE]
+        position += 1
+    return sorted(set(heapq.nsmallest(SUGGEST_TOP_SIZE * 2, entries)))[
+        :SUGGEST_TOP_SIZE
+    ]
+
+
+class SuggestIndex:
+    """
+    Класс префиксного индекса подсказок. Все методы потокобезопасны.
+
+    Для каждого слова хранится список подсказок, отсортированный по убыванию популярности,
+    а сами слова - в отсортированном списке. Для запроса находятся все слова с нужным началом,
+    и их списки сливаются (heapq.merge) до набора нужного количества подсказок.
+    Для коротких начал, под которые подходят сотни разных слов (например, "а" или "арт1"),
+    слияние было бы долгим, поэтому для них заранее хранятся самые популярные подсказки.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._suggestions: dict[tuple[str, int], Suggestion] = {}
+        # отсортированный список всех различных слов
+        self._vocabulary: list[str] = []
+        # для каждого слова - отсортированный список пар (-популярность, ключ подсказки)
+        self._postings: dict[str, list[tuple[int, tuple[str, int]]]] = {}
+        # для начал слов, под которые подходит много слов, - самые популярные подсказки
+        self._top: dict[str, list[tuple[int, tuple[str, int]]]] = {}
+        self._cache: dict[tuple[str, int], list[dict]] = {}
+        self._built_at: float | None = None
+        self._rebuilding: bool = False
+
+    @property
+    def is_built(self) -> bool:
+        return self._built_at is not None
+
+    def __len__(self) -> int:
+        return len(self._suggestions)
+
+    def build(self, suggestions: list[Suggestion]) -> None:
+        """
+        Метод для замены содержимого индекса целиком.
+
+        :param suggestions: все подсказки
+        """
+        postings: dict[str, list[tuple[int, tuple[str, int]]]] = {}
+        for suggestion in suggestions:
+            for word in set(suggestion.words):
+                postings.setdefault(word, []).append(
+                    (-suggestion.popularity, suggestion.key)
+                )
+        for posting in postings.values():
+            posting.sort()
+        vocabulary: list[str] = sorted(postings)
+
+        prefix_words: dict[str, int] = {}
+        for word in vocabulary:
+            for length in range(1, len(word) + 1):
+                prefix_words[word[:length]] = prefix_words.get(word[:length], 0) + 1
+        top: dict[str, list[tuple[int, tuple[str, int]]]] = {
+            prefix: get_top_entries(vocabulary, postings, prefix)
+            for prefix, count in prefix_words.items()
+            if count >= SUGGEST_HEAVY_PREFIX_WORDS
+        }
+
+        with self._lock:
+            self._suggestions = {
+                suggestion.key: suggestion for suggestion in suggestions
+            }
+            self._postings = postings
+            self._vocabulary = vocabulary
+            self._top = top
+            self._cache = {}
+            self._built_at = time.monotonic()
+
+    def add(self, suggestion: Suggestion) -> None:
+        """
+        Метод для добавления подсказки или замены подсказки с тем же ключом.
+        Если популярность новой подсказки неизвестна (0), то сохраняется популярность прежней.
+        """
+        with self._lock:
+            previous: Suggestion | None = self._suggestions.get(suggestion.key)
+            if previous is not None:
+                if not suggestion.popularity:
+                    suggestion.popularity = previous.popularity
+                self._remove_entries(previous)
+            self._suggestions[suggestion.key] = suggestion
+            self._add_entries(suggestion)
+            self._cache = {}
+
+    def remove(self, kind: str, pk: int) -> None:
+        """
+        Метод для удаления подсказки из индекса.
+        """
+        with self._lock:
+            suggestion: Suggestion | None = self._suggestions.pop((kind, pk), None)
+            if suggestion is not None:
+                self._remove_entries(suggestion)
+                self._cache = {}
+
+    def set_popularity(self, kind: str, pk: int, popularity: int) -> None:
+        """
+        Метод для изменения популярности подсказки.
+        """
+        with self._lock:
+            suggestion: Suggestion | None = self._suggestions.get((kind, pk))
+            if suggestion is not None and suggestion.popularity != popularity:
+                self._remove_entries(suggestion)
+                suggestion.popularity = popularity
+                self._add_entries(suggestion)
+                self._cache = {}
+
+    def _get_top_prefixes(self, suggestion: Suggestion) -> set[str]:
+        return {
+            word[:length]
+            for word in suggestion.words
+            for length in range(1, len(word) + 1)
+            if word[:length] in self._top
+        }
+
+    def _add_entries(self, suggestion: Suggestion) -> None:
+        entry: tuple[int, tuple[str, int]] = (-suggestion.popularity, suggestion.key)
+        for word in set(suggestion.words):
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = []
+                insort(self._vocabulary, word)
+            insort(posting, entry)
+        for prefix in self._get_top_prefixes(suggestion):
+            top = self._top[prefix]
+            if len(top) < SUGGEST_TOP_SIZE or entry < top[-1]:
+                insort(top, entry)
+                del top[SUGGEST_TOP_SIZE:]
+
+    def _remove_entries(self, suggestion: Suggestion) -> None:
+        entry: tuple[int, tuple[str, int]] = (-suggestion.popularity, suggestion.key)
+        for word in set(suggestion.words):
+            posting = self._postings.get(word)
+            if posting is None:
+                continue
+            remove_entry(posting, entry)
+            if not posting:
+                del self._postings[word]
+                del self._vocabulary[bisect_left(self._vocabulary, word)]
+        for prefix in self._get_top_prefixes(suggestion):
+            top = self._top[prefix]
+            remove_entry(top, entry)
+            # после удалений в списке может не хватить подсказок - тогда он собирается заново
+            if len(top) < SUGGEST_TOP_SIZE // 2:
+                self._top[prefix] = get_top_entries(
+                    self._vocabulary, self._postings, prefix
+                )
+
+    def _iter_entries(self, prefix: str) -> Iterator[tuple[int, tuple[str, int]]]:
+        """
+        Метод, возвращающий подсказки со словами, начинающимися с prefix, по убыванию популярности.
+        Одна подсказка может встретиться несколько раз (если у нее несколько подходящих слов).
+        """
+        top = self._top.get(prefix)
+        if top is not None:
+            return iter(top)
+        postings: list[list[tuple[int, tuple[str, int]]]] = []
+        position: int = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[
+            position
+        ].startswith(prefix):
+            postings.append(self._postings[self._vocabulary[position]])
+            position += 1
+        return heapq.merge(*postings)
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Метод для поиска подсказок: каждое слово запроса должно быть началом одного из слов названия.
+        Подсказки отсортированы по убыванию популярности.
+
+        :param query: текст из строки поиска
+        :param limit: максимальное количество подсказок
+        :return: список подсказок
+        """
+        query_words: list[str] = get_words(query)
+        if not query_words:
+            return []
+        cache_key: tuple[str, int] = (" ".join(query_words), limit)
+
+        with self._lock:
+            cached: list[dict] | None = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            # по индексу ищется самое длинное слово запроса (у него меньше всего подходящих слов),
+            # остальные слова запроса проверяются у найденных подсказок
+            others: list[str] = list(query_words)
+            prefix: str = max(others, key=len)
+            others.remove(prefix)
+
+            result: list[dict] = []
+            seen: set[tuple[str, int]] = set()
+            for scanned, (_, key) in enumerate(self._iter_entries(prefix)):
+                if len(result) >= limit or scanned >= SUGGEST_SCAN_LIMIT:
+                    break
+                if key in seen:
+                    continue
+                seen.add(key)
+                suggestion: Suggestion = self._suggestions[key]
+                if all(
+                    any(word.startswith(other) for word in suggestion.words)
+                    for other in others
+                ):
+                    result.append(suggestion.to_dict())
+
+            if len(self._cache) >= SUGGEST_CACHE_SIZE:
+                self._cache = {}
+            self._cache[cache_key] = result
+            return result
+
+    def is_stale(self) -> bool:
+        return (
+            SUGGEST_INDEX_MAX_AGE is not None
+            and self._built_at is not None
+            and time.monotonic() - self._built_at > SUGGEST_INDEX_MAX_AGE
+        )
+
+    def ensure_fresh(self) -> None:
+        """
+        Метод для построения индекса при первом обращении и фоновой перестройки устаревшего индекса.
+        Пока индекс перестраивается, подсказки выдаются из прежнего индекса.
+        """
+        if not self.is_built:
+            with self._lock:
+                if not self.is_built:
+                    self.build(load_suggestions())
+            return
+        if self.is_stale() and not self._rebuilding:
+            with self._lock:
+                if self._rebuilding:
+                    return
+                self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            self.build(load_suggestions())
+        except Exception:
+            log.exception("Не удалось перестроить индекс подсказок")
+        finally:
+            self._rebuilding = False
+            # у фонового потока свои подключения к БД, которые нужно закрыть
+            connections.close_all()
+
+
+def get_product_popularity() -> dict[int, int]:
+    """
+    Функция для получения популярности товаров - количества проданных единиц в оплаченных заказах.
+    """
+    return dict(
+        OrderProduct.objects.filter(order__status__title="Оплачен")
+        .values("product")
+        .annotate(sold=Sum("quantity"))
+        .values_list("product", "sold")
+    )
+
+
+def load_suggestions() -> list[Suggestion]:
+    """
+    Функция для загрузки всех подсказок из БД: товары (популярность - количество продаж),
+    тэги и категории (популярность - количество товаров).
+
+    :return: список подсказок
+    """
+    sold: dict[int, int] = get_product_popularity()
+    suggestions: list[Suggestion] = [
+        Suggestion("product", pk, title, sold.get(pk) or 0)
+        for pk, title in Product.objects.values_list("pk", "title").iterator(
+            chunk_size=2000
+        )
+    ]
+    suggestions += [
+        Suggestion("tag", pk, name, count)
+        for pk, name, count in Tag.objects.annotate(
+            products_count=Count("products")
+        ).values_list("pk", "name", "products_count")
+    ]
+    category_counts: dict[int, int] = dict(
+        Product.objects.filter(category__isnull=False)
+        .values("category")
+        .annotate(products_count=Count("pk"))
+        .values_list("category", "products_count")
+    )
+    categories: list[tuple[int, str, int | None]] = list(
+        Category.objects.values_list("pk", "title", "parent_id")
+    )
+    # товары привязаны к подкатегориям, поэтому родительской категории добавляются товары ее подкатегорий
+    totals: dict[int, int] = {pk: category_counts.get(pk, 0) for pk, _, _ in categories}
+    for pk, _, parent_id in categories:
+        if parent_id in totals:
+            totals[parent_id] += category_counts.get(pk, 0)
+    suggestions += [
+        Suggestion("category", pk, title, totals[pk]) for pk, title, _ in categories
+    ]
+    return suggestions
+
+
+suggest_index = SuggestIndex()
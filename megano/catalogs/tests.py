@@ -1,3 +1,1355 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+from decimal import Decimal
+from io import BytesIO, StringIO
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from basket.models import Basket, BasketProduct
+from order.models import Order, OrderProduct, Status
+from profile_user.models import Profile
+from .admin_tools import EstimatedCountPaginator, get_estimated_count
+from .categories import category_tree
+from .campaigns import (
+    create_campaign,
+    end_campaign,
+    rollback_campaign,
+    select_campaign_products,
+)
+from .facets import rebuild_facets
+from .importer import normalize_record
+from .images import (
+    IMAGE_VARIANT_WIDTHS,
+    clear_variants_cache,
+    generate_variants,
+    get_srcset,
+    get_variant_name,
+)
+from .serializers import ProductImageSerializer
+from .recommendations import build_recommendations
+from .suggest import Suggestion, SuggestIndex, load_suggestions, suggest_index
+from .models import (
+    Category,
+    Product,
+    ProductImage,
+    ProductRecommendation,
+    Review,
+    Sale,
+    SaleCampaign,
+    Specification,
+    SpecificationFacet,
+    Tag,
+)
+
+# в тестах статика не собирается, поэтому для страниц админ-панели нужно хранилище без манифеста с хэшами
+TEST_STORAGES: dict = {
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+class ImageVariantsTestCase(TestCase):
+    """
+    Класс с методами для тестирования создания уменьшенных копий изображений.
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: все файлы теста сохраняются во временную папку.
+        """
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        clear_variants_cache()
+        self.addCleanup(clear_variants_cache)
+
+        buffer = BytesIO()
+        Image.new("RGB", (1000, 500), "white").save(buffer, format="JPEG")
+        self.product = Product.objects.create(title="Платье", price=10)
+        self.product_image = ProductImage.objects.create(
+            product=self.product, image=ContentFile(buffer.getvalue(), "photo.jpg")
+        )
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_generate_variants(self) -> None:
+        """
+        Тест для проверки того, что копии создаются для всех ширин в исходном формате и в WebP.
+        """
+        name: str = self.product_image.image.name
+        created: int = generate_variants(name, force=True)
+
+        self.assertEqual(created, len(IMAGE_VARIANT_WIDTHS) * 2)
+        for width in IMAGE_VARIANT_WIDTHS:
+            for webp in (False, True):
+                with default_storage.open(get_variant_name(name, width, webp)) as file:
+                    self.assertEqual(Image.open(file).width, width)
+
+    def test_serializer_returns_srcset(self) -> None:
+        """
+        Тест для проверки того, что сериализатор фото товара возвращает srcset после создания копий.
+        """
+        generate_variants(self.product_image.image.name, force=True)
+        data: dict = ProductImageSerializer(self.product_image).data
+
+        self.assertIn(f"{IMAGE_VARIANT_WIDTHS[0]}w", data["srcset"])
+        self.assertIn(".webp", data["webpSrcset"])
+
+    def test_srcset_real_widths(self) -> None:
+        """
+        Тест для проверки того, что в srcset маленького изображения указана реальная ширина копий,
+        а отсутствие копий проверяется по файлам только один раз.
+        """
+        buffer = BytesIO()
+        Image.new("RGB", (300, 200), "white").save(buffer, format="JPEG")
+        name: str = default_storage.save(
+            "products/small.jpg", ContentFile(buffer.getvalue())
+        )
+
+        with mock.patch.object(
+            default_storage, "open", wraps=default_storage.open
+        ) as storage_open:
+            self.assertIsNone(get_srcset(name))
+            self.assertIsNone(get_srcset(name))
+        self.assertEqual(storage_open.call_count, 1)
+
+        generate_variants(name)
+        clear_variants_cache()
+        srcset: str = get_srcset(name)
+        widths: list[str] = [item.rsplit(" ", 1)[1] for item in srcset.split(", ")]
+        self.assertEqual(widths, ["200w", "300w"])
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Класс с методами для проверки планов запросов основных представлений: ни один запрос
+    к большим таблицам не должен выполняться полным перебором таблицы (SCAN), только поиском по индексу.
+    """
+
+    # таблицы, размер которых растет вместе с каталогом и заказами
+    LARGE_TABLES: tuple[str, ...] = (
+        "catalogs_product",
+        "catalogs_sale",
+        "catalogs_review",
+        "basket_basketproduct",
+        "order_orderproduct",
+    )
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД каталога, корзины и заказа, необходимых для выполнения запросов.
+        """
+        cls.user = User.objects.create_user(username="tester", password="Test24@")
+        profile = Profile.objects.create(user=cls.user)
+
+        category = Category.objects.create(title="Одежда", level=1)
+        tag = Tag.objects.create(name="Лето")
+        cls.product = Product.objects.create(
+            title="Платье", price=Decimal(100), count=10, category=category
+        )
+        tag.products.add(cls.product)
+        Review.objects.create(
+            profile=profile, product=cls.product, author="tester", rate=5
+        )
+        Sale.objects.create(
+            product=cls.product,
+            salePrice=Decimal(80),
+            dateFrom=date.today() - timedelta(days=1),
+            dateTo=date.today() + timedelta(days=1),
+        )
+
+        basket = Basket.objects.create(user=cls.user)
+        BasketProduct.objects.create(basket=basket, product=cls.product, quantity=1)
+
+        Status.objects.create(title="Оплачен")
+        cls.order = Order.objects.create(
+            profile=profile, status=Status.objects.create(title="Ожидает оплаты")
+        )
+        OrderProduct.objects.create(order=cls.order, product=cls.product, quantity=1)
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом.
+        """
+        self.client.force_login(self.user)
+
+    def assertNoFullScans(self, queries: list[dict]) -> None:
+        """
+        Вспомогательный метод, который получает план каждого выполненного запроса (EXPLAIN QUERY PLAN)
+        и проверяет, что ни одна из больших таблиц не читается полным перебором.
+
+        :param queries: список запросов, выполненных представлением
+        """
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                for row in cursor.fetchall():
+                    detail: str = row[-1]
+                    match = re.match(r"SCAN (\w+)", detail)
+                    self.assertFalse(
+                        match and match.group(1) in self.LARGE_TABLES,
+                        f"Полный перебор таблицы в запросе:\n{query['sql']}\n{detail}",
+                    )
+
+    def test_catalog_view(self) -> None:
+        """
+        Тест для проверки запросов списка товаров в категории.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                "/api/catalog/",
+                {
+                    "filter[name]": "",
+                    "filter[minPrice]": 0,
+                    "filter[maxPrice]": 500,
+                    "filter[freeDelivery]": "false",
+                    "filter[available]": "true",
+                    "currentPage": 1,
+                    "category": self.product.category.pk,
+                    "sort": "price",
+                    "sortType": "inc",
+                    "limit": 20,
+                },
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["items"]), 1)
+        self.assertNoFullScans(context.captured_queries)
+
+    def test_product_lists_skip_reviews(self) -> None:
+        """
+        Тест для проверки, что списки товаров не загружают отзывы: количество отзывов хранится у товара.
+        """
+        urls: list[str] = [
+            "/api/catalog/?filter[name]=&filter[minPrice]=0&filter[maxPrice]=500"
+            "&filter[freeDelivery]=false&filter[available]=false&currentPage=1"
+            f"&category={self.product.category.pk}&sort=price&sortType=inc&limit=20",
+            "/api/products/limited/",
+            "/api/products/popular/",
+            "/api/banners/",
+            f"/api/product/{self.product.pk}/recommendations/",
+            "/api/basket/recommendations/",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(
+                    any(
+                        'FROM "catalogs_review"' in query["sql"]
+                        for query in context.captured_queries
+                    )
+                )
+
+    def test_sale_view(self) -> None:
+        """
+        Тест для проверки запросов списка действующих акций.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/sales/", {"currentPage": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["items"]), 1)
+        self.assertNoFullScans(context.captured_queries)
+
+    def test_basket_view(self) -> None:
+        """
+        Тест для проверки запросов корзины аутентифицированного пользователя.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/basket/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["count"], 1)
+        self.assertNoFullScans(context.captured_queries)
+
+    def test_payment_view(self) -> None:
+        """
+        Тест для проверки запросов оплаты заказа.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                f"/api/payment/{self.order.pk}/",
+                {
+                    "number": "2222 4444",
+                    "month": "12",
+                    "year": str(date.today().year + 1),
+                    "code": "123",
+                },
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNoFullScans(context.captured_queries)
+
+
+class ImportCatalogTestCase(TestCase):
+    """
+    Класс с методами для тестирования команды импорта каталога import_catalog.
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: файлы импорта создаются во временной папке.
+        """
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write_file(self, name: str, content: str) -> str:
+        """
+        Вспомогательный метод для создания файла импорта.
+
+        :return: путь к созданному файлу
+        """
+        path: str = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def import_catalog(self, path: str) -> str:
+        """
+        Вспомогательный метод для запуска команды импорта пачками по 2 товара.
+
+        :return: текст, выведенный командой
+        """
+        output = StringIO()
+        call_command(
+            "import_catalog", path, chunk_size=2, stdout=output, stderr=StringIO()
+        )
+        return output.getvalue()
+
+    def test_import_json_lines(self) -> None:
+        """
+        Тест для проверки импорта товаров со всеми связями и повторного импорта с изменениями.
+        """
+        records: list[dict] = [
+            {
+                "sku": "A-1",
+                "title": "Платье",
+                "price": "10.00",
+                "count": 5,
+                "category": "Одежда/Платья",
+                "tags": ["Лето"],
+                "specifications": [{"name": "Размер", "value": "XL"}],
+                "images": ["products/a1.jpg"],
+                "sales": [
+                    {
+                        "salePrice": "8.00",
+                        "dateFrom": "2024-03-01",
+                        "dateTo": "2024-03-31",
+                    }
+                ],
+            },
+            {"sku": "A-2", "title": "Юбка", "price": "7.50", "category": "Одежда"},
+            {"sku": "A-3", "title": "Шорты", "price": "неизвестно"},
+        ]
+        path: str = self.write_file(
+            "feed.jsonl", "\n".join(json.dumps(record) for record in records)
+        )
+        output: str = self.import_catalog(path)
+
+        self.assertIn("создано 2", output)
+        self.assertIn("пропущено 1", output)
+        dress = Product.objects.get(sku="A-1")
+        self.assertEqual(dress.category.title, "Платья")
+        self.assertEqual(dress.category.parent.title, "Одежда")
+        self.assertEqual(Category.objects.filter(title="Одежда").count(), 1)
+        self.assertEqual(list(dress.tags.values_list("name", flat=True)), ["Лето"])
+        self.assertEqual(dress.specifications.get().value, "XL")
+        self.assertEqual(dress.images.get().image.name, "products/a1.jpg")
+        self.assertEqual(dress.sales.get().salePrice, Decimal("8.00"))
+
+        records[0].update(price="12.00", tags=["Зима"], sales=[])
+        path = self.write_file(
+            "feed.jsonl", "\n".join(json.dumps(record) for record in records[:2])
+        )
+        output = self.import_catalog(path)
+
+        self.assertIn("обновлено 1, без изменений 1", output)
+        dress.refresh_from_db()
+        self.assertEqual(dress.price, Decimal("12.00"))
+        self.assertEqual(list(dress.tags.values_list("name", flat=True)), ["Зима"])
+        self.assertFalse(dress.sales.exists())
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_normalize_specifications(self) -> None:
+        """
+        Тест для проверки, что значения характеристик приводятся к строке без пробелов по краям.
+        """
+        record: dict = normalize_record(
+            {
+                "sku": "C-1",
+                "title": "Куртка",
+                "price": 10,
+                "specifications": [
+                    {"name": " Размер ", "value": " XL "},
+                    {"name": "Рост", "value": 170},
+                    {"name": "Подкладка"},
+                ],
+            },
+            1,
+        )
+        self.assertEqual(
+            record["specifications"],
+            [("Размер", "XL"), ("Рост", "170"), ("Подкладка", "")],
+        )
+
+    def test_import_csv(self) -> None:
+        """
+        Тест для проверки импорта товаров из CSV.
+        """
+        path: str = self.write_file(
+            "feed.csv",
+            "sku,title,price,count,category,freeDelivery,tags,specifications,sales\n"
+            "B-1,Кроссовки,50,3,Обувь,да,Спорт|Лето,Размер=42,40;2024-01-01;2024-12-31\n",
+        )
+        self.import_catalog(path)
+
+        sneakers = Product.objects.get(sku="B-1")
+        self.assertTrue(sneakers.freeDelivery)
+        self.assertEqual(sneakers.count, 3)
+        self.assertEqual(sneakers.tags.count(), 2)
+        self.assertEqual(sneakers.specifications.get().name, "Размер")
+        self.assertEqual(sneakers.sales.get().dateTo, date(2024, 12, 31))
+
+
+@override_settings(FEED_TOKENS=("partner-token",))
+class ProductFeedTestCase(TestCase):
+    """
+    Класс с методами для тестирования потоковой выгрузки каталога.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД товара с категорией, тэгом и действующей акцией.
+        """
+        parent = Category.objects.create(title="Одежда")
+        category = Category.objects.create(title="Платья", level=1, parent=parent)
+        cls.product = Product.objects.create(
+            title="Платье <летнее>", price=Decimal(100), count=3, category=category
+        )
+        Tag.objects.create(name="Лето").products.add(cls.product)
+        Sale.objects.create(
+            product=cls.product,
+            salePrice=Decimal(80),
+            dateFrom=date.today() - timedelta(days=1),
+            dateTo=date.today() + timedelta(days=1),
+        )
+        # товар без категории в выгрузку не попадает
+        Product.objects.create(title="Служебный товар", price=Decimal(1))
+        cls.staff = User.objects.create_user(
+            username="manager", password="Test24@", is_staff=True
+        )
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: ведра токенов ограничения частоты из прошлых тестов удаляются.
+        """
+        cache.clear()
+
+    def test_ndjson_feed(self) -> None:
+        """
+        Тест для проверки выгрузки в формате NDJSON со сжатием gzip.
+        """
+        response = self.client.get(
+            "/api/feed/ndjson/",
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_X_FEED_TOKEN="partner-token",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        content: bytes = gzip.decompress(b"".join(response.streaming_content))
+        items: list[dict] = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]["price"], "80.00")
+        self.assertEqual(items[0]["oldPrice"], "100.00")
+        self.assertEqual(items[0]["category"], "Одежда/Платья")
+        self.assertEqual(items[0]["tags"], ["Лето"])
+
+    def test_yml_feed(self) -> None:
+        """
+        Тест для проверки выгрузки в формате YML.
+        """
+        response = self.client.get("/api/feed/yml/", {"token": "partner-token"})
+
+        self.assertEqual(response.status_code, 200)
+        root = ElementTree.fromstring(b"".join(response.streaming_content))
+        offer = root.find("shop/offers/offer")
+        self.assertEqual(offer.get("id"), str(self.product.pk))
+        self.assertEqual(offer.findtext("name"), "Платье <летнее>")
+        self.assertEqual(offer.findtext("price"), "80.00")
+        self.assertEqual(len(root.findall("shop/categories/category")), 2)
+
+    def test_unknown_format(self) -> None:
+        """
+        Тест для проверки ответа на запрос выгрузки в неизвестном формате.
+        """
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get("/api/feed/csv/").status_code, 404)
+
+    def test_access(self) -> None:
+        """
+        Тест для проверки, что выгрузку получают только сотрудники и партнеры с токеном.
+        """
+        self.assertEqual(self.client.get("/api/feed/ndjson/").status_code, 403)
+        response = self.client.get("/api/feed/ndjson/", HTTP_X_FEED_TOKEN="wrong")
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get("/api/feed/ndjson/").status_code, 200)
+
+    def test_throttling(self) -> None:
+        """
+        Тест для проверки ограничения частоты выгрузок.
+        """
+        rest_framework: dict = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"feed_user": "2/hour"},
+        }
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            statuses: list[int] = [
+                self.client.get(
+                    "/api/feed/ndjson/", HTTP_X_FEED_TOKEN="partner-token"
+                ).status_code
+                for _ in range(3)
+            ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+class SaleCampaignTestCase(TestCase):
+    """
+    Класс с методами для тестирования массовых акций (распродаж).
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД категорий и товаров, на которые создаются распродажи.
+        """
+        clothes = Category.objects.create(title="Одежда")
+        dresses = Category.objects.create(title="Платья", level=1, parent=clothes)
+        cls.dress = Product.objects.create(
+            title="Платье", price=Decimal("3.00"), category=dresses
+        )
+        cls.skirt = Product.objects.create(
+            title="Юбка", price=Decimal("10.00"), category=clothes
+        )
+        cls.shoes = Product.objects.create(title="Туфли", price=Decimal("20.00"))
+        Tag.objects.create(name="Лето").products.add(cls.shoes)
+
+    def test_percent_campaign(self) -> None:
+        """
+        Тест для проверки создания распродажи со скидкой в процентах по категории (включая дочерние).
+        """
+        campaign = create_campaign(
+            title="Осень",
+            date_from=date.today(),
+            date_to=date.today() + timedelta(days=7),
+            products=select_campaign_products(
+                category_ids=[self.dress.category.parent_id]
+            ),
+            percent=Decimal(15),
+        )
+
+        prices: dict[int, Decimal] = dict(
+            campaign.sales.values_list("product_id", "salePrice")
+        )
+        self.assertEqual(
+            prices, {self.dress.pk: Decimal("2.55"), self.skirt.pk: Decimal("8.50")}
+        )
+
+    def test_fixed_price_campaign(self) -> None:
+        """
+        Тест для проверки того, что при фиксированной цене акции создаются только для товаров дороже этой цены.
+        """
+        campaign = create_campaign(
+            title="Всё по 5",
+            date_from=date.today(),
+            date_to=date.today(),
+            products=select_campaign_products(
+                tag_ids=[self.shoes.tags.get().pk], product_ids=[self.dress.pk]
+            ),
+            sale_price=Decimal(5),
+        )
+
+        self.assertEqual(
+            list(campaign.sales.values_list("product_id", flat=True)), [self.shoes.pk]
+        )
+
+    def test_skip_products_with_sale(self) -> None:
+        """
+        Тест для проверки, что товар с действующей в даты распродажи акцией в нее не попадает
+        и у товара остается одна цена по акции.
+        """
+        Sale.objects.create(
+            product=self.skirt,
+            salePrice=Decimal("9.00"),
+            dateFrom=date.today() - timedelta(days=1),
+            dateTo=date.today() + timedelta(days=1),
+        )
+        campaign = create_campaign(
+            title="Осень",
+            date_from=date.today(),
+            date_to=date.today() + timedelta(days=7),
+            products=Product.objects.all(),
+            percent=Decimal(50),
+        )
+
+        self.assertEqual(
+            set(campaign.sales.values_list("product_id", flat=True)),
+            {self.dress.pk, self.shoes.pk},
+        )
+        response = self.client.get(f"/api/product/{self.skirt.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["price"], Decimal("9.00"))
+
+    def test_end_and_rollback(self) -> None:
+        """
+        Тест для проверки завершения и отмены распродажи одной операцией.
+        """
+        campaign = create_campaign(
+            title="Осень",
+            date_from=date.today() - timedelta(days=3),
+            date_to=date.today() + timedelta(days=3),
+            products=Product.objects.all(),
+            percent=Decimal(10),
+        )
+
+        self.assertEqual(end_campaign(campaign), 3)
+        self.assertFalse(
+            Sale.objects.filter(dateTo__gte=date.today(), campaign=campaign).exists()
+        )
+
+        self.assertEqual(rollback_campaign(campaign), 3)
+        self.assertFalse(Sale.objects.exists())
+        self.assertFalse(SaleCampaign.objects.exists())
+
+    @override_settings(STORAGES=TEST_STORAGES)
+    def test_admin_action(self) -> None:
+        """
+        Тест для проверки создания распродажи действием над выбранными товарами в админ-панели.
+        """
+        self.client.force_login(
+            User.objects.create_superuser(username="admin", password="Test24@")
+        )
+        data: dict = {
+            "action": "create_sale_campaign",
+            "_selected_action": [self.dress.pk, self.skirt.pk],
+        }
+        response = self.client.post("/admin/catalogs/product/", data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Выбрано товаров: 2")
+
+        data.update(
+            apply="1",
+            title="Осень",
+            dateFrom=date.today().isoformat(),
+            dateTo=date.today().isoformat(),
+            percent="50",
+        )
+        response = self.client.post("/admin/catalogs/product/", data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(SaleCampaign.objects.get().sales.count(), 2)
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class AdminScalabilityTestCase(TestCase):
+    """
+    Класс с методами для проверки того, что страницы админ-панели не замедляются с ростом таблиц.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания администратора и товара с большим количеством отзывов.
+        """
+        cls.admin = User.objects.create_superuser(username="admin", password="Test24@")
+        category = Category.objects.create(title="Одежда")
+        cls.product = Product.objects.create(
+            title="Платье", price=Decimal(10), category=category
+        )
+        Review.objects.bulk_create(
+            Review(
+                product=cls.product,
+                profile=Profile.objects.create(
+                    user=User.objects.create_user(username=f"user{number}")
+                ),
+                author=f"Автор {number}",
+                rate=5,
+            )
+            for number in range(30)
+        )
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом.
+        """
+        self.client.force_login(self.admin)
+
+    def test_paginated_reviews_inline(self) -> None:
+        """
+        Тест для проверки того, что отзывы на странице товара выводятся постранично.
+        """
+        url: str = f"/admin/catalogs/product/{self.product.pk}/change/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Страница 1 из 2")
+        self.assertEqual(response.content.decode().count("<p>Автор "), 20)
+
+        response = self.client.get(url, {"reviews-page": 2})
+        self.assertContains(response, "Страница 2 из 2")
+        self.assertEqual(response.content.decode().count("<p>Автор "), 10)
+
+    def test_changelist_queries_do_not_grow(self) -> None:
+        """
+        Тест для проверки того, что количество запросов списка товаров не зависит от количества товаров.
+        """
+        # первый запрос продлевает сессию, созданную при входе, и в подсчет не попадает
+        self.client.get("/admin/catalogs/product/")
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/admin/catalogs/product/")
+        queries_count: int = len(context.captured_queries)
+
+        Product.objects.bulk_create(
+            Product(
+                title=f"Товар {number}",
+                price=Decimal(1),
+                category=Category.objects.create(title=f"Категория {number}"),
+            )
+            for number in range(20)
+        )
+        with self.assertNumQueries(queries_count):
+            self.client.get("/admin/catalogs/product/")
+
+    def test_review_changelist(self) -> None:
+        """
+        Тест для проверки того, что список отзывов не загружает товары каталога, а отзывы ищутся по товару.
+        """
+        self.client.get("/admin/catalogs/review/")
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/admin/catalogs/review/")
+        queries_count: int = len(context.captured_queries)
+
+        Product.objects.bulk_create(
+            Product(title=f"Товар {number}", price=Decimal(1)) for number in range(20)
+        )
+        with self.assertNumQueries(queries_count):
+            response = self.client.get("/admin/catalogs/review/")
+        self.assertNotContains(response, "Товар 1")
+
+        response = self.client.get("/admin/catalogs/review/", {"q": "Плат"})
+        self.assertContains(response, "Автор 0")
+        response = self.client.get("/admin/catalogs/review/", {"q": "Товар"})
+        self.assertNotContains(response, "Автор 0")
+
+    def test_estimated_count(self) -> None:
+        """
+        Тест для проверки того, что для большой неотфильтрованной таблицы количество строк берется из статистики БД.
+        """
+        self.assertIsNone(get_estimated_count(Review))
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.assertEqual(get_estimated_count(Review), 30)
+
+        with mock.patch("catalogs.admin_tools.ESTIMATED_COUNT_THRESHOLD", 1):
+            Review.objects.filter(pk=Review.objects.first().pk).delete()
+            paginator = EstimatedCountPaginator(Review.objects.order_by("pk"), 10)
+            self.assertEqual(paginator.count, 30)
+
+            paginator = EstimatedCountPaginator(
+                Review.objects.filter(rate=5).order_by("pk"), 10
+            )
+            self.assertEqual(paginator.count, 29)
+
+
+class SpecificationFacetTestCase(TestCase):
+    """
+    Класс с методами для тестирования фильтрации каталога по характеристикам товаров.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД товаров двух категорий с характеристиками размера и цвета.
+        """
+        parent = Category.objects.create(title="Одежда")
+        cls.dresses = Category.objects.create(title="Платья", level=1, parent=parent)
+        cls.shirts = Category.objects.create(title="Рубашки", level=1, parent=parent)
+        size_m = Specification.objects.create(name="Размер", value="M")
+        size_l = Specification.objects.create(name=" Размер ", value="l")
+        red = Specification.objects.create(name="Цвет", value="Красный")
+        cls.red_m = Product.objects.create(
+            title="Платье красное M", price=Decimal(100), category=cls.dresses
+        )
+        cls.red_l = Product.objects.create(
+            title="Платье красное L", price=Decimal(100), category=cls.dresses
+        )
+        cls.shirt = Product.objects.create(
+            title="Рубашка M", price=Decimal(100), category=cls.shirts
+        )
+        cls.red_m.specifications.add(size_m, red)
+        cls.red_l.specifications.add(size_l, red)
+        cls.shirt.specifications.add(size_m)
+        rebuild_facets()
+
+    def get_catalog(self, **filters) -> list[str]:
+        """
+        Метод для получения названий товаров каталога с указанными фильтрами.
+        """
+        response = self.client.get(
+            "/api/catalog/",
+            {
+                "filter[name]": "",
+                "filter[minPrice]": 0,
+                "filter[maxPrice]": 500,
+                "filter[freeDelivery]": "false",
+                "filter[available]": "false",
+                "currentPage": 1,
+                "sort": "title",
+                "sortType": "dec",
+                "limit": 20,
+                **filters,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        return [item["title"] for item in response.data["items"]]
+
+    def test_specification_keys(self) -> None:
+        """
+        Тест для проверки нормализации названий и значений характеристик.
+        """
+        specification = Specification.objects.get(value="l")
+        self.assertEqual(specification.name_key, "размер")
+        self.assertEqual(specification.value_key, "l")
+
+    def test_filter_by_specification(self) -> None:
+        """
+        Тест для проверки фильтрации каталога: значения одной характеристики объединяются через ИЛИ,
+        разные характеристики - через И, регистр и пробелы не важны.
+        """
+        self.assertEqual(
+            self.get_catalog(**{"filter[spec][Размер]": "m"}),
+            ["Платье красное M", "Рубашка M"],
+        )
+        self.assertEqual(
+            self.get_catalog(
+                **{"filter[spec][размер]": ["M", "L"], "category": self.dresses.pk}
+            ),
+            ["Платье красное L", "Платье красное M"],
+        )
+        self.assertEqual(
+            self.get_catalog(
+                **{"filter[spec][Размер]": "M", "filter[spec][Цвет]": "красный"}
+            ),
+            ["Платье красное M"],
+        )
+        self.assertEqual(self.get_catalog(**{"filter[spec][Размер]": "XL"}), [])
+
+    def test_facets_view(self) -> None:
+        """
+        Тест для проверки списка значений фильтров по характеристикам для категории и ее подкатегорий.
+        """
+        response = self.client.get(
+            "/api/catalog/facets/", {"category": self.dresses.parent_id}
+        )
+        self.assertEqual(response.status_code, 200)
+        facets: dict = {
+            facet["name"]: {value["value"]: value["count"] for value in facet["values"]}
+            for facet in response.data
+        }
+        self.assertEqual(facets, {"Размер": {"l": 1, "M": 2}, "Цвет": {"Красный": 2}})
+
+        response = self.client.get("/api/catalog/facets/", {"category": 0})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get("/api/catalog/facets/", {"category": "abc"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_facets_rebuild_on_change(self) -> None:
+        """
+        Тест для проверки пересчета фильтров при изменении характеристик и категории товара.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.red_l.specifications.clear()
+        self.assertFalse(
+            SpecificationFacet.objects.filter(
+                category=self.dresses, value_key="l"
+            ).exists()
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shirt.category = self.dresses
+            self.shirt.save()
+        self.assertEqual(
+            SpecificationFacet.objects.get(
+                category=self.dresses, name_key="размер", value_key="m"
+            ).products_count,
+            2,
+        )
+        self.assertFalse(
+            SpecificationFacet.objects.filter(category=self.shirts).exists()
+        )
+
+        # прежняя категория известна с загрузки товара, поэтому сохранение его не перечитывает
+        shirt = Product.objects.get(pk=self.shirt.pk)
+        with CaptureQueriesContext(connection) as context:
+            with self.captureOnCommitCallbacks(execute=True):
+                shirt.save()
+        self.assertFalse(
+            any(
+                query["sql"].startswith('SELECT "catalogs_product"')
+                for query in context.captured_queries
+            )
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            shirt.category = self.shirts
+            shirt.save()
+        self.assertTrue(
+            SpecificationFacet.objects.filter(category=self.shirts).exists()
+        )
+
+    @override_settings(STORAGES=TEST_STORAGES)
+    def test_facets_rebuild_on_admin_inline(self) -> None:
+        """
+        Тест для проверки пересчета фильтров при добавлении характеристики во встроенном блоке на странице товара
+        в админ-панели (для промежуточной таблицы Django не отправляет сигналы сохранения).
+        """
+        self.client.force_login(
+            User.objects.create_superuser(username="admin", password="Test24@")
+        )
+        url: str = f"/admin/catalogs/product/{self.shirt.pk}/change/"
+        response = self.client.get(url)
+        data: dict = {
+            field.html_name: field.value()
+            for field in response.context["adminform"].form
+            if field.value() is not None
+        }
+        for inline in response.context["inline_admin_formsets"]:
+            for form in (inline.formset.management_form, *inline.formset.forms):
+                data.update(
+                    (field.html_name, field.value())
+                    for field in form
+                    if field.value() is not None
+                )
+            if inline.formset.model is Product.specifications.through:
+                new_form = inline.formset.forms[inline.formset.initial_form_count()]
+                data[new_form["specification"].html_name] = Specification.objects.get(
+                    value="Красный"
+                ).pk
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            SpecificationFacet.objects.get(
+                category=self.shirts, name_key="цвет"
+            ).products_count,
+            1,
+        )
+
+    def test_filter_query_plan(self) -> None:
+        """
+        Тест для проверки, что фильтр по характеристике использует индексы, а не полный просмотр таблиц.
+        """
+        with CaptureQueriesContext(connection) as context:
+            self.get_catalog(**{"filter[spec][Размер]": "M"})
+        query: str = next(
+            query["sql"]
+            for query in context.captured_queries
+            if "catalogs_specification" in query["sql"]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
+            plan: str = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("specification_key_idx", plan)
+
+
+class SearchSuggestTestCase(TestCase):
+    """
+    Класс с методами для тестирования подсказок в строке поиска.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД товаров, тэга, категории и оплаченного заказа, от которого зависит популярность.
+        """
+        profile = Profile.objects.create(
+            user=User.objects.create_user(username="tester", password="Test24@")
+        )
+        cls.category = Category.objects.create(title="Платья", level=1)
+        cls.popular = Product.objects.create(
+            title="Платье летнее", price=Decimal(100), category=cls.category
+        )
+        cls.other = Product.objects.create(
+            title="Платок шёлковый", price=Decimal(100), category=cls.category
+        )
+        Product.objects.create(title="Джинсы", price=Decimal(100))
+        Tag.objects.create(name="Платиновая коллекция").products.add(cls.other)
+
+        order = Order.objects.create(
+            profile=profile, status=Status.objects.create(title="Оплачен")
+        )
+        OrderProduct.objects.create(order=order, product=cls.popular, quantity=5)
+
+    def setUp(self) -> None:
+        """
+        Метод для построения индекса подсказок по данным текущего теста.
+        """
+        suggest_index.build(load_suggestions())
+
+    def test_suggest_view(self) -> None:
+        """
+        Тест для проверки подсказок по началу слова без запросов к БД.
+        """
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/search/suggest/", {"query": "Пла"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(item["type"], item["title"]) for item in response.data],
+            [
+                ("product", "Платье летнее"),
+                ("category", "Платья"),
+                ("tag", "Платиновая коллекция"),
+                ("product", "Платок шёлковый"),
+            ],
+        )
+
+        response = self.client.get(
+            "/api/search/suggest/", {"query": "шелк пла", "limit": 1}
+        )
+        self.assertEqual([item["id"] for item in response.data], [self.other.pk])
+        self.assertEqual(
+            self.client.get("/api/search/suggest/", {"query": "  "}).data, []
+        )
+
+    def test_index_updated_by_signals(self) -> None:
+        """
+        Тест для проверки обновления индекса при создании, переименовании и удалении товара.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(title="Плащ", price=Decimal(100))
+        self.assertIn("Плащ", [item["title"] for item in suggest_index.search("плащ")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.title = "Пальто"
+            product.save()
+        self.assertEqual(suggest_index.search("плащ"), [])
+        self.assertEqual(suggest_index.search("пальто")[0]["id"], product.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(suggest_index.search("пальто"), [])
+
+    def test_popular_prefixes(self) -> None:
+        """
+        Тест для проверки начал слов, под которые подходит много разных слов:
+        подсказки для них хранятся заранее и должны обновляться при изменениях.
+        """
+        index = SuggestIndex()
+        index.build(
+            [
+                Suggestion("product", pk, f"арт{pk}", popularity=pk % 100)
+                for pk in range(1000)
+            ]
+        )
+        self.assertEqual(
+            [item["popularity"] for item in index.search("а", limit=3)], [99, 99, 99]
+        )
+
+        index.set_popularity("product", 5, 1000)
+        self.assertEqual(index.search("а", limit=1)[0]["id"], 5)
+        index.remove("product", 5)
+        self.assertNotIn(5, [item["id"] for item in index.search("а")])
+        index.add(Suggestion("product", 5000, "артикул", popularity=500))
+        self.assertEqual(index.search("ар", limit=1)[0]["id"], 5000)
+
+
+class RecommendationsTestCase(TestCase):
+    """
+    Класс с методами для тестирования рекомендаций "часто покупают вместе".
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД оплаченных заказов: платье чаще всего покупают с поясом, реже - с сумкой,
+        а неоплаченный заказ с туфлями на рекомендации не влияет.
+        """
+        profile = Profile.objects.create(
+            user=User.objects.create_user(username="tester", password="Test24@")
+        )
+        cls.dress, cls.belt, cls.bag, cls.shoes = (
+            Product.objects.create(title=title, price=Decimal(100))
+            for title in ("Платье", "Пояс", "Сумка", "Туфли")
+        )
+        paid = Status.objects.create(title="Оплачен")
+        unpaid = Status.objects.create(title="Ожидает оплаты")
+        for status, products in (
+            (paid, [cls.dress, cls.belt]),
+            (paid, [cls.dress, cls.belt, cls.bag]),
+            (paid, [cls.bag]),
+            (paid, [cls.bag]),
+            (unpaid, [cls.dress, cls.shoes]),
+        ):
+            order = Order.objects.create(profile=profile, status=status)
+            for product in products:
+                OrderProduct.objects.create(order=order, product=product, quantity=1)
+
+    def test_build_recommendations(self) -> None:
+        """
+        Тест для проверки пересчета рекомендаций без цикла по заказам (количество запросов не зависит от заказов).
+        """
+        with self.assertNumQueries(6):
+            saved: int = build_recommendations(top=1)
+        self.assertEqual(saved, 3)
+
+        recommendation = ProductRecommendation.objects.get(product=self.dress)
+        self.assertEqual(recommendation.recommended, self.belt)
+        self.assertEqual(recommendation.together, 2)
+        self.assertAlmostEqual(recommendation.score, 1.0)
+        self.assertAlmostEqual(
+            ProductRecommendation.objects.get(product=self.bag).score, 1 / 6**0.5
+        )
+        self.assertFalse(
+            ProductRecommendation.objects.filter(recommended=self.shoes).exists()
+        )
+
+        call_command("build_recommendations", "--min-together", "2", stdout=StringIO())
+        self.assertEqual(
+            set(ProductRecommendation.objects.values_list("product", "recommended")),
+            {(self.dress.pk, self.belt.pk), (self.belt.pk, self.dress.pk)},
+        )
+
+    def test_recommendations_views(self) -> None:
+        """
+        Тест для проверки рекомендаций на странице товара и в корзине.
+        """
+        build_recommendations()
+
+        response = self.client.get(f"/api/product/{self.dress.pk}/recommendations/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["id"] for item in response.data], [self.belt.pk, self.bag.pk]
+        )
+
+        self.client.cookies["basket"] = json.dumps({str(self.dress.pk): 1})
+        response = self.client.get("/api/basket/recommendations/")
+        self.assertEqual(
+            [item["id"] for item in response.data], [self.belt.pk, self.bag.pk]
+        )
+
+        self.client.cookies["basket"] = json.dumps(
+            {str(self.dress.pk): 1, str(self.belt.pk): 1}
+        )
+        response = self.client.get("/api/basket/recommendations/")
+        self.assertEqual([item["id"] for item in response.data], [self.bag.pk])
+
+
+class ProductReviewsTestCase(TestCase):
+    """
+    Класс с методами для тестирования постраничного вывода отзывов о товаре.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД товара с 25 отзывами разных пользователей.
+        """
+        cls.product = Product.objects.create(title="Платье", price=Decimal(100))
+        for number in range(25):
+            profile = Profile.objects.create(
+                user=User.objects.create_user(username=f"tester{number}")
+            )
+            Review.objects.create(
+                profile=profile, product=cls.product, author=f"Автор {number}", rate=5
+            )
+
+    def test_product_detail(self) -> None:
+        """
+        Тест для проверки, что с товаром передаются только последние отзывы и их количество,
+        а количество запросов не зависит от количества отзывов.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f"/api/product/{self.product.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["reviewsCount"], 25)
+        self.assertEqual(
+            [review["author"] for review in response.data["reviews"]],
+            ["Автор 24", "Автор 23", "Автор 22"],
+        )
+
+        profile = Profile.objects.create(user=User.objects.create_user("extra"))
+        Review.objects.create(
+            profile=profile, product=self.product, author="Автор 25", rate=4
+        )
+        with self.assertNumQueries(len(context.captured_queries)):
+            self.client.get(f"/api/product/{self.product.pk}/")
+
+        self.assertEqual(self.client.get("/api/product/0/").status_code, 404)
+
+    def test_reviews_pages(self) -> None:
+        """
+        Тест для проверки курсорной пагинации отзывов от новых к старым.
+        """
+        url: str = f"/api/product/{self.product.pk}/reviews/?limit=10"
+        authors: list[str] = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 10)
+            authors += [review["author"] for review in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(authors, [f"Автор {number}" for number in range(24, -1, -1)])
+
+        self.assertEqual(self.client.get("/api/product/0/reviews/").status_code, 404)
+
+
+class ReviewPostTestCase(TestCase):
+    """
+    Класс с методами для тестирования создания отзыва и пересчета рейтинга товара.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания товара с одним отзывом и пользователя, который будет писать отзыв.
+        """
+        cls.product = Product.objects.create(title="Платье", price=Decimal(100))
+        Review.objects.create(
+            profile=Profile.objects.create(user=User.objects.create_user("first")),
+            product=cls.product,
+            author="Первый",
+            rate=5,
+        )
+        cls.user = User.objects.create_user(username="tester", password="Test24@")
+        Profile.objects.create(user=cls.user)
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом.
+        """
+        self.client.force_login(self.user)
+        self.url: str = f"/api/product/{self.product.pk}/reviews/"
+
+    def test_post_review(self) -> None:
+        """
+        Тест для проверки создания отзыва: в ответе только новый отзыв и новые количество отзывов и рейтинг,
+        а повторный отзыв отклоняется уникальным ограничением.
+        """
+        payload: dict = {"author": "Тестер", "email": "", "text": "Мало", "rate": 2}
+        # первый запрос продлевает сессию, созданную при входе
+        self.client.get(self.url)
+        # пользователь вместе с профилем, вставка отзыва, UPDATE и чтение итогов товара в транзакции,
+        # без записи сессии
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["review"]["author"], "Тестер")
+        self.assertEqual(response.data["reviewsCount"], 2)
+        self.assertEqual(response.data["rating"], Decimal("3.5"))
+
+        response = self.client.post(self.url, payload)
+        self.assertEqual(response.status_code, 400)
+        self.product.refresh_from_db()
+        self.assertEqual(
+            (self.product.reviews_count, self.product.rating_total), (2, 7)
+        )
+
+    def test_invalid_review(self) -> None:
+        """
+        Тест для проверки отзывов с неверной оценкой и на несуществующий товар.
+        """
+        response = self.client.post(self.url, {"author": "Тестер", "rate": 6})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            "/api/product/0/reviews/", {"author": "Тестер", "rate": 5}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Review.objects.count(), 1)
+
+        self.client.logout()
+        response = self.client.post(self.url, {"author": "Тестер", "rate": 5})
+        self.assertEqual(response.status_code, 403)
+
+    def test_review_changed_and_deleted(self) -> None:
+        """
+        Тест для проверки пересчета рейтинга при изменении оценки и удалении отзывов.
+        """
+        review = Review.objects.get()
+        review.rate = 3
+        review.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating, Decimal("3.0"))
+
+        review.delete()
+        self.product.refresh_from_db()
+        self.assertEqual(
+            (self.product.reviews_count, self.product.rating_total), (0, 0)
+        )
+        self.assertIsNone(self.product.rating)
+
+
+class CategoryTreeTestCase(TestCase):
+    """
+    Класс с методами для тестирования дерева категорий в памяти процесса.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД категории с подкатегорией.
+        """
+        cls.clothes = Category.objects.create(title="Одежда", image="category.png")
+        Category.objects.create(
+            title="Платья", level=1, parent=cls.clothes, image="category.png"
+        )
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: дерево, загруженное в прошлых тестах, сбрасывается.
+        """
+        category_tree.clear()
+        self.addCleanup(category_tree.clear)
+
+    def test_category_tree(self) -> None:
+        """
+        Тест для проверки, что дерево категорий читается из БД один раз и перечитывается после изменения категории.
+        """
+        response = self.client.get("/api/categories/")
+        self.assertEqual(response.data[0]["title"], "Одежда")
+        self.assertEqual(response.data[0]["subcategories"][0]["title"], "Платья")
+        with self.assertNumQueries(0):
+            self.client.get("/api/categories/")
+
+        self.clothes.title = "Вся одежда"
+        self.clothes.save()
+        response = self.client.get("/api/categories/")
+        self.assertEqual(response.data[0]["title"], "Вся одежда")
@@ -4,11 +4,15 @@ from .views import (
     CatalogView,
     TagListView,
     ProductRetrieveView,
-    ReviewPostView,
+    ProductReviewsView,
     SaleView,
     LimitedProductsView,
     BannersView,
     PopularProductsView,
+    ProductFeedView,
+    SpecificationFacetsView,
+    SearchSuggestView,
+    ProductRecommendationsView,
 )
 
 app_name = "site_auth"
@@ -16,11 +20,15 @@ app_name = "site_auth"
 urlpatterns = [
     path("api/categories/", CategoryListView.as_view()),
     path("api/catalog/", CatalogView.as_view()),
+    path("api/catalog/facets/", SpecificationFacetsView.as_view()),
     path("api/product/<int:id>/", ProductRetrieveView.as_view()),
-    path("api/product/<int:id>/reviews/", ReviewPostView.as_view()),
+    path("api/product/<int:id>/reviews/", ProductReviewsView.as_view()),
+    path("api/product/<int:id>/recommendations/", ProductRecommendationsView.as_view()),
     path("api/products/limited/", LimitedProductsView.as_view()),
     path("api/products/popular/", PopularProductsView.as_view()),
     path("api/tags/", TagListView.as_view()),
     path("api/sales/", SaleView.as_view()),
     path("api/banners/", BannersView.as_view()),
+    path("api/search/suggest/", SearchSuggestView.as_view()),
+    path("api/feed/<str:feed_format>/", ProductFeedView.as_view()),
 ]
@@ -1,16 +1,38 @@
 from datetime import datetime
 
-from django.contrib.auth.models import User
-from rest_framework.permissions import IsAuthenticated
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
+from django.utils.text import compress_sequence
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework import status
-from django.db.models import Q, Count, F, Sum, DecimalField, Subquery, OuterRef, Min
+from django.db.models import (
+    Q,
+    F,
+    Sum,
+    DecimalField,
+    Subquery,
+    OuterRef,
+    Min,
+    Prefetch,
+)
 from rest_framework.views import APIView
 
+from megano.throttling import UserTokenBucketThrottle
 from order.models import OrderProduct
-from profile_user.models import Profile
+from site_auth.backends import get_user_profile
+from .categories import category_tree
+from .facets import (
+    filter_by_specifications,
+    get_category_facets,
+    get_specification_filters,
+)
+from .feeds import FEED_CONTENT_TYPES, FEED_GENERATORS, encode_feed
 from .models import Category, Product, Tag, Review, Sale
+from .pagination import ReviewCursorPagination
+from .permissions import HasFeedAccess
+from .recommendations import get_recommended_products
+from .suggest import suggest_index
 from .serializers import (
-    CategorySerializer,
     ProductSerializer,
     TagSerializer,
     AloneProductSerializer,
@@ -21,6 +43,9 @@ from rest_framework.response import Response
 from rest_framework.request import Request
 
 
+# количество последних отзывов, которые передаются вместе с информацией о товаре
+PRODUCT_LATEST_REVIEWS: int = 3
+
 # словарь для добавления перед признаком сортировки знака "-",
 # в зависимости от того, сортируется список по возрастанию или убыванию
 sorting_dict: dict = {"inc": "-", "dec": ""}
@@ -76,12 +101,13 @@ class CategoryListView(APIView):
     API-класс с методом get для передачи на фронтэнд списка категорий со всеми дочерними подкатегориями.
     """
 
+    # данные каталога только читаются, поэтому все представления каталога (кроме создания отзыва)
+    # получают их из реплики БД, если она настроена (см. megano/db_routers.py)
+    use_replica = True
+
     def get(self, request: Request) -> Response:
-        categories: list = Category.objects.filter(level=0).prefetch_related(
-            "subcategories"
-        )
-        serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        # дерево категорий хранится в памяти процесса и читается из БД только после изменения категорий
+        return Response(category_tree.get())
 
 
 class CatalogView(APIView):
@@ -89,6 +115,8 @@ class CatalogView(APIView):
     API-класс с методом get для передачи на фронтэнд списка товаров в категории
     """
 
+    use_replica = True
+
     def get(self, request: Request) -> Response:
         """
         Метод получает с фрондэнда параметры в виде querystring, по которым в дальнейшем товары сортируются.
@@ -129,26 +157,22 @@ class CatalogView(APIView):
         category_pk: int = request.query_params.get("category")
 
         # получаем из БД список товаров и сразу фильтруем их по содержащемся в названии тексте,
-        # минимальной и максимальной цене и убираем товары, представляющее собой доставку.
+        # минимальной и максимальной цене.
         products: list[Product] = (
             Product.objects.filter(
                 Q(title__iregex=name) & Q(price__range=(min_price, max_price))
             )
-            .exclude(description__iregex="доставка")
             .prefetch_related("tags")
             .prefetch_related("images")
-            .prefetch_related("reviews")
             .prefetch_related("category")
         ).distinct()
 
-        # если необходимо отсортировать по количеству отзывов, то к товарам добавляется
-        # аннотация с количеством отзывов и затем производится сортировка.
+        # если необходимо отсортировать по количеству отзывов, то сортировка производится
+        # по хранящемуся у товара количеству отзывов (без подсчета отзывов в запросе).
         # в другом случае сразу производится сортировка по необходимому признаку
         if sort_by == "reviews":
-            products: list[Product] = products.annotate(
-                review_count=Count("reviews")
-            ).order_by(
-                sorting_dict[request.query_params.get("sortType")] + "review_count"
+            products: list[Product] = products.order_by(
+                sorting_dict[request.query_params.get("sortType")] + "reviews_count"
             )
         else:
             order_by: str = sorting_dict[request.query_params.get("sortType")] + sort_by
@@ -173,6 +197,13 @@ class CatalogView(APIView):
                 category__pk__in=categories
             ).distinct()
 
+        # фильтрация товаров по характеристикам, например filter[spec][Размер]=M
+        specification_filters: dict[str, list[str]] = get_specification_filters(
+            request.query_params
+        )
+        if specification_filters:
+            products = filter_by_specifications(products, specification_filters)
+
         # определение, с какого по какой элемент списка необходимо взять для размещения на текущей странице,
         # а также самой последней возможной страницы пагинации
         right_border, left_border, max_page = get_page_borders(
@@ -194,6 +225,8 @@ class TagListView(APIView):
     API-класс с методом get для передачи на фронтэнд списка возможных тэгов для фильтрации
     """
 
+    use_replica = True
+
     def get(self, request: Request) -> Response:
         """
         Метод получает из БД все существующие тэги,
@@ -217,11 +250,72 @@ class TagListView(APIView):
         return Response(serialized.data)
 
 
+class SpecificationFacetsView(APIView):
+    """
+    API-класс с методом get для передачи на фронтэнд возможных значений фильтров по характеристикам товаров
+    """
+
+    use_replica = True
+
+    def get(self, request: Request) -> Response:
+        """
+        Метод получает заранее посчитанные значения характеристик товаров категории
+        (или всех категорий, если категория не выбрана) с количеством товаров для каждого значения.
+        :param request: Request
+        :return: Response со списком характеристик и их значений
+        """
+        category_pk: str | None = request.query_params.get("category")
+        if category_pk:
+            try:
+                category_pk = int(category_pk)
+            except ValueError:
+                return Response(
+                    {"category": "Номер категории должен быть числом"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if not Category.objects.filter(pk=category_pk).exists():
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            categories: list[int] = get_categories(category_pk)
+        else:
+            categories: list[int] = list(Category.objects.values_list("pk", flat=True))
+        return Response(get_category_facets(categories))
+
+
+class SearchSuggestView(APIView):
+    """
+    API-класс с методом get для передачи на фронтэнд подсказок при вводе текста в строку поиска
+    """
+
+    use_replica = True
+
+    # максимальное количество подсказок в ответе
+    max_limit: int = 20
+
+    def get(self, request: Request) -> Response:
+        """
+        Метод ищет товары, тэги и категории, слова названий которых начинаются со слов введенного текста.
+        Поиск идет по индексу в памяти, без запросов к БД.
+        :param request: Request
+        :return: Response со списком подсказок, отсортированных по популярности
+        """
+        query: str = request.query_params.get("query", "")
+        try:
+            limit: int = int(request.query_params.get("limit", 10))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), self.max_limit)
+
+        suggest_index.ensure_fresh()
+        return Response(suggest_index.search(query, limit))
+
+
 class ProductRetrieveView(APIView):
     """
     API-класс с методом get для передачи на фронтэнд информации об отдельном товаре.
     """
 
+    use_replica = True
+
     def get(self, request: Request, id: int) -> Response:
         """
         Метод получает на вход id отдельного товара, получает его из БД и возвращает, используя сериализатор.
@@ -229,64 +323,120 @@ class ProductRetrieveView(APIView):
         :param id: pk-номер искомого товара в БД
         :return: Response с информацией об отдельном товаре
         """
+        # с товаром загружаются только последние отзывы, а их количество хранится у самого товара,
+        # поэтому время ответа не зависит от количества отзывов
+        latest_reviews = Review.objects.order_by("-date", "-pk")[
+            :PRODUCT_LATEST_REVIEWS
+        ]
         product: Product = (
-            Product.objects.filter(pk=id).prefetch_related("sales").first()
+            Product.objects.filter(pk=id)
+            .prefetch_related(
+                "sales",
+                "images",
+                "tags",
+                "specifications",
+                Prefetch("reviews", queryset=latest_reviews, to_attr="latest_reviews"),
+            )
+            .first()
         )
+        if product is None:
+            raise Http404
         serialized = AloneProductSerializer(product)
         return Response(serialized.data)
 
 
-class ReviewPostView(APIView):
+class ProductRecommendationsView(APIView):
     """
-    API-класс с методом post для создания нового отзыва о товаре.
-    К методам класса применяется ограничение - новый отзыв может разместить
-    только аутентифицированный пользователь.
+    API-класс с методом get для передачи на фронтэнд товаров, которые часто покупают вместе с данным товаром
     """
 
-    permission_classes = (IsAuthenticated,)
+    use_replica = True
+
+    def get(self, request: Request, id: int) -> Response:
+        """
+        Метод получает заранее посчитанные рекомендации товара (см. команду build_recommendations).
+        :param request: Request
+        :param id: номер товара
+        :return: Response со списком рекомендованных товаров
+        """
+        products = get_recommended_products([id]).prefetch_related("tags", "images")
+        serialized = ProductSerializer(products, many=True)
+        return Response(serialized.data)
+
+
+class ProductReviewsView(APIView):
+    """
+    API-класс с методом get для постраничного получения отзывов о товаре
+    и методом post для создания нового отзыва о товаре.
+    Новый отзыв может разместить только аутентифицированный пользователь, частота отзывов ограничена.
+    """
+
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+    throttle_classes = (UserTokenBucketThrottle,)
+    throttle_scope = "review"
+    pagination_class = ReviewCursorPagination
+    use_replica = True
+
+    def get(self, request: Request, id: int) -> Response:
+        """
+        Метод возвращает страницу отзывов о товаре от новых к старым.
+        Ссылка на следующую страницу передается в поле next (параметр cursor), размер страницы - в параметре limit.
+
+        :param id: pk-номер товара
+        :return: Response со страницей отзывов
+        """
+        if not Product.objects.filter(pk=id).exists():
+            raise Http404
+        paginator = self.pagination_class()
+        reviews = paginator.paginate_queryset(
+            Review.objects.filter(product_id=id), request, view=self
+        )
+        serialized = ReviewSerializer(reviews, many=True)
+        return paginator.get_paginated_response(serialized.data)
 
     def post(self, request: Request, id: int) -> Response:
         """
-        Метод проверяет, писал ли текущий пользователь отзыв на данный товар,
-        и если не писал, то создает в БД новый отзыв, который привязывается к продукту и пользователю.
+        Метод создает в БД новый отзыв о товаре от текущего пользователя.
+        Повторный отзыв того же пользователя отклоняет уникальное ограничение (product, profile) в БД,
+        а количество отзывов и рейтинг товара пересчитываются одним UPDATE (см. Product.update_review_stats).
 
         :param id: pk-номер товара, отзыв на который необходимо создать
-        :return: Response со списком отзывов для данного товара
+        :return: Response с новым отзывом, количеством отзывов и рейтингом товара
         """
-        product: Product = Product.objects.get(pk=id)
+        serializer = ReviewSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         # получаем профиль текущего пользователя, а если еще не существует, то создаем его.
-        try:
-            profile: Profile = Profile.objects.get(user=request.user)
-        except Exception:
-            user = User.objects.get(pk=request.user.pk)
-            profile: Profile = Profile.objects.create(user=user)
-
-        # проверяем, есть ли в БД отзыв для данного товара от текущего пользователя
-        review = Review.objects.filter(Q(product=product) & Q(profile=profile))
+        profile = get_user_profile(request.user)
 
-        # если отзыв уже есть, то возвращается ответ по статусом 400, в противном случае - создается новый отзыв
-        if review:
+        try:
+            with transaction.atomic():
+                serializer.save(profile=profile, product_id=id)
+                stats: dict | None = (
+                    Product.objects.filter(pk=id)
+                    .values("reviews_count", "rating")
+                    .first()
+                )
+                if stats is None:
+                    # отзыв на несуществующий товар отменяется вместе с транзакцией
+                    raise Product.DoesNotExist
+        except IntegrityError:
             return Response(
                 {"error": "Данный пользователь уже писал отзыв на этот товар"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        else:
-            Review.objects.create(
-                profile=profile,
-                author=request.data.get("author", ""),
-                email=request.data.get("email", ""),
-                text=request.data.get("text", ""),
-                rate=request.data.get("rate", ""),
-                product=product,
-            )
-            product.avg_rating = product.avg_rating
-
-        # получаем все отзывы для данного товара и передаем через сериализатор на фронтэнд.
-        reviews = Review.objects.filter(product=product).all()
-        serialized = ReviewSerializer(reviews, many=True)
+        except Product.DoesNotExist:
+            raise Http404
 
-        return Response(serialized.data, status=status.HTTP_200_OK)
+        return Response(
+            {
+                "review": serializer.data,
+                "reviewsCount": stats["reviews_count"],
+                "rating": stats["rating"],
+            },
+            status=status.HTTP_201_CREATED,
+        )
 
 
 class SaleView(APIView):
@@ -294,6 +444,8 @@ class SaleView(APIView):
     API-класс с методом get для передачи на фронтэнд списка акционных товаров.
     """
 
+    use_replica = True
+
     def get(self, request: Request) -> Response:
         """
         Метод получает их БД список акционных товаров и передает их на фронтэнд, используя сериализатор.
@@ -329,6 +481,8 @@ class LimitedProductsView(APIView):
     API-класс с методом get для передачи на фронтэнд списка лимитированных товаров.
     """
 
+    use_replica = True
+
     def get(self, request: Request) -> Response:
         """
         Метод получает из БД 16 товаров, у которых признак limited_edition = True и возвращает на фронтэнд,
@@ -341,7 +495,6 @@ class LimitedProductsView(APIView):
             Product.objects.filter(limited_edition=True, count__gt=0)
             .prefetch_related("tags")
             .prefetch_related("images")
-            .prefetch_related("reviews")
             .prefetch_related("category")[:16]
         )
         serialized = ProductSerializer(limited_products, many=True)
@@ -353,6 +506,8 @@ class BannersView(APIView):
     API-класс с методом get для передачи на фронтэнд товаров из 3-х избранных категорий.
     """
 
+    use_replica = True
+
     def get(self, request: Request) -> Response:
         """
         Метод фильтрует по одному самому дешёвому товару из 3-х избранных категорий - 'Платья', 'Бижутерия', 'Туфли'
@@ -380,7 +535,6 @@ class BannersView(APIView):
             .filter(count__gt=0)
             .prefetch_related("tags")
             .prefetch_related("images")
-            .prefetch_related("reviews")
             .prefetch_related("category")
         )
 
@@ -393,6 +547,8 @@ class PopularProductsView(APIView):
     API-класс с методом get для передачи на фронтэнд 8 самых популярных товаров
     """
 
+    use_replica = True
+
     def get(self, request: Request) -> Response:
         """
         Метод получает из БД имеющиеся в наличии товары, фильтрует из по количеству отзывов (не менее 3-х)
@@ -402,11 +558,9 @@ class PopularProductsView(APIView):
         """
 
         products: list[Product] = (
-            Product.objects.annotate(reviews_count=Count("reviews"))
-            .filter(reviews_count__gte=3, count__gt=0)
+            Product.objects.filter(reviews_count__gte=3, count__gt=0)
             .prefetch_related("tags")
             .prefetch_related("images")
-            .prefetch_related("reviews")
             .prefetch_related("category")
             .all()
         )
@@ -452,3 +606,43 @@ class PopularProductsView(APIView):
 
         serialized = ProductSerializer(products_with_revenue[:8], many=True)
         return Response(serialized.data)
+
+
+class ProductFeedView(APIView):
+    """
+    API-класс с методом get для потоковой выгрузки всего каталога товаров (для маркетплейсов и партнеров).
+    Выгрузка доступна сотрудникам и партнерам с токеном, а частота запросов ограничена,
+    т.к. каждая выгрузка проходит по всему каталогу.
+    """
+
+    permission_classes = (HasFeedAccess,)
+    throttle_classes = (UserTokenBucketThrottle,)
+    throttle_scope = "feed"
+    throttle_safe_methods = True
+
+    def get(self, request: Request, feed_format: str) -> StreamingHttpResponse:
+        """
+        Метод отдает выгрузку каталога в формате NDJSON или YML по мере ее формирования.
+        Если клиент поддерживает gzip, то выгрузка сжимается на лету.
+
+        :param feed_format: формат выгрузки - ndjson или yml
+        :return: StreamingHttpResponse с выгрузкой каталога
+        """
+        if feed_format not in FEED_GENERATORS:
+            raise Http404
+
+        base_url: str = request.build_absolute_uri("/").rstrip("/")
+        content = encode_feed(FEED_GENERATORS[feed_format](base_url))
+
+        use_gzip: bool = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if use_gzip:
+            content = compress_sequence(content)
+
+        response = StreamingHttpResponse(
+            content, content_type=FEED_CONTENT_TYPES[feed_format]
+        )
+        response["Content-Disposition"] = f'inline; filename="catalog.{feed_format}"'
+        response["Vary"] = "Accept-Encoding"
+        if use_gzip:
+            response["Content-Encoding"] = "gzip"
+        return response
@@ -1,4 +1,15 @@
 var mix = {
+    computed: {
+      basketIds () {
+          return Object.values(this.basket || {}).map(({id}) => id).sort().join(',')
+      }
+    },
+    watch: {
+        // рекомендации к корзине зависят только от набора товаров в ней
+        basketIds () {
+            this.getRecommendations()
+        }
+    },
     methods: {
         submitBasket () {
             this.postData('/api/orders/', Object.values(this.basket))
@@ -7,10 +18,20 @@ var mix = {
                 }).catch(() => {
                     console.warn('Ошибка при создании заказа')
                 })
+        },
+        getRecommendations () {
+            this.getData('/api/basket/recommendations/').then(data => {
+                this.recommendations = data
+            }).catch(() => {
+                this.recommendations = []
+                console.warn('Ошибка при получении рекомендаций')
+            })
         }
     },
     mounted() {},
     data() {
-        return {}
+        return {
+            recommendations: []
+        }
     }
 }
\ No newline at end of file
@@ -21,11 +21,20 @@ var mix = {
                 }
                 if(data.images.length)
                     this.activePhoto = 0
+                this.getRecommendations()
             }).catch(() => {
                 this.product = {}
                 console.warn('Ошибка при получении товара')
             })
         },
+        getRecommendations () {
+            this.getData(`/api/product/${this.product.id}/recommendations/`).then(data => {
+                this.recommendations = data
+            }).catch(() => {
+                this.recommendations = []
+                console.warn('Ошибка при получении рекомендаций')
+            })
+        },
         submitReview () {
             this.postData(`/api/product/${this.product.id}/reviews/`, {
                 author: this.review.author,
@@ -33,7 +42,9 @@ var mix = {
                 text: this.review.text,
                 rate: this.review.rate
             }).then(({data}) => {
-                this.product.reviews = data
+                this.product.reviews = [data.review, ...(this.product.reviews || [])]
+                this.product.reviewsCount = data.reviewsCount
+                this.product.rating = data.rating
                 alert('Отзыв опубликован')
                 this.review.author = ''
                 this.review.email = ''
@@ -43,6 +54,18 @@ var mix = {
                 console.warn('Ошибка при публикации отзыва')
             })
         },
+        loadReviews () {
+            // с товаром приходят только последние отзывы, остальные загружаются постранично
+            const url = this.reviewsNext || `/api/product/${this.product.id}/reviews/`
+            this.getData(url).then(data => {
+                this.product.reviews = this.reviewsNext
+                    ? this.product.reviews.concat(data.results)
+                    : data.results
+                this.reviewsNext = data.next
+            }).catch(() => {
+                console.warn('Ошибка при получении отзывов')
+            })
+        },
         setActivePhoto(index) {
             this.activePhoto = index
         }
@@ -53,7 +76,9 @@ var mix = {
     data() {
         return {
             product : {},
+            recommendations: [],
             activePhoto: 0,
+            reviewsNext: null,
             count: 1,
             review: {
                 author: '',
@@ -1,3 +1,197 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+
+from .views import serve_static
+
+
+class MediaServingTestCase(TestCase):
+    """
+    Класс с методами для тестирования отдачи загруженных файлов.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания пользователей - владельца аватара и постороннего пользователя.
+        """
+        cls.owner = User.objects.create_user(username="owner", password="Test24@")
+        cls.stranger = User.objects.create_user(username="stranger", password="Test24@")
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: создает во временной папке фото товара и аватар пользователя.
+        """
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.content: bytes = bytes(range(256)) * 4
+        self.product_path: str = "products/product_1/images/photo.jpg"
+        self.avatar_path: str = f"profiles/profile_{self.owner.pk}/avatar.jpg"
+        for path in (self.product_path, self.avatar_path):
+            full_path = os.path.join(self.media_root, path)
+            os.makedirs(os.path.dirname(full_path))
+            with open(full_path, "wb") as file:
+                file.write(self.content)
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_public_file(self) -> None:
+        """
+        Тест для проверки отдачи общедоступного файла с заголовками кэширования.
+        """
+        response = self.client.get(f"/media/{self.product_path}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_range_request(self) -> None:
+        """
+        Тест для проверки отдачи части файла по заголовку Range.
+        """
+        response = self.client.get(
+            f"/media/{self.product_path}", HTTP_RANGE="bytes=10-19"
+        )
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+
+        response = self.client.get(
+            f"/media/{self.product_path}", HTTP_RANGE="bytes=5000-"
+        )
+        self.assertEqual(response.status_code, 416)
+
+    def test_not_modified(self) -> None:
+        """
+        Тест для проверки ответа 304, если файл не изменялся с момента прошлого запроса.
+        """
+        response = self.client.get(f"/media/{self.product_path}")
+        response = self.client.get(
+            f"/media/{self.product_path}",
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_private_avatar(self) -> None:
+        """
+        Тест для проверки того, что аватар доступен только его владельцу.
+        """
+        self.assertEqual(self.client.get(f"/media/{self.avatar_path}").status_code, 403)
+
+        self.client.force_login(self.stranger)
+        self.assertEqual(self.client.get(f"/media/{self.avatar_path}").status_code, 403)
+
+        self.client.force_login(self.owner)
+        response = self.client.get(f"/media/{self.avatar_path}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+
+    @override_settings(MEDIA_SERVE_MODE="nginx")
+    def test_accel_redirect(self) -> None:
+        """
+        Тест для проверки того, что в режиме nginx файл отдается через заголовок X-Accel-Redirect.
+        """
+        response = self.client.get(f"/media/{self.product_path}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"], f"/protected-media/{self.product_path}"
+        )
+        self.assertEqual(response.content, b"")
+
+    def test_path_outside_media_root(self) -> None:
+        """
+        Тест для проверки того, что нельзя получить файл за пределами MEDIA_ROOT.
+        """
+        response = self.client.get("/media/../manage.py")
+
+        self.assertEqual(response.status_code, 404)
+
+
+class StaticServingTestCase(TestCase):
+    """
+    Класс с методами для тестирования отдачи собранных статических файлов через Django (SERVE_STATIC).
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: создает во временной папке файл с хэшем в названии, его сжатые копии и файл без хэша.
+        """
+        self.static_root: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+        settings_override = override_settings(STATIC_ROOT=self.static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.hashed_path: str = "js/app.0123456789ab.js"
+        files: dict[str, bytes] = {
+            self.hashed_path: b"original",
+            self.hashed_path + ".gz": b"gzip",
+            self.hashed_path + ".br": b"brotli",
+            "robots.txt": b"User-agent: *",
+        }
+        for name, content in files.items():
+            path: str = os.path.join(self.static_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(content)
+        self.factory = RequestFactory()
+
+    def get(self, path: str, accept_encoding: str = ""):
+        """
+        Метод для запроса файла с указанным заголовком Accept-Encoding.
+        """
+        request = self.factory.get(
+            f"/static/{path}", HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        return serve_static(request, path)
+
+    def test_precompressed_variant(self) -> None:
+        """
+        Тест для проверки выбора сжатой копии по заголовку Accept-Encoding (brotli предпочтительнее gzip).
+        """
+        cases: list[tuple[str, bytes, str | None]] = [
+            ("gzip, deflate, br", b"brotli", "br"),
+            ("gzip, deflate", b"gzip", "gzip"),
+            ("", b"original", None),
+        ]
+        for accept_encoding, content, content_encoding in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(self.hashed_path, accept_encoding)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b"".join(response.streaming_content), content)
+                self.assertEqual(response.get("Content-Encoding"), content_encoding)
+                self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_cache_control(self) -> None:
+        """
+        Тест для проверки, что файлы с хэшем в названии кэшируются навсегда, а остальные - на STATIC_UNHASHED_MAX_AGE.
+        """
+        cache_control: set[str] = set(
+            self.get(self.hashed_path)["Cache-Control"].split(", ")
+        )
+        self.assertEqual(cache_control, {"public", "max-age=31536000", "immutable"})
+
+        with override_settings(STATIC_UNHASHED_MAX_AGE=600):
+            cache_control = set(self.get("robots.txt")["Cache-Control"].split(", "))
+        self.assertEqual(cache_control, {"public", "max-age=600"})
+
+    def test_unknown_path(self) -> None:
+        """
+        Тест для проверки ответа 404 на отсутствующий файл и путь за пределами STATIC_ROOT.
+        """
+        for path in ("js/missing.js", "js", "../manage.py"):
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    self.get(path)
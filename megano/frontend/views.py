@@ -0,0 +1,225 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from megano.storage import is_hashed_name
+
+# сжатые копии статических файлов в порядке предпочтения: кодировка из Accept-Encoding и расширение файла
+PRECOMPRESSED_ENCODINGS: tuple[tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+
+# загруженные файлы, доступные только владельцу и персоналу: аватары в папке profiles/profile_<id пользователя>/
+PRIVATE_MEDIA_PATTERN = re.compile(r"^profiles/profile_(?P<user_pk>\d+)/")
+
+# заголовок Range с одним диапазоном байтов: "bytes=начало-конец", "bytes=начало-" или "bytes=-длина"
+RANGE_PATTERN = re.compile(r"^bytes=(?P<start>\d*)-(?P<end>\d*)$")
+
+# размер фрагмента, которыми файл читается при отдаче части файла
+RANGE_CHUNK_SIZE: int = 64 * 1024
+
+
+def serve_static(request: HttpRequest, path: str) -> FileResponse:
+    """
+    Представление для отдачи собранных collectstatic файлов, если перед приложением нет веб-сервера.
+    Если браузер поддерживает сжатие, то отдается заранее сжатая копия файла.
+    Файлы с хэшем содержимого в названии кэшируются браузером навсегда (immutable),
+    остальные - на время STATIC_UNHASHED_MAX_AGE.
+
+    :param path: путь к файлу внутри STATIC_ROOT
+    :return: FileResponse с содержимым файла
+    """
+    try:
+        full_path: str = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    file_path: str = full_path
+    content_encoding: str | None = None
+    accept_encoding: str = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    for encoding, extension in PRECOMPRESSED_ENCODINGS:
+        if encoding in accept_encoding and os.path.isfile(full_path + extension):
+            file_path, content_encoding = full_path + extension, encoding
+            break
+
+    content_type: str = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    response = FileResponse(
+        open(file_path, "rb"),
+        content_type=content_type,
+        filename=os.path.basename(full_path),
+    )
+    if content_encoding:
+        response["Content-Encoding"] = content_encoding
+    patch_vary_headers(response, ("Accept-Encoding",))
+
+    if is_hashed_name(path):
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.STATIC_UNHASHED_MAX_AGE
+        )
+    return response
+
+
+def get_media_owner_pk(path: str) -> int | None:
+    """
+    Функция для определения пользователя, которому принадлежит загруженный файл.
+
+    :param path: путь к файлу внутри MEDIA_ROOT
+    :return: id пользователя-владельца или None, если файл доступен всем
+    """
+    match = PRIVATE_MEDIA_PATTERN.match(path)
+    if match:
+        return int(match.group("user_pk"))
+    return None
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Функция для разбора заголовка Range с одним диапазоном байтов.
+
+    :param header: значение заголовка Range
+    :param size: размер файла в байтах
+    :return: кортеж (первый байт, последний байт) включительно или None, если заголовок не поддерживается
+    :raises ValueError: если диапазон выходит за пределы файла
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or not (match.group("start") or match.group("end")):
+        return None
+
+    if match.group("start"):
+        start = int(match.group("start"))
+        end = int(match.group("end")) if match.group("end") else size - 1
+    else:
+        # "bytes=-N" - последние N байтов файла
+        start = max(size - int(match.group("end")), 0)
+        end = size - 1
+
+    if start >= size or start > end:
+        raise ValueError("Диапазон выходит за пределы файла")
+    return start, min(end, size - 1)
+
+
+def read_file_range(file_path: str, start: int, length: int):
+    """
+    Генератор, читающий фрагментами часть файла заданной длины.
+
+    :param file_path: полный путь к файлу
+    :param start: номер первого байта
+    :param length: количество байтов
+    """
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request: HttpRequest, file_path: str) -> HttpResponse:
+    """
+    Функция для отдачи файла самим Django с поддержкой условных запросов (If-Modified-Since)
+    и запросов части файла (Range).
+
+    :param file_path: полный путь к файлу
+    :return: ответ с файлом, его частью или ответ 304/416
+    """
+    stat = os.stat(file_path)
+    last_modified: str = http_date(stat.st_mtime)
+    if not was_modified_since(
+        request.META.get("HTTP_IF_MODIFIED_SINCE"), int(stat.st_mtime)
+    ):
+        return HttpResponseNotModified()
+
+    content_type: str = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    range_header: str = request.META.get("HTTP_RANGE", "")
+    if_range: str = request.META.get("HTTP_IF_RANGE", last_modified)
+
+    byte_range = None
+    if range_header and if_range == last_modified:
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(file_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_file_range(file_path, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+
+    response["Last-Modified"] = last_modified
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    """
+    Представление для отдачи загруженных файлов (фото товаров, категорий, аватаров).
+    Доступ к аватарам проверяется в Django: их может получить только сам пользователь или персонал.
+    В зависимости от настройки MEDIA_SERVE_MODE сам файл отдает веб-сервер (заголовок X-Accel-Redirect
+    для nginx или X-Sendfile для apache), либо Django при помощи file_response.
+
+    :param path: путь к файлу внутри MEDIA_ROOT
+    :return: ответ с файлом или с заголовком для веб-сервера
+    """
+    try:
+        full_path: str = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    owner_pk: int | None = get_media_owner_pk(path)
+    if owner_pk is not None:
+        user = request.user
+        if not user.is_authenticated or (user.pk != owner_pk and not user.is_staff):
+            raise PermissionDenied
+
+    mode: str = settings.MEDIA_SERVE_MODE
+    if mode == "nginx":
+        response = HttpResponse()
+        # тип содержимого определит сам nginx по расширению файла
+        del response["Content-Type"]
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(
+            path
+        )
+    elif mode == "apache":
+        response = HttpResponse()
+        del response["Content-Type"]
+        response["X-Sendfile"] = full_path
+    else:
+        response = file_response(request, full_path)
+
+    if owner_pk is not None:
+        patch_cache_control(response, private=True, max_age=settings.MEDIA_MAX_AGE)
+        patch_vary_headers(response, ("Cookie",))
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
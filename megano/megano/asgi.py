@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "megano.settings")
 
 application = get_asgi_application()
+
+# прогрев процесса в фоновом потоке, после которого /healthz/ready сообщает о готовности
+from megano.warmup import warmup  # noqa: E402
+
+warmup.start()
@@ -0,0 +1,105 @@
+"""
+Модуль с маршрутизацией запросов к базам данных: основной (default) и реплике (replica).
+
+Запросы на чтение моделей каталога из представлений, помеченных атрибутом use_replica = True,
+направляются в реплику. Все записи и все остальные чтения идут в основную базу.
+После любого изменяющего запроса пользователь на REPLICA_STICKY_SECONDS секунд "прилипает"
+к основной базе (через cookie), чтобы сразу видеть результат своих действий.
+"""
+
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA_DATABASE: str = "replica"
+
+# приложения, модели которых можно читать из реплики
+REPLICA_APPS: set[str] = {"catalogs"}
+
+# cookie, при наличии которой все запросы пользователя идут в основную базу
+REPLICA_STICKY_COOKIE: str = "use_primary"
+
+SAFE_METHODS: tuple[str, ...] = ("GET", "HEAD", "OPTIONS")
+
+# признак того, что текущий запрос может читать из реплики (свой для каждого потока и корутины)
+_use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
+
+
+def replica_available() -> bool:
+    """
+    Функция для проверки, настроена ли отдельная реплика. Если реплика не указана в DATABASES
+    или указывает на тот же файл, что и основная база (например, зеркало в тестах), то маршрутизация не нужна.
+
+    :return: True, если реплика настроена и отличается от основной базы
+    """
+    if REPLICA_DATABASE not in connections.settings:
+        return False
+    return (
+        connections.settings[REPLICA_DATABASE]["NAME"]
+        != connections.settings["default"]["NAME"]
+    )
+
+
+class ReplicaRouter:
+    """
+    Роутер баз данных, направляющий чтение моделей каталога в реплику, если это разрешено для текущего запроса.
+    """
+
+    def db_for_read(self, model, **hints) -> str | None:
+        if (
+            _use_replica.get()
+            and model._meta.app_label in REPLICA_APPS
+            and replica_available()
+        ):
+            return REPLICA_DATABASE
+        return "default"
+
+    def db_for_write(self, model, **hints) -> str:
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # реплика - копия основной базы, поэтому связи между объектами из разных баз допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool:
+        # реплика не мигрирует сама, а получает копию основной базы командой sync_replica
+        return db != REPLICA_DATABASE
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Middleware, разрешающий чтение из реплики на время обработки безопасного (GET/HEAD) запроса
+    к представлению с атрибутом use_replica = True, если пользователь недавно ничего не изменял.
+    После изменяющего запроса устанавливает cookie, которая на время направляет пользователя в основную базу.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        token = getattr(request, "_replica_token", None)
+        if token is not None:
+            _use_replica.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                REPLICA_STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs) -> None:
+        view_class = getattr(view_func, "view_class", None)
+        if (
+            request.method in SAFE_METHODS
+            and getattr(view_class, "use_replica", False)
+            and REPLICA_STICKY_COOKIE not in request.COOKIES
+        ):
+            request._replica_token = _use_replica.set(True)
+        return None
@@ -0,0 +1,438 @@
+"""
+Модуль с метриками приложения в текстовом формате Prometheus (эндпоинт /metrics/).
+
+Метрики хранятся в памяти процесса: счетчики и гистограммы с метками, каждое изменение - одно взятие
+блокировки и сложение, поэтому сбор метрик почти не влияет на время ответа и безопасен при работе в потоках.
+Если сайт запущен в нескольких процессах (например, gunicorn с несколькими воркерами), то в настройке
+METRICS_DIR указывается общая папка: каждый процесс не чаще, чем раз в METRICS_FLUSH_INTERVAL секунд,
+записывает в нее файл со своими значениями, а эндпоинт складывает значения всех процессов.
+Папку нужно очищать при перезапуске сайта, иначе значения завершившихся процессов будут учитываться и дальше.
+"""
+
+import atexit
+import bisect
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import connections
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.utils.module_loading import import_string
+
+# методы запросов, которые попадают в метки как есть (остальные - как "other")
+HTTP_METHODS: set[str] = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+QUERY_COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# метка представления для запросов, адрес которых не найден
+UNRESOLVED_VIEW: str = "unresolved"
+
+
+class Metric:
+    """
+    Базовый класс метрики: значения хранятся в словаре {значения меток: значение}.
+    """
+
+    type: str = ""
+
+    def __init__(
+        self, name: str, documentation: str, labels: Iterable[str] = ()
+    ) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labels: tuple[str, ...] = tuple(labels)
+        self._values: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict[tuple[str, ...], object]:
+        """
+        Метод для получения копии значений метрики.
+        """
+        with self._lock:
+            return {labels: self._copy(value) for labels, value in self._values.items()}
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(Metric):
+    """
+    Счетчик, значение которого только увеличивается.
+    """
+
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Histogram(Metric):
+    """
+    Гистограмма: количество наблюдений в каждом интервале, сумма и количество наблюдений.
+    Значение для меток - список [количество в интервалах..., количество больше последней границы, сумма].
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets: tuple[float, ...] = buckets
+
+    def observe(self, value: float, *labels: str) -> None:
+        index: int = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def _copy(self, value):
+        return list(value)
+
+
+class MetricsRegistry:
+    """
+    Класс реестра метрик процесса с записью значений в общую папку для нескольких процессов.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self._flushed_at: float = 0
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labels: Iterable[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def snapshot(self) -> dict[str, dict[tuple[str, ...], object]]:
+        """
+        Метод для получения значений всех метрик процесса.
+        """
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def flush(self) -> None:
+        """
+        Метод для записи значений метрик процесса в файл <pid>.json в папке METRICS_DIR.
+        Файл сначала пишется во временный файл и затем атомарно заменяется, поэтому читающий процесс
+        не видит частично записанный файл.
+        """
+        directory: str | None = settings.METRICS_DIR
+        if not directory:
+            return
+        with self._flush_lock:
+            self._flushed_at = time.monotonic()
+            data: dict = {
+                name: [[list(labels), value] for labels, value in values.items()]
+                for name, values in self.snapshot().items()
+            }
+            os.makedirs(directory, exist_ok=True)
+            descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(descriptor, "w") as file:
+                json.dump(data, file)
+            os.replace(temp_path, os.path.join(directory, f"{os.getpid()}.json"))
+
+    def maybe_flush(self) -> None:
+        """
+        Метод для записи значений в файл, если с прошлой записи прошло больше METRICS_FLUSH_INTERVAL секунд.
+        """
+        if (
+            settings.METRICS_DIR
+            and time.monotonic() - self._flushed_at >= settings.METRICS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def collect(self) -> dict[str, dict[tuple[str, ...], object]]:
+        """
+        Метод для получения значений метрик: без METRICS_DIR - значения текущего процесса,
+        с METRICS_DIR - сумма значений из файлов всех процессов.
+        """
+        directory: str | None = settings.METRICS_DIR
+        if not directory:
+            return self.snapshot()
+        self.flush()
+        merged: dict[str, dict[tuple[str, ...], object]] = {
+            name: {} for name in self.metrics
+        }
+        for file_name in os.listdir(directory):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, file_name)) as file:
+                    data: dict = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for name, rows in data.items():
+                if name not in merged:
+                    continue
+                values = merged[name]
+                for labels, value in rows:
+                    labels = tuple(labels)
+                    if labels not in values:
+                        values[labels] = value
+                    elif isinstance(value, list):
+                        values[labels] = [a + b for a, b in zip(values[labels], value)]
+                    else:
+                        values[labels] += value
+        return merged
+
+    def render(self) -> str:
+        """
+        Метод для получения значений метрик в текстовом формате Prometheus.
+        """
+        values: dict = self.collect()
+        lines: list[str] = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for labels, value in sorted(values[name].items()):
+                pairs: list[str] = [
+                    f'{label}="{escape_label(label_value)}"'
+                    for label, label_value in zip(metric.labels, labels)
+                ]
+                if isinstance(metric, Histogram):
+                    cumulative: int = 0
+                    bounds: list[str] = [
+                        format_value(bound) for bound in metric.buckets
+                    ]
+                    for bound, count in zip(bounds + ["+Inf"], value[:-1]):
+                        cumulative += count
+                        bucket_labels: str = ",".join(pairs + [f'le="{bound}"'])
+                        lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+                    label_text: str = "{" + ",".join(pairs) + "}" if pairs else ""
+                    lines.append(f"{name}_sum{label_text} {format_value(value[-1])}")
+                    lines.append(f"{name}_count{label_text} {cumulative}")
+                else:
+                    label_text = "{" + ",".join(pairs) + "}" if pairs else ""
+                    lines.append(f"{name}{label_text} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush)
+
+REQUEST_DURATION = registry.histogram(
+    "megano_http_request_duration_seconds",
+    "Время обработки запроса по представлению и методу",
+    ("view", "method"),
+)
+RESPONSES = registry.counter(
+    "megano_http_responses_total",
+    "Количество ответов по представлению, методу и статусу",
+    ("view", "method", "status"),
+)
+REQUEST_QUERIES = registry.histogram(
+    "megano_http_request_db_queries",
+    "Количество запросов к БД при обработке запроса",
+    ("view", "method"),
+    QUERY_COUNT_BUCKETS,
+)
+CACHE_REQUESTS = registry.counter(
+    "megano_cache_requests_total",
+    "Количество чтений из кэша по результату (hit - значение найдено, miss - нет)",
+    ("cache", "result"),
+)
+ORDERS_CREATED = registry.counter(
+    "megano_orders_created_total", "Количество созданных заказов"
+)
+ORDERS_PAID = registry.counter(
+    "megano_orders_paid_total", "Количество оплаченных заказов"
+)
+STOCK_REJECTIONS = registry.counter(
+    "megano_stock_rejections_total",
+    "Количество отказов из-за нехватки товара на складе (create - создание заказа, confirm - подтверждение)",
+    ("stage",),
+)
+
+
+class QueryCounter:
+    """
+    Обертка выполнения запросов к БД (connection.execute_wrapper), считающая количество запросов.
+    """
+
+    def __init__(self) -> None:
+        self.count: int = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Middleware, измеряющий время обработки запроса и количество запросов к БД для каждого представления.
+    Должен быть первым в MIDDLEWARE, чтобы учитывалась работа остальных middleware.
+    Для потоковых ответов измеряется время до начала передачи ответа.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        counter = QueryCounter()
+        started: float = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        duration: float = time.perf_counter() - started
+
+        view: str = getattr(request, "_metrics_view", UNRESOLVED_VIEW)
+        method: str = request.method if request.method in HTTP_METHODS else "other"
+        REQUEST_DURATION.observe(duration, view, method)
+        REQUEST_QUERIES.observe(counter.count, view, method)
+        RESPONSES.inc(view, method, str(response.status_code))
+        registry.maybe_flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs) -> None:
+        # у представлений-классов берется название класса, у функций - название функции
+        view = getattr(view_func, "view_class", view_func)
+        request._metrics_view = getattr(view, "__name__", type(view).__name__)
+        return None
+
+
+def has_metrics_access(request: HttpRequest) -> bool:
+    """
+    Функция для проверки доступа к метрикам: сотрудникам или по токену METRICS_TOKEN
+    в заголовке "Authorization: Bearer <токен>" (так его передает Prometheus, параметр bearer_token).
+    Проверка по IP-адресу не используется: за прокси все запросы приходят с его адреса.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    if not settings.METRICS_TOKEN:
+        return False
+    scheme, _, token = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        token.strip().encode(), settings.METRICS_TOKEN.encode()
+    )
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Представление с метриками в текстовом формате Prometheus. Доступно сотрудникам и по токену METRICS_TOKEN.
+    """
+    if not has_metrics_access(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+class InstrumentedCache(BaseCache):
+    """
+    Бэкенд кэша, который считает попадания и промахи при чтении и передает все операции другому бэкенду,
+    указанному в OPTIONS["BACKEND"]. Название кэша в метках задается в OPTIONS["NAME"].
+    """
+
+    def __init__(self, location: str, params: dict) -> None:
+        options: dict = dict(params.get("OPTIONS", {}))
+        backend: str = options.pop("BACKEND")
+        self.name: str = options.pop("NAME", "default")
+        super().__init__({**params, "OPTIONS": options})
+        self.cache: BaseCache = import_string(backend)(
+            location, {**params, "OPTIONS": options}
+        )
+        self._missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = self.cache.get(key, self._missing, version=version)
+        if value is self._missing:
+            CACHE_REQUESTS.inc(self.name, "miss")
+            return default
+        CACHE_REQUESTS.inc(self.name, "hit")
+        return value
+
+    def get_many(self, keys, version=None) -> dict:
+        keys = list(keys)
+        values: dict = self.cache.get_many(keys, version=version)
+        if values:
+            CACHE_REQUESTS.inc(self.name, "hit", amount=len(values))
+        if len(keys) > len(values):
+            CACHE_REQUESTS.inc(self.name, "miss", amount=len(keys) - len(values))
+        return values
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        return self.cache.add(key, value, timeout, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        self.cache.set(key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None) -> list:
+        return self.cache.set_many(data, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        return self.cache.touch(key, timeout, version)
+
+    def delete(self, key, version=None) -> bool:
+        return self.cache.delete(key, version)
+
+    def delete_many(self, keys, version=None) -> None:
+        self.cache.delete_many(keys, version)
+
+    def has_key(self, key, version=None) -> bool:
+        return self.cache.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        return self.cache.incr(key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.cache.decr(key, delta, version)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def close(self, **kwargs) -> None:
+        self.cache.close(**kwargs)
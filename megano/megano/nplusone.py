@@ -0,0 +1,204 @@
+"""
+Модуль с детектором N+1 запросов для разработки и тестов.
+
+Каждый запрос к БД приводится к "отпечатку" (текст SQL без лишних пробелов и со свернутыми списками IN),
+а для запроса определяется место в коде проекта, откуда он выполнен, и поле сериализатора,
+при представлении которого он выполнен. Если за один запрос пользователя запрос одного вида выполняется
+из одного места NPLUSONE_THRESHOLD и более раз, то это считается проблемой N+1
+(например, запрос в SerializerMethodField для каждого товара списка).
+
+NPlusOneMiddleware включается настройкой NPLUSONE_ENABLED и пишет найденные проблемы в лог "megano.nplusone",
+а при NPLUSONE_RAISE=True выбрасывает NPlusOneError (в тестах ошибка попадет в тест, который сделал запрос).
+В тестах для проверки отдельного участка кода используется контекстный менеджер detect_n_plus_one.
+"""
+
+import logging
+import os
+import re
+import sys
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest
+from rest_framework.fields import Field
+from rest_framework.serializers import Serializer
+
+log = logging.getLogger(__name__)
+
+# запросы управления транзакциями, которые повторяются естественным образом и не считаются
+IGNORED_STATEMENTS: tuple[str, ...] = (
+    "SAVEPOINT",
+    "RELEASE SAVEPOINT",
+    "ROLLBACK TO SAVEPOINT",
+    "BEGIN",
+    "COMMIT",
+    "ROLLBACK",
+)
+
+# аргументы оберток выполнения запросов (connection.execute_wrapper), кадры которых пропускаются
+EXECUTE_WRAPPER_ARGS: tuple[str, ...] = ("execute", "sql", "params", "many", "context")
+
+WHITESPACE_RE = re.compile(r"\s+")
+IN_LIST_RE = re.compile(r"\bIN \((?:%s, )*%s\)", re.IGNORECASE)
+
+
+class NPlusOneError(Exception):
+    """
+    Исключение, которое выбрасывается при обнаружении N+1 запросов.
+    """
+
+    def __init__(self, problems: list["NPlusOneProblem"]) -> None:
+        self.problems: list[NPlusOneProblem] = problems
+        super().__init__("\n".join(str(problem) for problem in problems))
+
+
+@dataclass
+class NPlusOneProblem:
+    """
+    Повторяющийся запрос: отпечаток SQL, место в коде, поле сериализатора и количество повторов.
+    """
+
+    fingerprint: str
+    location: str
+    field: str | None
+    count: int
+
+    def __str__(self) -> str:
+        source: str = self.location
+        if self.field:
+            source = f"{source}, поле {self.field}"
+        return f"N+1: {self.count} одинаковых запросов ({source}): {self.fingerprint}"
+
+
+def get_fingerprint(sql: str) -> str:
+    """
+    Функция для получения отпечатка запроса: запросы, которые отличаются только параметрами
+    и количеством значений в IN (...), имеют одинаковый отпечаток.
+
+    :param sql: текст запроса с плейсхолдерами параметров
+    :return: отпечаток запроса
+    """
+    sql = WHITESPACE_RE.sub(" ", sql).strip()
+    return IN_LIST_RE.sub("IN (...)", sql)
+
+
+def is_project_file(filename: str) -> bool:
+    """
+    Функция для проверки, что файл относится к коду проекта (а не к Django, DRF или этому модулю).
+    """
+    return (
+        filename.startswith(str(settings.BASE_DIR) + os.sep)
+        and "site-packages" not in filename
+        and "dist-packages" not in filename
+        and filename != __file__
+    )
+
+
+def is_execute_wrapper(code) -> bool:
+    """
+    Функция для проверки, что код - обертка выполнения запросов (например, счетчик запросов для метрик).
+    """
+    args: tuple[str, ...] = code.co_varnames[: code.co_argcount]
+    return args[-len(EXECUTE_WRAPPER_ARGS) :] == EXECUTE_WRAPPER_ARGS
+
+
+def find_query_source(frame) -> tuple[str, str | None]:
+    """
+    Функция для определения, откуда выполнен запрос: ближайшая строка кода проекта в стеке вызовов
+    и ближайшее поле сериализатора, которое представлялось в этот момент.
+
+    :param frame: кадр стека, с которого начинается поиск
+    :return: место в коде в виде "<файл>:<строка> (<функция>)" и поле в виде "<Сериализатор>.<поле>" или None
+    """
+    location: str | None = None
+    field: str | None = None
+    while frame is not None and (location is None or field is None):
+        code = frame.f_code
+        if (
+            location is None
+            and is_project_file(code.co_filename)
+            and not is_execute_wrapper(code)
+        ):
+            filename: str = os.path.relpath(code.co_filename, settings.BASE_DIR)
+            location = f"{filename}:{frame.f_lineno} ({code.co_name})"
+        # Serializer.to_representation перебирает поля в локальной переменной field
+        if field is None and code.co_name == "to_representation":
+            serializer = frame.f_locals.get("self")
+            serializer_field = frame.f_locals.get("field")
+            if isinstance(serializer, Serializer) and isinstance(
+                serializer_field, Field
+            ):
+                field = f"{type(serializer).__name__}.{serializer_field.field_name}"
+        frame = frame.f_back
+    return location or "unknown", field
+
+
+class NPlusOneDetector:
+    """
+    Обертка выполнения запросов к БД (connection.execute_wrapper), которая считает запросы
+    по отпечатку, месту в коде и полю сериализатора.
+    """
+
+    def __init__(self, threshold: int | None = None) -> None:
+        self.threshold: int = (
+            threshold if threshold is not None else settings.NPLUSONE_THRESHOLD
+        )
+        self.queries: dict[tuple[str, str, str | None], int] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        fingerprint: str = get_fingerprint(sql)
+        if not fingerprint.upper().startswith(IGNORED_STATEMENTS):
+            key = (fingerprint, *find_query_source(sys._getframe(1)))
+            self.queries[key] = self.queries.get(key, 0) + 1
+        return execute(sql, params, many, context)
+
+    @property
+    def problems(self) -> list[NPlusOneProblem]:
+        """
+        Список запросов, которые повторились не меньше threshold раз (сначала самые частые).
+        """
+        problems: list[NPlusOneProblem] = [
+            NPlusOneProblem(fingerprint, location, field, count)
+            for (fingerprint, location, field), count in self.queries.items()
+            if count >= self.threshold
+        ]
+        return sorted(problems, key=lambda problem: -problem.count)
+
+
+@contextmanager
+def detect_n_plus_one(raise_error: bool = True, threshold: int | None = None):
+    """
+    Контекстный менеджер, который ищет N+1 запросы во всех базах данных внутри блока with.
+
+    :param raise_error: выбросить NPlusOneError при выходе из блока, если найдены проблемы
+    :param threshold: количество одинаковых запросов, начиная с которого это считается проблемой
+    :return: детектор, в свойстве problems которого находятся найденные проблемы
+    """
+    detector = NPlusOneDetector(threshold)
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(detector))
+        yield detector
+    if raise_error and detector.problems:
+        raise NPlusOneError(detector.problems)
+
+
+class NPlusOneMiddleware:
+    """
+    Middleware, которое ищет N+1 запросы при обработке каждого запроса, если включена настройка NPLUSONE_ENABLED.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        if not settings.NPLUSONE_ENABLED:
+            return self.get_response(request)
+
+        with detect_n_plus_one(raise_error=settings.NPLUSONE_RAISE) as detector:
+            response = self.get_response(request)
+        for problem in detector.problems:
+            log.warning("%s %s: %s", request.method, request.path, problem)
+        return response
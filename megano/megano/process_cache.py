@@ -0,0 +1,50 @@
+"""
+Модуль с кэшем редко изменяемых данных в памяти процесса сайта (дерево категорий, справочники заказов).
+
+Данные загружаются из БД при первом обращении (или при прогреве процесса, см. megano/warmup.py) и затем отдаются
+без запросов к БД. Кэш сбрасывается сигналами при изменении данных в этом процессе, а в остальных процессах
+данные перечитываются не позже, чем через max_age секунд.
+Закэшированные объекты общие для всех запросов процесса, поэтому их нельзя изменять.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class ProcessCache(Generic[T]):
+    """
+    Значение, которое загружается функцией loader и хранится в памяти процесса не дольше max_age секунд.
+    """
+
+    def __init__(self, loader: Callable[[], T], max_age: float | None = 60) -> None:
+        self.loader: Callable[[], T] = loader
+        self.max_age: float | None = max_age
+        self._lock = threading.Lock()
+        self._value: T | None = None
+        self._loaded_at: float | None = None
+
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and (
+            self.max_age is None or time.monotonic() - self._loaded_at <= self.max_age
+        )
+
+    def get(self) -> T:
+        """
+        Метод для получения значения: загружается при первом обращении и после устаревания или сброса.
+        """
+        if not self.is_fresh():
+            with self._lock:
+                if not self.is_fresh():
+                    self._value = self.loader()
+                    self._loaded_at = time.monotonic()
+        return self._value
+
+    def clear(self, *args, **kwargs) -> None:
+        """
+        Метод для сброса значения. Принимает любые аргументы, чтобы его можно было подключить к сигналам.
+        """
+        self._loaded_at = None
@@ -0,0 +1,37 @@
+"""
+Модуль с middleware сессий, которое сохраняет сессию только при изменении ее данных.
+
+Вместо SESSION_SAVE_EVERY_REQUEST (запись в таблицу сессий после каждого запроса пользователя)
+срок действия сессии продлевается не чаще одного раза в SESSION_REFRESH_INTERVAL секунд:
+время последнего продления хранится в самой сессии, и когда оно устаревает, сессия помечается измененной.
+Пустые сессии (анонимные посетители без данных в сессии) не сохраняются совсем.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+
+# ключ сессии со временем ее последнего сохранения
+SESSION_REFRESHED_KEY: str = "_session_refreshed"
+
+
+class RefreshingSessionMiddleware(SessionMiddleware):
+    """
+    Middleware сессий, которое продлевает неизмененную сессию не чаще, чем раз в SESSION_REFRESH_INTERVAL секунд.
+    """
+
+    def process_response(self, request, response):
+        session = getattr(request, "session", None)
+        if (
+            session is not None
+            and session.accessed
+            and not session.is_empty()
+            and not settings.SESSION_EXPIRE_AT_BROWSER_CLOSE
+        ):
+            now: int = int(time.time())
+            refreshed: int = session.get(SESSION_REFRESHED_KEY, 0)
+            # сессия, которая и так будет сохранена, тоже получает новое время, чтобы не сохранять ее повторно
+            if session.modified or now - refreshed >= settings.SESSION_REFRESH_INTERVAL:
+                session[SESSION_REFRESHED_KEY] = now
+        return super().process_response(request, response)
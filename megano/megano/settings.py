@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,16 +48,22 @@ INSTALLED_APPS = [
     "basket.apps.BasketConfig",
     "order.apps.OrderConfig",
     "payment.apps.PaymentConfig",
+    "profiling.apps.ProfilingConfig",
 ]
 
 MIDDLEWARE = [
+    "megano.metrics.MetricsMiddleware",
+    "megano.nplusone.NPlusOneMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "megano.sessions.RefreshingSessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "profiling.profiler.RequestProfilerMiddleware",
+    "profiling.memory.MemorySnapshotMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "megano.db_routers.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "megano.urls"
@@ -89,9 +96,26 @@ DATABASES = {
     }
 }
 
+# если в переменной окружения MEGANO_REPLICA_DB указан путь к копии базы данных, то чтение каталога
+# идет из нее (см. megano/db_routers.py). Копия обновляется командой "python manage.py sync_replica".
+if os.environ.get("MEGANO_REPLICA_DB"):
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["MEGANO_REPLICA_DB"],
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["megano.db_routers.ReplicaRouter"]
+
+# сколько секунд после изменяющего запроса пользователь читает только из основной базы
+REPLICA_STICKY_SECONDS = 15
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
+# пользователь запроса загружается одним запросом вместе с профилем и корзиной (см. site_auth.backends)
+AUTHENTICATION_BACKENDS = ["site_auth.backends.UserContextBackend"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -122,10 +146,96 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = BASE_DIR / "static"
+
+# при collectstatic файлы получают хэш содержимого в названии и сжатые копии .gz/.br
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "megano.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
+# отдавать ли собранную статику через Django (если перед приложением нет веб-сервера, например nginx),
+# а также время кэширования в секундах для файлов без хэша в названии
+SERVE_STATIC = False
+STATIC_UNHASHED_MAX_AGE = 3600
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "uploads"
 
+# способ отдачи загруженных файлов: "django" - сам Django, "nginx" - через X-Accel-Redirect,
+# "apache" - через X-Sendfile. Для nginx внутренний location с префиксом MEDIA_ACCEL_REDIRECT_PREFIX
+# должен указывать на MEDIA_ROOT. MEDIA_MAX_AGE - время кэширования файлов браузером в секундах.
+MEDIA_SERVE_MODE = "django"
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+MEDIA_MAX_AGE = 30 * 24 * 60 * 60
+
+# ширины уменьшенных копий загруженных изображений и количество фоновых потоков для их создания
+IMAGE_VARIANT_WIDTHS = (200, 400, 800)
+IMAGE_VARIANT_WORKERS = 2
+
+# через сколько секунд индекс подсказок поиска перестраивается из БД в фоне, чтобы получить изменения,
+# сделанные другими процессами (None - индекс обновляется только по сигналам своего процесса)
+SUGGEST_INDEX_MAX_AGE = 600
+
+# максимальный размер загружаемого аватара в байтах, размер сохраняемого аватара в пикселях
+# и количество потоков для обработки аватаров
+AVATAR_MAX_UPLOAD_SIZE = 2 * 1024 * 1024
+AVATAR_SIZE = 400
+AVATAR_WORKERS = 2
+
+# метрики в формате Prometheus (/metrics/): папка для значений процессов, если сайт запущен в нескольких
+# процессах (None - метрики только текущего процесса), интервал записи значений в секундах
+# и токен, с которым Prometheus получает метрики (без токена они доступны только сотрудникам)
+METRICS_DIR = os.environ.get("MEGANO_METRICS_DIR")
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.environ.get("MEGANO_METRICS_TOKEN")
+
+# поиск N+1 запросов (см. megano.nplusone): включен при разработке и в тестах, проблемы пишутся в лог,
+# а при NPLUSONE_RAISE (переменная окружения MEGANO_NPLUSONE_RAISE=1) запрос завершается ошибкой NPlusOneError.
+# Проблемой считаются NPLUSONE_THRESHOLD и более одинаковых запросов из одного места за один запрос
+NPLUSONE_ENABLED = DEBUG
+NPLUSONE_RAISE = os.environ.get("MEGANO_NPLUSONE_RAISE") == "1"
+NPLUSONE_THRESHOLD = 3
+
+# профилирование запросов сотрудников с параметром ?_profile=1 или заголовком X-Profile: 1 (см. profiling.profiler)
+# и папка для файлов профилей (не должна быть доступна из интернета, в отличие от MEDIA_ROOT)
+REQUEST_PROFILER_ENABLED = True
+PROFILES_DIR = os.environ.get("MEGANO_PROFILES_DIR", os.path.join(BASE_DIR, "profiles"))
+
+# диагностика роста памяти (см. profiling.memory): при MEGANO_MEMORY_TRACING=1 процессы сайта включают tracemalloc
+# с глубиной трассировки MEMORY_TRACE_FRAMES и сохраняют снимок памяти раз в MEMORY_SNAPSHOT_INTERVAL секунд.
+# tracemalloc замедляет работу и увеличивает расход памяти, поэтому включается только на время диагностики
+MEMORY_TRACING = os.environ.get("MEGANO_MEMORY_TRACING") == "1"
+MEMORY_TRACE_FRAMES = 30
+MEMORY_SNAPSHOT_INTERVAL = 15 * 60
+
+# сообщения детектора N+1 выводятся в консоль только при DEBUG (в тестах Django отключает DEBUG)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "require_debug_true": {"()": "django.utils.log.RequireDebugTrue"},
+    },
+    "handlers": {
+        "nplusone_console": {
+            "level": "WARNING",
+            "filters": ["require_debug_true"],
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        "megano.nplusone": {
+            "handlers": ["nplusone_console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -134,8 +244,56 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    # количество доверенных прокси перед приложением (например, 1 для nginx). IP-адрес клиента для ограничения
+    # частоты берется из X-Forwarded-For только с их учетом, а при 0 - из REMOTE_ADDR, и подделка заголовка
+    # не помогает обойти ограничения
+    "NUM_PROXIES": int(os.environ.get("MEGANO_NUM_PROXIES", 0)),
+    # частота запросов для ведер токенов из megano.throttling: "<количество>/<sec|min|hour|day>",
+    # ведро вмещает указанное количество запросов и полностью пополняется за указанный период
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "20/min",
+        "login_username": "5/min",
+        "sign_up_ip": "5/hour",
+        "review_user": "10/hour",
+        "payment_user": "10/min",
+        "feed_user": "30/hour",
+    },
+}
+
+# кэш для ограничения частоты запросов. В продакшене с несколькими процессами он должен быть общим,
+# иначе у каждого процесса будут свои лимиты и реальный лимит будет во столько раз больше, сколько процессов
+# (команда "python manage.py check --deploy" предупреждает об этом). Общий кэш Redis включается переменной
+# окружения MEGANO_REDIS_URL (например, redis://127.0.0.1:6379/0, нужен пакет redis)
+CACHES = {
+    "default": {
+        # обертка считает попадания и промахи кэша для метрик и передает операции бэкенду из OPTIONS
+        "BACKEND": "megano.metrics.InstrumentedCache",
+        "OPTIONS": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "NAME": "default",
+        },
+    },
 }
+if os.environ.get("MEGANO_REDIS_URL"):
+    CACHES["default"]["LOCATION"] = os.environ["MEGANO_REDIS_URL"]
+    CACHES["default"]["OPTIONS"]["BACKEND"] = (
+        "django.core.cache.backends.redis.RedisCache"
+    )
+THROTTLE_CACHE = "default"
+
+# токены партнеров для выгрузки каталога /api/feed/<формат>/ (через запятую), сотрудникам токен не нужен
+FEED_TOKENS = tuple(
+    token for token in os.environ.get("MEGANO_FEED_TOKENS", "").split(",") if token
+)
 
 LOGIN_URL = "/sign-in/"
 
-SESSION_SAVE_EVERY_REQUEST = True
+# сессия сохраняется только при изменении данных, а срок ее действия продлевается не чаще, чем раз в
+# SESSION_REFRESH_INTERVAL секунд (см. megano.sessions). Сессии читаются из кэша и только при его промахе из БД.
+# Кэш должен быть общим для всех процессов (как и для ограничения частоты запросов), иначе после выхода
+# пользователя другой процесс может еще принимать его сессию из своего кэша. Без общего кэша можно использовать
+# "django.contrib.sessions.backends.db" или "django.contrib.sessions.backends.signed_cookies" (данные сессии
+# хранятся в подписанной cookie и БД не нужна, но сессию нельзя завершить на сервере до истечения ее срока)
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = 60 * 60
@@ -0,0 +1,114 @@
+"""
+Модуль с хранилищем статических файлов для продакшена.
+
+При выполнении collectstatic файлы получают в названии хэш содержимого (ManifestStaticFilesStorage),
+а для текстовых файлов дополнительно создаются сжатые копии .gz и .br (если установлен пакет brotli),
+чтобы веб-сервер мог отдавать их без сжатия на лету.
+"""
+
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# расширения файлов, которые имеет смысл сжимать (картинки и шрифты woff уже сжаты)
+COMPRESSIBLE_EXTENSIONS: tuple[str, ...] = getattr(
+    settings,
+    "STATIC_COMPRESSIBLE_EXTENSIONS",
+    (
+        ".css",
+        ".js",
+        ".svg",
+        ".json",
+        ".txt",
+        ".html",
+        ".map",
+        ".ttf",
+        ".eot",
+        ".otf",
+        ".ico",
+    ),
+)
+
+# файлы меньше этого размера не сжимаются - выигрыш не окупает лишний файл
+MIN_COMPRESS_SIZE: int = 512
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище статических файлов с хэшем содержимого в названиях и предварительно сжатыми копиями.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        """
+        Метод, вызываемый collectstatic после копирования файлов. После создания файлов с хэшем в названии
+        для каждого из них создаются сжатые копии.
+        """
+        hashed_files: list[str] = []
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_files.append(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+
+        for hashed_name in hashed_files:
+            for compressed_name in self.compress(hashed_name):
+                yield hashed_name, compressed_name, True
+
+    def compress(self, name: str) -> list[str]:
+        """
+        Метод для создания сжатых копий файла (gzip и brotli).
+
+        :param name: путь к файлу в хранилище
+        :return: список путей к созданным сжатым копиям
+        """
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return []
+
+        with self.open(name) as file:
+            content: bytes = file.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return []
+
+        variants: dict[str, bytes] = {
+            f"{name}.gz": gzip.compress(content, compresslevel=9, mtime=0)
+        }
+        if brotli is not None:
+            variants[f"{name}.br"] = brotli.compress(content)
+
+        created: list[str] = []
+        for compressed_name, compressed in variants.items():
+            # сжатая копия сохраняется, только если она действительно меньше оригинала
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            created.append(compressed_name)
+        return created
+
+
+def is_hashed_name(name: str) -> bool:
+    """
+    Функция для проверки, содержит ли название файла хэш содержимого (вида name.0123456789ab.css).
+
+    :param name: название или путь к файлу
+    :return: True, если в названии есть хэш из 12 шестнадцатеричных символов
+    """
+    parts: list[str] = os.path.basename(name).split(".")
+    return (
+        len(parts) >= 3
+        and len(parts[-2]) == 12
+        and all(char in "0123456789abcdef" for char in parts[-2])
+    )
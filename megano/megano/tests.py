@@ -0,0 +1,452 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from catalogs.categories import category_tree
+from catalogs.models import Product, Tag
+from catalogs.suggest import suggest_index
+from .db_routers import (
+    REPLICA_DATABASE,
+    REPLICA_STICKY_COOKIE,
+    ReplicaRouter,
+    _use_replica,
+)
+from .metrics import (
+    CACHE_REQUESTS,
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    RESPONSES,
+    STOCK_REJECTIONS,
+    registry,
+)
+from .nplusone import NPlusOneError, detect_n_plus_one, get_fingerprint
+from .storage import MIN_COMPRESS_SIZE, brotli, is_hashed_name
+from .warmup import WARMUP_STEPS, warmup
+
+
+class ReplicaRoutingTestCase(TransactionTestCase):
+    """
+    Класс с методами для тестирования маршрутизации чтения каталога в реплику БД.
+    Реплика - отдельная база SQLite во временном файле, в которую перед каждым тестом копируется основная база
+    (так же, как это делает команда sync_replica).
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Метод для подключения реплики. Она подключается после настройки класса, поэтому тестовый раннер
+        не создает для нее тестовую базу, а запросы к ней разрешены.
+        """
+        super().setUpClass()
+        fd, cls.replica_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        databases: dict = connections.configure_settings(
+            {
+                "default": connections.settings["default"],
+                REPLICA_DATABASE: {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": cls.replica_path,
+                },
+            }
+        )
+        connections.settings[REPLICA_DATABASE] = databases[REPLICA_DATABASE]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        Метод для отключения реплики и удаления ее файла.
+        """
+        connections[REPLICA_DATABASE].close()
+        del connections[REPLICA_DATABASE]
+        del connections.settings[REPLICA_DATABASE]
+        os.remove(cls.replica_path)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом: тэг "Старый" есть в обеих базах,
+        а тэг "Новый" создан после копирования и есть только в основной базе.
+        """
+        Tag.objects.create(name="Старый")
+        for alias in ("default", REPLICA_DATABASE):
+            connections[alias].ensure_connection()
+        connections["default"].connection.backup(
+            connections[REPLICA_DATABASE].connection
+        )
+        Tag.objects.create(name="Новый")
+
+    def get_tag_names(self) -> list[str]:
+        response = self.client.get("/api/tags/")
+        self.assertEqual(response.status_code, 200)
+        return [tag["name"] for tag in response.json()]
+
+    def test_read_from_replica(self) -> None:
+        """
+        Тест для проверки, что представление с use_replica читает каталог из реплики,
+        а после запроса признак чтения из реплики сбрасывается.
+        """
+        self.assertEqual(self.get_tag_names(), ["Старый"])
+        self.assertFalse(_use_replica.get())
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_write_to_default(self) -> None:
+        """
+        Тест для проверки, что запись идет в основную базу даже во время чтения из реплики.
+        """
+        token = _use_replica.set(True)
+        try:
+            self.assertEqual(ReplicaRouter().db_for_read(Tag), REPLICA_DATABASE)
+            tag = Tag.objects.create(name="Третий")
+        finally:
+            _use_replica.reset(token)
+        self.assertEqual(tag._state.db, "default")
+        self.assertTrue(Tag.objects.using("default").filter(name="Третий").exists())
+        self.assertFalse(
+            Tag.objects.using(REPLICA_DATABASE).filter(name="Третий").exists()
+        )
+
+    def test_sticky_cookie(self) -> None:
+        """
+        Тест для проверки, что после изменяющего запроса пользователь читает каталог из основной базы.
+        """
+        response = self.client.post("/api/sign-out/")
+        self.assertLess(response.status_code, 400)
+        self.assertIn(REPLICA_STICKY_COOKIE, response.cookies)
+        self.assertEqual(self.get_tag_names(), ["Старый", "Новый"])
+
+        del self.client.cookies[REPLICA_STICKY_COOKIE]
+        self.assertEqual(self.get_tag_names(), ["Старый"])
+
+    def test_no_replica(self) -> None:
+        """
+        Тест для проверки, что без настроенной реплики (или с репликой в том же файле, что и основная база)
+        каталог читается из основной базы.
+        """
+        with mock.patch.dict(connections.settings):
+            del connections.settings[REPLICA_DATABASE]
+            self.assertEqual(self.get_tag_names(), ["Старый", "Новый"])
+
+        with mock.patch.dict(
+            connections.settings[REPLICA_DATABASE],
+            {"NAME": connections.settings["default"]["NAME"]},
+        ):
+            self.assertEqual(self.get_tag_names(), ["Старый", "Новый"])
+
+
+class MetricsTestCase(TestCase):
+    """
+    Класс с методами для тестирования метрик в формате Prometheus.
+    """
+
+    def get_value(self, metric, *labels: str):
+        """
+        Метод для получения текущего значения метрики (метрики общие для всех тестов процесса,
+        поэтому в тестах сравниваются значения до и после запроса).
+        """
+        return metric.snapshot().get(labels, 0)
+
+    def test_request_metrics(self) -> None:
+        """
+        Тест для проверки времени ответа, количества запросов к БД и статусов по представлению и методу.
+        """
+        queries = self.get_value(REQUEST_QUERIES, "BannersView", "GET")
+        responses = self.get_value(RESPONSES, "BannersView", "GET", "200")
+        not_found = self.get_value(RESPONSES, "unresolved", "GET", "404")
+        self.client.get("/api/banners/")
+        self.client.get("/no-such-page/")
+
+        self.assertEqual(
+            self.get_value(RESPONSES, "BannersView", "GET", "200"), responses + 1
+        )
+        self.assertEqual(
+            self.get_value(RESPONSES, "unresolved", "GET", "404"), not_found + 1
+        )
+        histogram = self.get_value(REQUEST_QUERIES, "BannersView", "GET")
+        self.assertEqual(sum(histogram[:-1]) - sum((queries or [0])[:-1]), 1)
+
+        with override_settings(METRICS_TOKEN="secret"):
+            response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        text: str = response.content.decode()
+        self.assertIn("# TYPE megano_http_request_duration_seconds histogram", text)
+        self.assertIn(
+            'megano_http_request_duration_seconds_bucket{view="BannersView",method="GET",le="+Inf"}',
+            text,
+        )
+        self.assertIn("megano_orders_created_total", text)
+
+    def test_metrics_access(self) -> None:
+        """
+        Тест для проверки, что метрики доступны только сотрудникам и по токену, даже с локального адреса.
+        """
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+        with override_settings(METRICS_TOKEN="secret"):
+            for authorization in ("", "Bearer wrong", "Basic secret"):
+                response = self.client.get(
+                    "/metrics/", HTTP_AUTHORIZATION=authorization
+                )
+                self.assertEqual(response.status_code, 403)
+            response = self.client.get("/metrics/", HTTP_AUTHORIZATION="bearer secret")
+            self.assertEqual(response.status_code, 200)
+
+        self.client.force_login(
+            User.objects.create_user(
+                username="admin", password="Test24@", is_staff=True
+            )
+        )
+        self.assertEqual(self.client.get("/metrics/").status_code, 200)
+
+    def test_cache_and_stock_metrics(self) -> None:
+        """
+        Тест для проверки счетчиков кэша и отказов из-за нехватки товара.
+        """
+        hits = self.get_value(CACHE_REQUESTS, "default", "hit")
+        misses = self.get_value(CACHE_REQUESTS, "default", "miss")
+        cache.set("metrics-test", 1)
+        cache.get("metrics-test")
+        cache.get_many(["metrics-test", "metrics-missing"])
+        self.assertEqual(self.get_value(CACHE_REQUESTS, "default", "hit"), hits + 2)
+        self.assertEqual(self.get_value(CACHE_REQUESTS, "default", "miss"), misses + 1)
+
+        product = Product.objects.create(title="Платье", price=Decimal(100), count=1)
+        rejections = self.get_value(STOCK_REJECTIONS, "create")
+        response = self.client.post(
+            "/api/orders/",
+            json.dumps([{"id": product.pk, "count": 2}]),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_value(STOCK_REJECTIONS, "create"), rejections + 1)
+
+    def test_metrics_of_several_processes(self) -> None:
+        """
+        Тест для проверки сложения значений, записанных разными процессами в общую папку.
+        """
+        directory: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with override_settings(METRICS_DIR=directory):
+            self.client.get("/api/banners/")
+            own = registry.snapshot()
+            other_histogram: list = [0] * (len(REQUEST_DURATION.buckets) + 2)
+            other_histogram[0], other_histogram[-1] = 3, 0.003
+            with open(os.path.join(directory, "999999.json"), "w") as file:
+                json.dump(
+                    {
+                        RESPONSES.name: [[["BannersView", "GET", "200"], 5]],
+                        REQUEST_DURATION.name: [
+                            [["BannersView", "GET"], other_histogram]
+                        ],
+                    },
+                    file,
+                )
+            merged = registry.collect()
+
+        key = ("BannersView", "GET", "200")
+        self.assertEqual(merged[RESPONSES.name][key], own[RESPONSES.name][key] + 5)
+        own_histogram = own[REQUEST_DURATION.name][("BannersView", "GET")]
+        merged_histogram = merged[REQUEST_DURATION.name][("BannersView", "GET")]
+        self.assertEqual(sum(merged_histogram[:-1]), sum(own_histogram[:-1]) + 3)
+        self.assertTrue(os.path.exists(os.path.join(directory, f"{os.getpid()}.json")))
+
+
+class NPlusOneTestCase(TestCase):
+    """
+    Класс с методами для тестирования детектора N+1 запросов.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания трех товаров, которые кладутся в корзину анонимного пользователя.
+        """
+        cls.products = [
+            Product.objects.create(title=f"Товар {number}", price=Decimal(10))
+            for number in range(3)
+        ]
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом.
+        """
+        self.client.cookies["basket"] = json.dumps(
+            {str(product.pk): 1 for product in self.products}
+        )
+
+    def test_fingerprint(self) -> None:
+        """
+        Тест для проверки, что запросы, отличающиеся количеством значений в IN, имеют одинаковый отпечаток.
+        """
+        self.assertEqual(
+            get_fingerprint('SELECT "id"\n  FROM "t" WHERE "id" IN (%s, %s)'),
+            get_fingerprint('SELECT "id" FROM "t" WHERE "id" IN (%s)'),
+        )
+
+    def test_serializer_field(self) -> None:
+        """
+        Тест для проверки, что детектор сообщает о запросе цены для каждого товара корзины
+        с указанием поля сериализатора и строки кода.
+        """
+        with detect_n_plus_one(raise_error=False) as detector:
+            response = self.client.get("/api/basket/")
+        self.assertEqual(len(response.data), 3)
+
+        problems = {problem.field: problem for problem in detector.problems}
+        price = problems["BasketSerializer.price"]
+        self.assertEqual(price.count, 3)
+        self.assertRegex(
+            price.location, r"^catalogs/serializers\.py:\d+ \(get_price\)$"
+        )
+        self.assertIn('FROM "catalogs_sale"', price.fingerprint)
+
+        # запросы ниже порога не считаются проблемой
+        with detect_n_plus_one(threshold=4):
+            self.client.get("/api/basket/")
+
+    @override_settings(NPLUSONE_ENABLED=True, NPLUSONE_RAISE=True)
+    def test_middleware_raise(self) -> None:
+        """
+        Тест для проверки, что при NPLUSONE_RAISE запрос с N+1 завершается ошибкой, а запрос без них - нет.
+        """
+        with self.assertRaises(NPlusOneError) as context:
+            self.client.get("/api/basket/")
+        self.assertIn("BasketSerializer.price", str(context.exception))
+        # место запроса - код сериализатора, а не обертки запросов других middleware
+        self.assertIn("catalogs/serializers.py:", str(context.exception))
+
+        self.client.cookies["basket"] = json.dumps({str(self.products[0].pk): 1})
+        self.assertEqual(self.client.get("/api/basket/").status_code, 200)
+
+
+class WarmupTestCase(TestCase):
+    """
+    Класс с методами для тестирования прогрева процесса и проверки готовности.
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом: состояние прогрева сбрасывается.
+        """
+        warmup.reset()
+        self.addCleanup(warmup.reset)
+
+    def test_readiness(self) -> None:
+        """
+        Тест для проверки, что процесс сообщает о готовности только после прогрева.
+        """
+        # прогрев в фоновом потоке не запускается, чтобы он не работал с БД одновременно с тестом
+        with mock.patch.object(warmup, "start") as start:
+            response = self.client.get("/healthz/ready")
+        self.assertEqual(response.status_code, 503)
+        start.assert_called_once()
+
+        warmup.run()
+        response = self.client.get("/healthz/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "ready")
+        self.assertEqual(response.json()["errors"], {})
+        self.assertEqual(
+            set(response.json()["durations"]), {name for name, _ in WARMUP_STEPS}
+        )
+        self.assertTrue(suggest_index.is_built)
+        # справочники и дерево категорий загружены в память процесса
+        self.assertTrue(category_tree.is_fresh())
+        with self.assertNumQueries(0):
+            self.client.get("/api/categories/")
+
+    def test_step_error(self) -> None:
+        """
+        Тест для проверки, что ошибка шага прогрева записывается, но не задерживает готовность.
+        """
+
+        def broken_step() -> None:
+            raise RuntimeError("нет подключения")
+
+        with mock.patch(
+            "megano.warmup.WARMUP_STEPS", (("broken", broken_step),)
+        ), self.assertLogs("megano.warmup", "ERROR"):
+            warmup.run()
+        self.assertTrue(warmup.is_ready)
+        self.assertEqual(warmup.errors, {"broken": "RuntimeError: нет подключения"})
+
+
+class CompressedStaticFilesTestCase(TestCase):
+    """
+    Класс с методами для тестирования сборки статических файлов с хэшем в названии и сжатыми копиями.
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: статические файлы собираются из временной папки в другую временную папку.
+        """
+        self.source_dir: str = tempfile.mkdtemp()
+        self.static_root: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source_dir, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+        settings_override = override_settings(
+            STATIC_ROOT=self.static_root,
+            STATICFILES_DIRS=[self.source_dir],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.script: bytes = b"console.log('megano');\n" * 100
+        files: dict[str, bytes] = {
+            "js/app.js": self.script,
+            "js/small.js": b"let a = 1;",
+            "img/logo.png": bytes(range(256)) * 10,
+        }
+        for name, content in files.items():
+            path: str = os.path.join(self.source_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(content)
+
+    def collect(self) -> dict[str, str]:
+        """
+        Метод для запуска collectstatic.
+
+        :return: словарь {исходное название: название с хэшем} из манифеста
+        """
+        call_command("collectstatic", interactive=False, verbosity=0, stdout=StringIO())
+        with open(os.path.join(self.static_root, "staticfiles.json")) as file:
+            return json.load(file)["paths"]
+
+    def test_compressed_copies(self) -> None:
+        """
+        Тест для проверки, что для текстовых файлов с хэшем в названии создаются сжатые копии .gz,
+        а маленькие файлы и картинки не сжимаются.
+        """
+        paths: dict[str, str] = self.collect()
+
+        self.assertTrue(is_hashed_name(paths["js/app.js"]))
+        gz_path: str = os.path.join(self.static_root, paths["js/app.js"] + ".gz")
+        with open(gz_path, "rb") as file:
+            self.assertEqual(gzip.decompress(file.read()), self.script)
+        self.assertLess(len(b"let a = 1;"), MIN_COMPRESS_SIZE)
+        for name in ("js/small.js", "img/logo.png"):
+            self.assertFalse(
+                os.path.exists(os.path.join(self.static_root, paths[name] + ".gz"))
+            )
+
+    @skipIf(brotli is None, "пакет brotli не установлен")
+    def test_brotli_copies(self) -> None:
+        """
+        Тест для проверки, что при установленном пакете brotli создаются и копии .br.
+        """
+        paths: dict[str, str] = self.collect()
+
+        br_path: str = os.path.join(self.static_root, paths["js/app.js"] + ".br")
+        with open(br_path, "rb") as file:
+            self.assertEqual(brotli.decompress(file.read()), self.script)
@@ -0,0 +1,180 @@
+"""
+Модуль с ограничением частоты запросов (throttling) к входу, регистрации, отзывам, оплате и выгрузке каталога.
+
+Используется "ведро токенов" (token bucket): у каждого ключа (IP-адрес, пользователь или логин)
+есть ведро на num_requests токенов, которое равномерно пополняется за период из настройки,
+а каждый запрос забирает один токен. В кэше хранится только пара (токены, время последнего запроса),
+поэтому проверка запроса - одно чтение и одна запись в кэш независимо от количества запросов.
+Частота указывается для каждой области (throttle_scope представления) в REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
+с ключами вида "<область>_ip", "<область>_user", "<область>_username", например "login_ip": "20/min".
+Ограничиваются только изменяющие запросы, а запросы на чтение - только у представлений
+с атрибутом throttle_safe_methods = True (например, тяжелая выгрузка каталога).
+Проверка выполняется DRF до вызова метода представления, поэтому отклоненный запрос получает ответ 429
+без проверки пароля и запросов к БД.
+Ведра хранятся в кэше THROTTLE_CACHE, который должен быть общим для всех процессов сайта:
+check_throttle_cache предупреждает в "manage.py check --deploy", если кэш хранится в памяти процесса.
+"""
+
+import hashlib
+import json
+import math
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+SAFE_METHODS: tuple[str, ...] = ("GET", "HEAD", "OPTIONS")
+
+# бэкенды кэша, данные которых видит только один процесс
+PROCESS_LOCAL_CACHES: tuple[type, ...] = (LocMemCache, DummyCache)
+
+
+def check_throttle_cache(app_configs=None, **kwargs) -> list[checks.CheckMessage]:
+    """
+    Проверка для "manage.py check --deploy": при кэше в памяти процесса у каждого процесса сайта свои ведра,
+    и с N процессами реальный лимит входа и регистрации в N раз больше настроенного.
+    """
+    backend = caches[settings.THROTTLE_CACHE]
+    # InstrumentedCache только считает обращения, а данные хранит бэкенд из его OPTIONS
+    backend = getattr(backend, "cache", backend)
+    if not isinstance(backend, PROCESS_LOCAL_CACHES):
+        return []
+    return [
+        checks.Warning(
+            f"Кэш '{settings.THROTTLE_CACHE}' для ограничения частоты запросов хранится в памяти процесса",
+            hint="Укажите общий кэш (Redis или Memcached) в CACHES, например через MEGANO_REDIS_URL",
+            id="megano.W001",
+        )
+    ]
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Базовый класс ограничения частоты запросов по алгоритму ведра токенов.
+    Область берется из атрибута throttle_scope представления, в наследниках задается только ключ ведра.
+    Чтение и запись ведра не атомарны, поэтому при одновременных запросах нескольких процессов
+    может пройти на несколько запросов больше - для защиты от перебора это допустимо.
+    """
+
+    # суффикс области в настройках частоты и в ключе кэша
+    kind: str = ""
+    cache_format: str = "throttle_%(scope)s_%(ident)s"
+
+    def __init__(self) -> None:
+        # частота определяется по области представления в allow_request
+        self.cache = caches[settings.THROTTLE_CACHE]
+        self.wait_seconds: float = 0
+
+    def allow_request(self, request: Request, view) -> bool:
+        if request.method in SAFE_METHODS and not getattr(
+            view, "throttle_safe_methods", False
+        ):
+            return True
+        self.scope = f"{view.throttle_scope}_{self.kind}"
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        # токенов в секунду
+        refill: float = self.num_requests / self.duration
+        now: float = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(self.num_requests, tokens + (now - updated) * refill)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / refill
+            return False
+
+        tokens -= 1
+        # ведро, которое успело бы наполниться, не хранится: его отсутствие в кэше означает полное ведро
+        self.cache.set(
+            self.key,
+            (tokens, now),
+            math.ceil((self.num_requests - tokens) / refill),
+        )
+        return True
+
+    def get_rate(self) -> str:
+        # настройки читаются при каждом запросе, а не при импорте, чтобы их можно было менять в тестах
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f"Не указана частота запросов для области '{self.scope}'"
+            )
+
+    def wait(self) -> float:
+        return self.wait_seconds
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Класс ограничения частоты запросов с одного IP-адреса.
+    """
+
+    kind = "ip"
+
+    def get_cache_key(self, request: Request, view) -> str:
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Класс ограничения частоты запросов пользователя (для анонимного пользователя - его IP-адреса).
+    """
+
+    kind = "user"
+
+    def get_cache_key(self, request: Request, view) -> str:
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class UsernameTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Класс ограничения частоты попыток входа под одним логином (с любых IP-адресов).
+    """
+
+    kind = "username"
+
+    def get_cache_key(self, request: Request, view) -> str | None:
+        username: str | None = get_username(request)
+        if not username:
+            return None
+        # логин хэшируется, т.к. может содержать символы, недопустимые в ключе кэша
+        ident: str = hashlib.sha256(username.strip().lower().encode()).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+def get_username(request: Request) -> str | None:
+    """
+    Функция для получения логина из данных запроса. Фронтенд отправляет форму, единственный ключ которой -
+    JSON с логином и паролем, поэтому поддерживаются оба варианта.
+
+    :param request: запрос
+    :return: логин или None, если его нет в запросе
+    """
+    data = request.data
+    if not hasattr(data, "get"):
+        return None
+    username = data.get("username")
+    if username is None and len(data) == 1:
+        try:
+            username = json.loads(next(iter(data.keys()))).get("username")
+        except (ValueError, AttributeError):
+            return None
+    return username if isinstance(username, str) else None
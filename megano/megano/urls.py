@@ -16,12 +16,17 @@ Including another URLconf
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from frontend.views import serve_media, serve_static
+from megano.metrics import metrics_view
+from megano.warmup import readiness_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics/", metrics_view),
+    path("healthz/ready", readiness_view),
     path("", include("frontend.urls")),
     path("", include("site_auth.urls")),
     path("", include("profile_user.urls")),
@@ -31,4 +36,9 @@ urlpatterns = [
     path("", include("payment.urls")),
 ]
 
-urlpatterns.extend(static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT))
+urlpatterns.append(
+    re_path(r"^%s(?P<path>.*)$" % settings.MEDIA_URL.lstrip("/"), serve_media)
+)
+
+if settings.SERVE_STATIC:
+    urlpatterns.append(re_path(r"^static/(?P<path>.*)$", serve_static))
@@ -0,0 +1,209 @@
+"""
+Модуль с прогревом процесса сайта после запуска и проверкой готовности (/healthz/ready).
+
+Первые запросы к только что запущенному процессу медленнее остальных: компилируются регулярные выражения адресов,
+загружаются шаблоны, строятся поля сериализаторов, индекс подсказок, кэши метаданных моделей,
+справочники и дерево категорий в памяти процесса (megano/process_cache.py).
+Поэтому процесс сразу после загрузки WSGI-приложения (megano/wsgi.py) в фоновом потоке выполняет шаги WARMUP_STEPS,
+а /healthz/ready отвечает 200 только после их завершения (до этого - 503), и балансировщик не направляет
+запросы в непрогретый процесс. Ошибка отдельного шага записывается в лог и в ответ /healthz/ready,
+но не задерживает готовность процесса.
+
+Если процесс-родитель (например, gunicorn с --preload) создает процессы-воркеры через fork, то в каждом воркере
+прогрев запускается заново: потоки при fork не копируются, а кэши воркера должны быть заполнены в нем самом.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, JsonResponse
+from django.template.loader import get_template
+from django.urls import URLResolver, get_resolver
+from django.utils.module_loading import autodiscover_modules
+from rest_framework.serializers import ModelSerializer, Serializer
+
+from catalogs.categories import category_tree
+from catalogs.suggest import suggest_index
+from order.reference import REFERENCE_CACHES
+
+log = logging.getLogger(__name__)
+
+# состояния прогрева
+PENDING: str = "pending"
+RUNNING: str = "running"
+READY: str = "ready"
+
+
+def warm_urls() -> None:
+    """
+    Шаг прогрева: компиляция регулярных выражений всех адресов и построение словаря для reverse().
+    """
+
+    def compile_patterns(patterns) -> None:
+        for pattern in patterns:
+            # регулярное выражение компилируется при первом обращении к свойству regex
+            pattern.pattern.regex
+            if isinstance(pattern, URLResolver):
+                compile_patterns(pattern.url_patterns)
+
+    resolver = get_resolver()
+    compile_patterns(resolver.url_patterns)
+    resolver.reverse_dict
+
+
+def get_project_serializers() -> list[type[Serializer]]:
+    """
+    Функция для получения всех сериализаторов из модулей serializers приложений проекта, у которых есть поля.
+    """
+    autodiscover_modules("serializers")
+    project_apps: set[str] = {
+        app.name
+        for app in apps.get_app_configs()
+        if app.path.startswith(str(settings.BASE_DIR) + os.sep)
+    }
+    serializers: list[type[Serializer]] = []
+    classes: list[type] = [Serializer]
+    while classes:
+        cls = classes.pop()
+        classes.extend(cls.__subclasses__())
+        # ModelSerializer без Meta переопределяет to_representation и полей не строит
+        if cls.__module__.split(".")[0] in project_apps and not (
+            issubclass(cls, ModelSerializer) and not hasattr(cls, "Meta")
+        ):
+            serializers.append(cls)
+    return serializers
+
+
+def warm_serializers() -> None:
+    """
+    Шаг прогрева: построение полей всех сериализаторов проекта (вместе с кэшами метаданных моделей).
+    """
+    for serializer_class in get_project_serializers():
+        serializer_class().fields
+
+
+def warm_templates() -> None:
+    """
+    Шаг прогрева: загрузка и компиляция шаблонов страниц фронтэнда.
+    """
+    templates_dir: str = os.path.join(
+        apps.get_app_config("frontend").path, "templates", "frontend"
+    )
+    for name in sorted(os.listdir(templates_dir)):
+        if name.endswith(".html"):
+            get_template(f"frontend/{name}")
+
+
+def warm_reference_data() -> None:
+    """
+    Шаг прогрева: подключение к БД и загрузка в память процесса справочников заказов и дерева категорий,
+    которые затем отдаются представлениями без запросов к БД.
+    """
+    for reference_cache in (*REFERENCE_CACHES.values(), category_tree):
+        reference_cache.get()
+
+
+def warm_suggest_index() -> None:
+    """
+    Шаг прогрева: построение индекса подсказок поиска (иначе он строится при первом запросе подсказок).
+    """
+    suggest_index.ensure_fresh()
+
+
+WARMUP_STEPS: tuple[tuple[str, Callable[[], None]], ...] = (
+    ("urls", warm_urls),
+    ("serializers", warm_serializers),
+    ("templates", warm_templates),
+    ("reference_data", warm_reference_data),
+    ("suggest_index", warm_suggest_index),
+)
+
+
+class Warmup:
+    """
+    Прогрев текущего процесса: состояние, время выполнения и ошибки шагов.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.status: str = PENDING
+        self.durations: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status == READY
+
+    def start(self) -> None:
+        """
+        Метод для запуска прогрева в фоновом потоке, если он еще не запускался в этом процессе.
+        """
+        with self._lock:
+            if self.status != PENDING:
+                return
+            self.status = RUNNING
+        threading.Thread(target=self._run_in_thread, name="warmup", daemon=True).start()
+
+    def run(self) -> None:
+        """
+        Метод для выполнения всех шагов прогрева в текущем потоке.
+        """
+        self.status = RUNNING
+        started: float = time.perf_counter()
+        for name, step in WARMUP_STEPS:
+            step_started: float = time.perf_counter()
+            try:
+                step()
+            except Exception as exc:
+                log.exception("Ошибка на шаге прогрева %s", name)
+                self.errors[name] = f"{type(exc).__name__}: {exc}"
+            self.durations[name] = round(time.perf_counter() - step_started, 3)
+        self.status = READY
+        log.info("Прогрев завершен за %.2f с", time.perf_counter() - started)
+
+    def _run_in_thread(self) -> None:
+        try:
+            self.run()
+        finally:
+            # у фонового потока свои подключения к БД, которые нужно закрыть
+            connections.close_all()
+
+    def after_fork(self) -> None:
+        """
+        Обработчик fork для процесса-потомка: прогрев, запущенный в родителе, запускается в потомке заново.
+        """
+        started: bool = self.status != PENDING
+        self._lock = threading.Lock()
+        self.reset()
+        if started:
+            self.start()
+
+
+warmup = Warmup()
+os.register_at_fork(after_in_child=warmup.after_fork)
+
+
+def readiness_view(request: HttpRequest) -> JsonResponse:
+    """
+    Представление для проверки готовности процесса балансировщиком: 200 после завершения прогрева, иначе 503.
+    Если прогрев в процессе еще не запускался (сайт запущен не через megano/wsgi.py), то он запускается.
+    """
+    if not warmup.is_ready:
+        warmup.start()
+        return JsonResponse({"status": warmup.status}, status=503)
+    return JsonResponse(
+        {
+            "status": warmup.status,
+            "durations": warmup.durations,
+            "errors": warmup.errors,
+        }
+    )
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "megano.settings")
 
 application = get_wsgi_application()
+
+# прогрев процесса в фоновом потоке, после которого /healthz/ready сообщает о готовности
+from megano.warmup import warmup  # noqa: E402
+
+warmup.start()
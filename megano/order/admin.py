@@ -1,17 +1,27 @@
 from django.contrib import admin
+
+from catalogs.admin_tools import PaginatedReadOnlyInline, ScalableModelAdmin
 from order.models import Order, Delivery, Payment, Status
 
 
-class ProductInline(admin.StackedInline):
+class ProductInline(PaginatedReadOnlyInline):
     """
-    inline-класс для отражения продуктов внутри заказа
+    inline-класс для отражения продуктов внутри заказа (постранично и только для чтения)
     """
 
     model = Order.products.through
+    fields = "product", "quantity", "final_price"
+    readonly_fields = fields
+
+    def get_queryset(self, request):
+        """
+        Метод для получения строк заказа сразу с товарами, чтобы не делать запрос для каждой строки
+        """
+        return super().get_queryset(request).select_related("product")
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ScalableModelAdmin):
     """
     Класс для отражения в админ-панели информации о заказах
     """
@@ -23,6 +33,9 @@ class OrderAdmin(admin.ModelAdmin):
         "profile",
         "status",
     )
+    list_filter = "status", "deliveryType"
+    list_select_related = "profile", "status", "deliveryType"
+    raw_id_fields = ("profile",)
 
 
 @admin.register(Delivery)
@@ -0,0 +1,622 @@
+"""
+Модуль с нагрузочным тестом сценария покупки: вход → каталог → корзина → оформление заказа → оплата.
+
+Каждый виртуальный пользователь в цикле проходит сессии покупателя против запущенного сервера так же,
+как это делает фронтэнд: входит под своим логином (или регистрируется, если его еще нет), просматривает
+страницы каталога со случайными фильтрами и сортировкой, добавляет товары в корзину и с заданной вероятностью
+оформляет, подтверждает и оплачивает заказ. HTTP-клиент написан на asyncio без сторонних библиотек
+и держит одно keep-alive соединение на сессию, поэтому один процесс создает нагрузку сотнями пользователей.
+Количество пользователей меняется по профилю из этапов (количество пользователей, длительность),
+для каждого шага считаются пропускная способность, доля ошибок и перцентили времени ответа.
+"""
+
+import asyncio
+import json
+import math
+import random
+import ssl
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+# шаги сценария в порядке вывода в отчете
+STEPS: tuple[str, ...] = (
+    "sign-in",
+    "sign-up",
+    "categories",
+    "catalog",
+    "basket",
+    "order",
+    "confirm",
+    "payment",
+    "session",
+)
+
+SORT_FIELDS: tuple[str, ...] = ("rating", "price", "reviews", "date")
+PERCENTILES: tuple[int, ...] = (50, 90, 95, 99)
+
+
+class LoadTestError(Exception):
+    """
+    Исключение для неуспешного шага сценария (ошибка ответа сервера или соединения).
+    """
+
+
+@dataclass
+class Stage:
+    """
+    Этап профиля нагрузки: за duration секунд количество пользователей линейно меняется до users.
+    """
+
+    users: int
+    duration: float
+
+
+@dataclass
+class LoadTestOptions:
+    """
+    Параметры нагрузочного теста.
+    """
+
+    url: str
+    stages: list[Stage]
+    password: str = "LoadTest24@"
+    user_prefix: str = "loadtest_"
+    think_time: float = 1.0
+    pages: int = 3
+    basket_size: int = 2
+    checkout_ratio: float = 0.5
+    timeout: float = 10.0
+    max_sessions: int | None = None
+    distinct_ips: bool = False
+    report_interval: float = 5.0
+    seed: int | None = None
+
+
+@dataclass
+class StepStats:
+    """
+    Статистика одного шага сценария: время ответов успешных запросов и ошибки по причинам.
+    """
+
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies) + sum(self.errors.values())
+
+    def percentile(self, percent: int) -> float:
+        """
+        Метод для получения перцентиля времени ответа (по методу ближайшего ранга).
+
+        :param percent: перцентиль от 1 до 100
+        :return: время ответа в секундах
+        """
+        if not self.latencies:
+            return 0.0
+        ordered: list[float] = sorted(self.latencies)
+        return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+class LoadTestStats:
+    """
+    Класс для сбора статистики по шагам сценария.
+    """
+
+    def __init__(self) -> None:
+        self.steps: dict[str, StepStats] = {step: StepStats() for step in STEPS}
+        self.started: float = time.monotonic()
+        self.finished: float | None = None
+        self.sessions: int = 0
+        # количество запросов на момент последнего промежуточного отчета
+        self.reported_requests: int = 0
+        self.reported_at: float = self.started
+
+    def add(self, step: str, latency: float | None, error: str | None = None) -> None:
+        if error is None:
+            self.steps[step].latencies.append(latency)
+        else:
+            self.steps[step].errors[error] += 1
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def requests(self) -> int:
+        return sum(
+            stats.count for step, stats in self.steps.items() if step != "session"
+        )
+
+    def as_dict(self) -> dict:
+        """
+        Метод для получения итогов теста в виде словаря (для сохранения в JSON).
+        """
+        elapsed: float = self.elapsed or 1.0
+        result: dict = {
+            "elapsed": round(elapsed, 3),
+            "sessions": self.sessions,
+            "steps": {},
+        }
+        for step, stats in self.steps.items():
+            if not stats.count:
+                continue
+            result["steps"][step] = {
+                "requests": stats.count,
+                "rps": round(stats.count / elapsed, 2),
+                "error_rate": round(sum(stats.errors.values()) / stats.count, 4),
+                "errors": dict(stats.errors),
+                **{
+                    f"p{percent}_ms": round(stats.percentile(percent) * 1000, 1)
+                    for percent in PERCENTILES
+                },
+                "max_ms": round(max(stats.latencies, default=0) * 1000, 1),
+            }
+        return result
+
+    def format_report(self) -> str:
+        """
+        Метод для получения итоговой таблицы по шагам сценария.
+        """
+        data: dict = self.as_dict()
+        percent_columns: str = "".join(
+            f"{f'p{percent}, мс':>11}" for percent in PERCENTILES
+        )
+        lines: list[str] = [
+            f"Длительность: {data['elapsed']:.1f} с, завершено сессий: {data['sessions']}",
+            f"{'Шаг':<12}{'Запросов':>10}{'Запр/с':>9}{'Ошибок':>9}{percent_columns}{'max, мс':>11}",
+        ]
+        for step, row in data["steps"].items():
+            percents: str = "".join(
+                f"{row[f'p{percent}_ms']:>11.1f}" for percent in PERCENTILES
+            )
+            lines.append(
+                f"{step:<12}{row['requests']:>10}{row['rps']:>9.1f}{row['error_rate']:>9.1%}"
+                f"{percents}{row['max_ms']:>11.1f}"
+            )
+        errors: list[str] = [
+            f"  {step}: "
+            + ", ".join(
+                f"{reason} - {count}" for reason, count in row["errors"].items()
+            )
+            for step, row in data["steps"].items()
+            if row["errors"]
+        ]
+        if errors:
+            lines += ["Ошибки:", *errors]
+        return "\n".join(lines)
+
+
+def parse_stages(value: str) -> list[Stage]:
+    """
+    Функция для разбора профиля нагрузки из строки вида "20:30,100:60,100:120,0:30"
+    (количество пользователей:длительность этапа в секундах).
+
+    :param value: строка с этапами
+    :return: список этапов
+    """
+    stages: list[Stage] = []
+    for part in value.split(","):
+        users, _, duration = part.strip().partition(":")
+        try:
+            stage = Stage(int(users), float(duration))
+        except ValueError:
+            raise ValueError(f"Некорректный этап нагрузки: '{part}'")
+        if stage.users < 0 or stage.duration <= 0:
+            raise ValueError(f"Некорректный этап нагрузки: '{part}'")
+        stages.append(stage)
+    return stages
+
+
+def get_target_users(stages: list[Stage], elapsed: float) -> int | None:
+    """
+    Функция для расчета количества пользователей в момент elapsed: внутри этапа оно меняется линейно
+    от количества в конце предыдущего этапа (в начале теста - от нуля).
+
+    :param stages: этапы профиля нагрузки
+    :param elapsed: секунд от начала теста
+    :return: количество пользователей или None, если все этапы пройдены
+    """
+    previous: int = 0
+    for stage in stages:
+        if elapsed < stage.duration:
+            return round(previous + (stage.users - previous) * elapsed / stage.duration)
+        elapsed -= stage.duration
+        previous = stage.users
+    return None
+
+
+class HttpClient:
+    """
+    Минимальный асинхронный HTTP/1.1-клиент одной сессии покупателя: одно keep-alive соединение и cookies.
+    Как и фронтэнд, передает токен CSRF из cookie csrftoken в заголовке X-CSRFToken.
+    """
+
+    def __init__(
+        self, url: str, timeout: float, forwarded_for: str | None = None
+    ) -> None:
+        parts = urlsplit(url)
+        self.host: str = parts.hostname
+        self.secure: bool = parts.scheme == "https"
+        self.port: int = parts.port or (443 if self.secure else 80)
+        self.host_header: str = parts.netloc
+        self.timeout: float = timeout
+        self.forwarded_for: str | None = forwarded_for
+        self.cookies: dict[str, str] = {}
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(
+        self, method: str, path: str, body: bytes = b"", content_type: str | None = None
+    ) -> tuple[int, bytes]:
+        """
+        Метод для выполнения запроса. Если сервер закрыл keep-alive соединение между запросами,
+        то запрос один раз повторяется в новом соединении.
+
+        :return: статус ответа и тело ответа
+        """
+        for attempt in (1, 2):
+            reused: bool = self.writer is not None
+            try:
+                return await asyncio.wait_for(
+                    self._request(method, path, body, content_type), self.timeout
+                )
+            except asyncio.TimeoutError:
+                await self.close()
+                raise LoadTestError("timeout")
+            except (OSError, asyncio.IncompleteReadError) as exception:
+                await self.close()
+                if not reused or attempt == 2:
+                    raise LoadTestError(type(exception).__name__)
+
+    async def _request(
+        self, method: str, path: str, body: bytes, content_type: str | None
+    ) -> tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host,
+                self.port,
+                ssl=ssl.create_default_context() if self.secure else None,
+            )
+        headers: dict[str, str] = {
+            "Host": self.host_header,
+            "Connection": "keep-alive",
+            "Accept": "application/json",
+            "Content-Length": str(len(body)),
+        }
+        if content_type:
+            headers["Content-Type"] = content_type
+        if self.cookies:
+            headers["Cookie"] = "; ".join(
+                f"{name}={value}" for name, value in self.cookies.items()
+            )
+        if "csrftoken" in self.cookies:
+            headers["X-CSRFToken"] = self.cookies["csrftoken"]
+        if self.forwarded_for:
+            headers["X-Forwarded-For"] = self.forwarded_for
+        head: str = f"{method} {path} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        self.writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await self.writer.drain()
+
+        status_line: bytes = await self.reader.readuntil(b"\r\n")
+        status: int = int(status_line.split()[1])
+        response_headers: list[tuple[str, str]] = []
+        while (line := await self.reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers.append((name.strip().lower(), value.strip()))
+        header_values: dict[str, str] = dict(response_headers)
+
+        if header_values.get("transfer-encoding", "").lower() == "chunked":
+            content: bytes = await self._read_chunked()
+        elif "content-length" in header_values:
+            content = await self.reader.readexactly(
+                int(header_values["content-length"])
+            )
+        else:
+            content = await self.reader.read()
+            header_values["connection"] = "close"
+
+        for name, value in response_headers:
+            if name == "set-cookie":
+                self._store_cookie(value)
+        if header_values.get("connection", "").lower() == "close":
+            await self.close()
+        return status, content
+
+    async def _read_chunked(self) -> bytes:
+        chunks: list[bytes] = []
+        while size := int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16):
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+        # завершающие заголовки после последнего блока
+        while await self.reader.readuntil(b"\r\n") != b"\r\n":
+            pass
+        return b"".join(chunks)
+
+    def _store_cookie(self, header: str) -> None:
+        cookie = SimpleCookie()
+        cookie.load(header)
+        for name, morsel in cookie.items():
+            if morsel["max-age"] == "0" or not morsel.value:
+                self.cookies.pop(name, None)
+            else:
+                # значение передается обратно в том виде, в каком его прислал сервер (в кавычках, если они были)
+                self.cookies[name] = morsel.coded_value
+
+
+class VirtualUser:
+    """
+    Класс виртуального пользователя, который в цикле проходит сессии покупателя.
+    Каждая сессия начинается с нового HTTP-клиента (без cookies), как новый визит на сайт.
+    """
+
+    def __init__(
+        self,
+        number: int,
+        options: LoadTestOptions,
+        stats: LoadTestStats,
+        rng: random.Random,
+    ) -> None:
+        self.number: int = number
+        self.options: LoadTestOptions = options
+        self.stats: LoadTestStats = stats
+        self.random: random.Random = rng
+        self.username: str = f"{options.user_prefix}{number}"
+        self.client: HttpClient | None = None
+
+    async def run(self, should_stop: Callable[[], bool]) -> None:
+        while not should_stop():
+            started: float = time.monotonic()
+            forwarded_for: str | None = None
+            if self.options.distinct_ips:
+                forwarded_for = f"10.{self.number // 65536 % 256}.{self.number // 256 % 256}.{self.number % 256}"
+            self.client = HttpClient(
+                self.options.url, self.options.timeout, forwarded_for
+            )
+            try:
+                await self.session()
+            except LoadTestError as exception:
+                self.stats.add("session", None, str(exception))
+            else:
+                self.stats.add("session", time.monotonic() - started)
+            finally:
+                await self.client.close()
+            self.stats.sessions += 1
+
+    async def step(
+        self,
+        step: str,
+        method: str,
+        path: str,
+        payload=None,
+        form: bool = False,
+        expected: tuple[int, ...] = (),
+    ) -> tuple[int, object]:
+        """
+        Метод для выполнения одного шага сценария с записью времени ответа.
+        Ответ со статусом не 2xx (кроме статусов из expected) считается ошибкой шага и прерывает сессию.
+
+        :param step: название шага в отчете
+        :param payload: данные запроса (JSON или, при form=True, строка в теле формы, как отправляет фронтэнд)
+        :param expected: статусы, которые тоже считаются успешным ответом
+        :return: статус и разобранный JSON ответа (None для пустого ответа)
+        """
+        body: bytes = b""
+        content_type: str | None = None
+        if payload is not None:
+            if form:
+                body, content_type = (
+                    payload.encode(),
+                    "application/x-www-form-urlencoded",
+                )
+            else:
+                body, content_type = json.dumps(payload).encode(), "application/json"
+        started: float = time.monotonic()
+        try:
+            status, content = await self.client.request(
+                method, path, body, content_type
+            )
+        except LoadTestError as exception:
+            self.stats.add(step, None, str(exception))
+            raise
+        latency: float = time.monotonic() - started
+        if not 200 <= status < 300 and status not in expected:
+            self.stats.add(step, None, f"HTTP {status}")
+            raise LoadTestError(f"{step}: HTTP {status}")
+        self.stats.add(step, latency)
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+    async def think(self) -> None:
+        if self.options.think_time > 0:
+            await asyncio.sleep(self.random.uniform(0, 2 * self.options.think_time))
+
+    async def session(self) -> None:
+        """
+        Метод с одной сессией покупателя от входа до оплаты.
+        """
+        credentials: str = json.dumps(
+            {"username": self.username, "password": self.options.password}
+        )
+        status, _ = await self.step(
+            "sign-in", "POST", "/api/sign-in/", credentials, form=True, expected=(400,)
+        )
+        if status == 400:
+            # пользователя еще нет - регистрация сразу выполняет вход
+            await self.step(
+                "sign-up",
+                "POST",
+                "/api/sign-up/",
+                json.dumps(
+                    {
+                        "name": self.username,
+                        "username": self.username,
+                        "password": self.options.password,
+                    }
+                ),
+                form=True,
+            )
+
+        categories: list[int] = []
+        _, data = await self.step("categories", "GET", "/api/categories/")
+        for category in data or []:
+            categories.append(category["id"])
+            categories.extend(
+                subcategory["id"] for subcategory in category.get("subcategories", [])
+            )
+
+        products: dict[int, dict] = {}
+        for _ in range(self.options.pages):
+            await self.think()
+            _, page = await self.step(
+                "catalog", "GET", "/api/catalog/?" + self.catalog_query(categories)
+            )
+            for item in (page or {}).get("items", []):
+                if item.get("count", 0) > 0:
+                    products[item["id"]] = item
+        if not products:
+            return
+
+        basket: list[dict] = []
+        for product_id in self.random.sample(
+            list(products), min(self.options.basket_size, len(products))
+        ):
+            await self.think()
+            _, basket = await self.step(
+                "basket", "POST", "/api/basket/", {"id": product_id, "count": 1}
+            )
+        if not basket or self.random.random() >= self.options.checkout_ratio:
+            return
+
+        await self.think()
+        _, order = await self.step("order", "POST", "/api/orders/", basket)
+        order_id: int = order["orderId"]
+        await self.think()
+        await self.step(
+            "confirm",
+            "POST",
+            f"/api/order/{order_id}/",
+            {
+                "fullName": f"Покупатель {self.number}",
+                "phone": f"+7900{self.number:07d}",
+                "email": f"{self.username}@example.com",
+                "city": "Москва",
+                "address": "ул. Тестовая, 1",
+                "deliveryType": self.random.choice(("ordinary", "express")),
+                "paymentType": "online",
+            },
+        )
+        await self.think()
+        await self.step(
+            "payment",
+            "POST",
+            f"/api/payment/{order_id}/",
+            {
+                # номер тестовой карты должен быть четным и не заканчиваться на ноль
+                "number": "2222 4444",
+                "month": "12",
+                "year": str(date.today().year + 1),
+                "code": "123",
+            },
+        )
+
+    def catalog_query(self, categories: list[int]) -> str:
+        """
+        Метод для получения параметров страницы каталога со случайными фильтрами, как их передает фронтэнд.
+        """
+        low: int = self.random.choice((0, 0, 100, 500, 1000))
+        params: list[tuple[str, str | int]] = [
+            ("filter[name]", ""),
+            ("filter[minPrice]", low),
+            (
+                "filter[maxPrice]",
+                self.random.choice((50000, 50000, low + 1000, low + 5000)),
+            ),
+            ("filter[freeDelivery]", self.random.choice(("false", "false", "true"))),
+            ("filter[available]", self.random.choice(("true", "true", "false"))),
+            ("currentPage", self.random.choice((1, 1, 1, 2, 3))),
+            ("sort", self.random.choice(SORT_FIELDS)),
+            ("sortType", self.random.choice(("dec", "inc"))),
+            ("limit", 20),
+        ]
+        if categories and self.random.random() < 0.5:
+            params.append(("category", self.random.choice(categories)))
+        return urlencode(params)
+
+
+async def run_load_test(
+    options: LoadTestOptions,
+    write: Callable[[str], None] = print,
+    stats: LoadTestStats | None = None,
+) -> LoadTestStats:
+    """
+    Функция для запуска нагрузочного теста: каждые 0.2 секунды количество виртуальных пользователей
+    приводится к значению из профиля нагрузки, лишние пользователи останавливаются.
+
+    :param options: параметры теста
+    :param write: функция для вывода промежуточных отчетов
+    :param stats: объект для сбора статистики (чтобы получить ее и при прерывании теста)
+    :return: собранная статистика
+    """
+    stats = stats or LoadTestStats()
+    rng = random.Random(options.seed)
+    tasks: list[asyncio.Task] = []
+    finished: bool = False
+
+    def should_stop() -> bool:
+        return finished or (
+            options.max_sessions is not None and stats.sessions >= options.max_sessions
+        )
+
+    try:
+        while not should_stop():
+            target: int | None = get_target_users(options.stages, stats.elapsed)
+            if target is None:
+                break
+            tasks = [task for task in tasks if not task.done()]
+            while len(tasks) < target:
+                user = VirtualUser(
+                    len(tasks), options, stats, random.Random(rng.random())
+                )
+                tasks.append(asyncio.create_task(user.run(should_stop)))
+            while len(tasks) > target:
+                tasks.pop().cancel()
+
+            now: float = time.monotonic()
+            if now - stats.reported_at >= options.report_interval:
+                requests: int = stats.requests
+                write(
+                    f"{stats.elapsed:6.1f} с: пользователей {len(tasks)}, "
+                    f"{(requests - stats.reported_requests) / (now - stats.reported_at):.1f} запр/с, "
+                    f"сессий {stats.sessions}"
+                )
+                stats.reported_requests, stats.reported_at = requests, now
+            await asyncio.sleep(0.2)
+    finally:
+        finished = True
+        if options.max_sessions is not None:
+            # пользователи заканчивают начатые сессии
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        stats.finished = time.monotonic()
+    return stats
@@ -0,0 +1,150 @@
+"""
+Команда для нагрузочного теста сценария покупки против запущенного сервера.
+"""
+
+import asyncio
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from order.loadtest import (
+    LoadTestOptions,
+    LoadTestStats,
+    Stage,
+    parse_stages,
+    run_load_test,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает виртуальных покупателей, которые входят на сайт, смотрят каталог, добавляют товары в корзину, "
+        "оформляют и оплачивают заказы, и выводит статистику по каждому шагу. "
+        "Заказы действительно оплачиваются и уменьшают остатки товаров, поэтому тест запускается против копии БД"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Адрес запущенного сервера (по умолчанию http://127.0.0.1:8000)",
+        )
+        parser.add_argument(
+            "--users", type=int, default=10, help="Количество пользователей"
+        )
+        parser.add_argument(
+            "--ramp-up",
+            type=float,
+            default=10,
+            help="За сколько секунд количество пользователей растет от 0 до --users",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=60,
+            help="Сколько секунд держится нагрузка после разгона",
+        )
+        parser.add_argument(
+            "--stages",
+            help='Профиль нагрузки вместо --users/--ramp-up/--duration: "пользователей:секунд,...", '
+            'например "20:30,100:60,100:120,0:30"',
+        )
+        parser.add_argument(
+            "--sessions",
+            type=int,
+            help="Остановить тест после указанного количества сессий",
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=1.0,
+            help="Средняя пауза пользователя между шагами в секундах",
+        )
+        parser.add_argument(
+            "--pages", type=int, default=3, help="Страниц каталога за сессию"
+        )
+        parser.add_argument(
+            "--basket-size", type=int, default=2, help="Товаров в корзине за сессию"
+        )
+        parser.add_argument(
+            "--checkout-ratio",
+            type=float,
+            default=0.5,
+            help="Доля сессий, которые оформляют и оплачивают заказ",
+        )
+        parser.add_argument(
+            "--user-prefix",
+            default="loadtest_",
+            help="Префикс логинов виртуальных пользователей",
+        )
+        parser.add_argument(
+            "--password", default="LoadTest24@", help="Пароль виртуальных пользователей"
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=10, help="Таймаут запроса в секундах"
+        )
+        parser.add_argument(
+            "--distinct-ips",
+            action="store_true",
+            help="Передавать у каждого пользователя свой адрес в X-Forwarded-For, чтобы ограничения частоты "
+            "входа и регистрации считались для каждого пользователя отдельно. Сервер учитывает заголовок, "
+            "только если запущен с MEGANO_NUM_PROXIES=1 и тест обращается к нему напрямую, без прокси",
+        )
+        parser.add_argument(
+            "--report-interval",
+            type=float,
+            default=5,
+            help="Интервал промежуточных отчетов в секундах",
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Начальное значение генератора случайных чисел"
+        )
+        parser.add_argument("--json", help="Файл для сохранения итогов в формате JSON")
+
+    def handle(self, *args, **options) -> None:
+        if options["stages"]:
+            try:
+                stages: list[Stage] = parse_stages(options["stages"])
+            except ValueError as exception:
+                raise CommandError(str(exception))
+        else:
+            if options["users"] <= 0 or options["duration"] <= 0:
+                raise CommandError(
+                    "Количество пользователей и длительность должны быть больше нуля"
+                )
+            stages = [
+                # без разгона все пользователи запускаются сразу
+                Stage(options["users"], max(options["ramp_up"], 0.001)),
+                Stage(options["users"], options["duration"]),
+            ]
+        if not options["url"].startswith(("http://", "https://")):
+            raise CommandError("Адрес сервера должен начинаться с http:// или https://")
+
+        load_test_options = LoadTestOptions(
+            url=options["url"],
+            stages=stages,
+            password=options["password"],
+            user_prefix=options["user_prefix"],
+            think_time=options["think_time"],
+            pages=options["pages"],
+            basket_size=options["basket_size"],
+            checkout_ratio=options["checkout_ratio"],
+            timeout=options["timeout"],
+            max_sessions=options["sessions"],
+            distinct_ips=options["distinct_ips"],
+            report_interval=options["report_interval"],
+            seed=options["seed"],
+        )
+        stats = LoadTestStats()
+        try:
+            asyncio.run(run_load_test(load_test_options, self.stdout.write, stats))
+        except KeyboardInterrupt:
+            # при прерывании (Ctrl+C) выводится статистика за время до прерывания
+            stats.finished = stats.finished or time.monotonic()
+            self.stdout.write("Тест прерван")
+
+        self.stdout.write(stats.format_report())
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as file:
+                json.dump(stats.as_dict(), file, ensure_ascii=False, indent=2)
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:32
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def move_delivery_lines_to_orders(apps, schema_editor):
+    """
+    Переносит стоимость доставки из строк заказа с товарами-доставками в поле заказа deliveryCost,
+    а затем удаляет сами товары-доставки ('ordinary', 'express').
+    """
+    Delivery = apps.get_model("order", "Delivery")
+    Order = apps.get_model("order", "Order")
+    OrderProduct = apps.get_model("order", "OrderProduct")
+    Product = apps.get_model("catalogs", "Product")
+
+    delivery_types = list(Delivery.objects.values_list("type", flat=True))
+    delivery_products = Product.objects.filter(
+        title__in=delivery_types, category__isnull=True
+    )
+
+    delivery_costs: dict[int, Decimal] = {}
+    delivery_lines = OrderProduct.objects.filter(
+        product__in=delivery_products
+    ).select_related("product")
+    for line in delivery_lines:
+        price = line.final_price if line.final_price is not None else line.product.price
+        delivery_costs[line.order_id] = (
+            delivery_costs.get(line.order_id, Decimal(0)) + price * line.quantity
+        )
+
+    for order_id, cost in delivery_costs.items():
+        Order.objects.filter(pk=order_id).update(deliveryCost=cost)
+
+    delivery_lines.delete()
+    delivery_products.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalogs", "0039_alter_product_category_alter_sale_datefrom_and_more"),
+        ("order", "0011_orderproduct_final_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="deliveryCost",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(
+            move_delivery_lines_to_orders, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:43
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    """
+    Объединяет повторяющиеся строки заказа с одним и тем же товаром в одну строку с суммарным количеством,
+    чтобы можно было создать ограничение уникальности (order, product).
+    """
+    OrderProduct = apps.get_model("order", "OrderProduct")
+
+    duplicates = (
+        OrderProduct.objects.values("order", "product")
+        .annotate(lines=Count("pk"), first_pk=Min("pk"), total=Sum("quantity"))
+        .filter(lines__gt=1)
+    )
+    for duplicate in duplicates:
+        lines = OrderProduct.objects.filter(
+            order=duplicate["order"], product=duplicate["product"]
+        )
+        lines.filter(pk=duplicate["first_pk"]).update(quantity=duplicate["total"])
+        lines.exclude(pk=duplicate["first_pk"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalogs", "0040_catalog_indexes"),
+        ("order", "0012_order_deliverycost"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_lines, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="orderproduct",
+            constraint=models.UniqueConstraint(
+                fields=("order", "product"), name="unique_order_product"
+            ),
+        ),
+    ]
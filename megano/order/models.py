@@ -1,4 +1,5 @@
 from datetime import datetime
+from decimal import Decimal
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
@@ -24,6 +25,22 @@ class Delivery(models.Model):
     def __str__(self):
         return f"{self.type} - {self.price}, {self.description}"
 
+    def get_cost(self, products_cost: Decimal, has_paid_delivery: bool) -> Decimal:
+        """
+        Метод для расчета стоимости доставки заказа данным типом доставки.
+        Если у типа доставки задана минимальная сумма для бесплатной доставки, то доставка бесплатна,
+        когда сумма заказа не меньше этой суммы или когда в заказе нет товаров с платной доставкой.
+        Если минимальная сумма не задана (например, экспресс-доставка), то доставка всегда платная.
+
+        :param products_cost: стоимость товаров в заказе
+        :param has_paid_delivery: есть ли в заказе хотя бы один товар с платной доставкой
+        :return: стоимость доставки
+        """
+        if self.min_amount_for_free is not None:
+            if not has_paid_delivery or products_cost >= self.min_amount_for_free:
+                return Decimal(0)
+        return self.price
+
 
 class Payment(models.Model):
     """
@@ -82,16 +99,17 @@ class Order(models.Model):
     city = models.CharField(max_length=100, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     comment = models.TextField(blank=True, null=True)
+    deliveryCost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     products = models.ManyToManyField(
         Product, through="OrderProduct", related_name="orders"
     )
 
-    def totalCost(self) -> int:
+    def productsCost(self) -> Decimal:
         """
-        Метод для подсчета общей стоимости заказа. Если у товара есть акционная цена,
+        Метод для подсчета стоимости товаров в заказе (без учета доставки). Если у товара есть акционная цена,
         то она участвует в расчете, иначе - обычная цена.
 
-        :return: общая стоимость заказа
+        :return: стоимость товаров в заказе
         """
         order_products = self.orderproduct_set.annotate(
             sale_price=Case(
@@ -108,7 +126,33 @@ class Order(models.Model):
 
         total_cost = order_products.aggregate(total=Sum("cost"))["total"]
 
-        return total_cost
+        return total_cost or Decimal(0)
+
+    def totalCost(self) -> Decimal:
+        """
+        Метод для подсчета общей стоимости заказа: стоимость товаров плюс сохраненная в заказе стоимость доставки.
+
+        :return: общая стоимость заказа
+        """
+        return self.productsCost() + self.deliveryCost
+
+    def calculate_delivery_cost(self) -> Decimal:
+        """
+        Метод для расчета стоимости доставки по выбранному в заказе типу доставки.
+        Результат записывается в поле deliveryCost (сам заказ при этом не сохраняется).
+
+        :return: стоимость доставки заказа
+        """
+        if self.deliveryType is None:
+            self.deliveryCost = Decimal(0)
+        else:
+            has_paid_delivery: bool = self.orderproduct_set.filter(
+                product__freeDelivery=False
+            ).exists()
+            self.deliveryCost = self.deliveryType.get_cost(
+                self.productsCost(), has_paid_delivery
+            )
+        return self.deliveryCost
 
     def __str__(self):
         return f"Заказ №{self.pk}"
@@ -126,5 +170,12 @@ class OrderProduct(models.Model):
         max_digits=10, decimal_places=2, blank=True, null=True
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "product"], name="unique_order_product"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.product.title} - {self.quantity} шт."
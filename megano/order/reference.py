@@ -0,0 +1,55 @@
+"""
+Модуль со справочниками заказов (статусы, типы доставки и оплаты), которые хранятся в памяти процесса
+(см. megano/process_cache.py), чтобы оформление и оплата заказа не читали их из БД при каждом запросе.
+Справочники сбрасываются при их изменении (order/signals.py) и перечитываются не реже,
+чем раз в REFERENCE_DATA_MAX_AGE секунд. Полученные объекты общие для всех запросов и не изменяются.
+"""
+
+from django.conf import settings
+from django.db import models
+
+from megano.process_cache import ProcessCache
+from .models import Delivery, Payment, Status
+
+REFERENCE_DATA_MAX_AGE: int | None = getattr(settings, "REFERENCE_DATA_MAX_AGE", 60)
+
+
+def load_by_key(model: type[models.Model], key: str) -> dict[str, models.Model]:
+    """
+    Функция для загрузки всех строк справочника в словарь по значению поля key.
+    При повторяющихся значениях остается строка с меньшим номером (как при .filter(...).first()).
+
+    :param model: модель справочника
+    :param key: название поля
+    :return: словарь {значение поля: объект}
+    """
+    return {getattr(row, key): row for row in model.objects.order_by("-pk")}
+
+
+statuses: ProcessCache[dict[str, Status]] = ProcessCache(
+    lambda: load_by_key(Status, "title"), REFERENCE_DATA_MAX_AGE
+)
+deliveries: ProcessCache[dict[str, Delivery]] = ProcessCache(
+    lambda: load_by_key(Delivery, "type"), REFERENCE_DATA_MAX_AGE
+)
+payments: ProcessCache[dict[str, Payment]] = ProcessCache(
+    lambda: load_by_key(Payment, "type"), REFERENCE_DATA_MAX_AGE
+)
+
+REFERENCE_CACHES: dict[type[models.Model], ProcessCache] = {
+    Status: statuses,
+    Delivery: deliveries,
+    Payment: payments,
+}
+
+
+def get_status(title: str) -> Status | None:
+    return statuses.get().get(title)
+
+
+def get_delivery(delivery_type: str) -> Delivery | None:
+    return deliveries.get().get(delivery_type)
+
+
+def get_payment(payment_type: str) -> Payment | None:
+    return payments.get().get(payment_type)
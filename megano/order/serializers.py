@@ -46,6 +46,7 @@ class OrderSerializer(serializers.ModelSerializer):
             "phone",
             "deliveryType",
             "paymentType",
+            "deliveryCost",
             "totalCost",
             "status",
             "city",
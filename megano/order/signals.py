@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Delivery, Payment, Status
+from .reference import REFERENCE_CACHES
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_save, sender=Delivery)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Status)
+@receiver(post_delete, sender=Delivery)
+@receiver(post_delete, sender=Payment)
+def reference_changed(sender, **kwargs) -> None:
+    """
+    Обработчик сигнала, сбрасывающий справочник в памяти процесса при изменении его строки.
+    Справочник сбрасывается еще раз после завершения транзакции, чтобы в него не попали данные до изменения,
+    прочитанные другим потоком за время транзакции.
+    """
+    REFERENCE_CACHES[sender].clear()
+    transaction.on_commit(REFERENCE_CACHES[sender].clear)
@@ -1,3 +1,243 @@
-from django.test import TestCase
+import asyncio
+import json
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import LiveServerTestCase, TestCase
+
+from catalogs.models import Category, Product
+from order.loadtest import (
+    LoadTestOptions,
+    StepStats,
+    get_target_users,
+    parse_stages,
+    run_load_test,
+)
+from order.models import Delivery, Order, Payment, Status
+from order.reference import REFERENCE_CACHES, get_delivery, get_status
+from profile_user.models import Profile
+
+
+class DeliveryCostTestCase(TestCase):
+    """
+    Класс с методами для тестирования расчета стоимости доставки заказа.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания в БД пользователя, товаров, типов доставки и статусов, необходимых для тестирования.
+        """
+        cls.user = User.objects.create_user(username="tester", password="Test24@")
+        Profile.objects.create(user=cls.user)
+
+        Status.objects.create(title="Создан")
+        Status.objects.create(title="Ожидает оплаты")
+        Payment.objects.create(type="online")
+        Delivery.objects.create(
+            type="ordinary", price=Decimal(2), min_amount_for_free=Decimal(20)
+        )
+        Delivery.objects.create(type="express", price=Decimal(5))
+
+        cls.cheap_product = Product.objects.create(
+            title="Футболка", price=Decimal(10), count=10
+        )
+        cls.free_delivery_product = Product.objects.create(
+            title="Платье", price=Decimal(10), count=10, freeDelivery=True
+        )
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом.
+        """
+        self.client.force_login(self.user)
+
+    def create_order(self, products: list[Product], count: int = 1) -> Order:
+        """
+        Вспомогательный метод для создания заказа через API.
+        """
+        response = self.client.post(
+            "/api/orders/",
+            data=json.dumps(
+                [{"id": product.pk, "count": count} for product in products]
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return Order.objects.get(pk=response.data["orderId"])
+
+    def confirm_order(self, order: Order, delivery_type: str) -> Order:
+        """
+        Вспомогательный метод для подтверждения заказа через API с выбранным типом доставки.
+        """
+        response = self.client.post(
+            f"/api/order/{order.pk}/",
+            data=json.dumps(
+                {
+                    "fullName": "Тестер",
+                    "phone": "123",
+                    "email": "tester@mail.ru",
+                    "city": "Москва",
+                    "address": "ул. Тестовая",
+                    "deliveryType": delivery_type,
+                    "paymentType": "online",
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        return order
+
+    def test_ordinary_delivery_is_paid_below_min_amount(self) -> None:
+        """
+        Тест для проверки того, что обычная доставка платная, если сумма заказа меньше минимальной.
+        """
+        order = self.create_order([self.cheap_product])
+
+        self.assertEqual(order.deliveryCost, Decimal(2))
+        self.assertEqual(order.totalCost(), Decimal(12))
+        self.assertEqual(order.orderproduct_set.count(), 1)
+
+    def test_ordinary_delivery_is_free_from_min_amount(self) -> None:
+        """
+        Тест для проверки того, что обычная доставка бесплатна, если сумма заказа не меньше минимальной.
+        """
+        order = self.create_order([self.cheap_product], count=2)
+
+        self.assertEqual(order.deliveryCost, Decimal(0))
+
+    def test_ordinary_delivery_is_free_for_free_delivery_products(self) -> None:
+        """
+        Тест для проверки того, что обычная доставка бесплатна, если все товары в заказе с бесплатной доставкой.
+        """
+        order = self.create_order([self.free_delivery_product])
+
+        self.assertEqual(order.deliveryCost, Decimal(0))
+
+    def test_delivery_cost_is_recalculated_on_confirm(self) -> None:
+        """
+        Тест для проверки пересчета стоимости доставки при смене типа доставки в подтверждаемом заказе.
+        """
+        order = self.create_order([self.free_delivery_product], count=2)
+
+        order = self.confirm_order(order, "express")
+        self.assertEqual(order.deliveryCost, Decimal(5))
+        self.assertEqual(order.totalCost(), Decimal(25))
+
+        order = self.confirm_order(order, "ordinary")
+        self.assertEqual(order.deliveryCost, Decimal(0))
+
+
+class ReferenceDataTestCase(TestCase):
+    """
+    Класс с методами для тестирования справочников заказов в памяти процесса.
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: справочники, загруженные в прошлых тестах, сбрасываются.
+        """
+        for reference_cache in REFERENCE_CACHES.values():
+            reference_cache.clear()
+
+    def test_reference_data(self) -> None:
+        """
+        Тест для проверки, что справочник читается из БД один раз и перечитывается после изменения его строки.
+        """
+        created = Status.objects.create(title="Создан")
+        Status.objects.create(title="Создан")
+        self.assertEqual(get_status("Создан"), created)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_status("Создан"), created)
+            self.assertIsNone(get_status("Оплачен"))
+
+        paid = Status.objects.create(title="Оплачен")
+        self.assertEqual(get_status("Оплачен"), paid)
+
+        delivery = Delivery.objects.create(type="ordinary", price=Decimal(2))
+        self.assertEqual(get_delivery("ordinary").price, Decimal(2))
+        delivery.price = Decimal(3)
+        delivery.save()
+        self.assertEqual(get_delivery("ordinary").price, Decimal(3))
+        delivery.delete()
+        self.assertIsNone(get_delivery("ordinary"))
+
+
+class LoadTestTestCase(LiveServerTestCase):
+    """
+    Класс с методами для тестирования нагрузочного теста сценария покупки против запущенного сервера.
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод для создания в БД каталога, статусов заказа, типов доставки и оплаты.
+        """
+        cache.clear()
+        for title in ("Создан", "Принят", "Ожидает оплаты", "Оплачен"):
+            Status.objects.create(title=title)
+        Payment.objects.create(type="online")
+        Delivery.objects.create(type="ordinary", price=Decimal(2))
+        Delivery.objects.create(type="express", price=Decimal(5))
+        # категория без сигналов, чтобы не создавались копии несуществующего изображения
+        (category,) = Category.objects.bulk_create(
+            [Category(title="Одежда", image="categories/clothes.png")]
+        )
+        # цены и бесплатная доставка подобраны так, чтобы под любые фильтры каталога попадали товары
+        for price in (100, 500, 1000, 1500, 3000):
+            Product.objects.create(
+                title=f"Футболка {price}",
+                price=Decimal(price),
+                count=100,
+                category=category,
+                freeDelivery=True,
+            )
+
+    def test_profile(self) -> None:
+        """
+        Тест для проверки профиля нагрузки и расчета перцентилей.
+        """
+        stages = parse_stages("10:10, 10:5,0:5")
+        self.assertEqual(get_target_users(stages, 0), 0)
+        self.assertEqual(get_target_users(stages, 5), 5)
+        self.assertEqual(get_target_users(stages, 12), 10)
+        self.assertEqual(get_target_users(stages, 17.5), 5)
+        self.assertIsNone(get_target_users(stages, 20))
+        with self.assertRaises(ValueError):
+            parse_stages("10")
+
+        stats = StepStats(latencies=[0.1 * number for number in range(1, 11)])
+        self.assertAlmostEqual(stats.percentile(50), 0.5)
+        self.assertAlmostEqual(stats.percentile(99), 1.0)
+
+    def test_purchase_sessions(self) -> None:
+        """
+        Тест для проверки того, что виртуальный пользователь регистрируется, а затем входит,
+        и каждая сессия без ошибок доходит до оплаты заказа.
+        """
+        options = LoadTestOptions(
+            url=self.live_server_url,
+            stages=parse_stages("1:0.01,1:60"),
+            think_time=0,
+            pages=5,
+            checkout_ratio=1,
+            max_sessions=2,
+            report_interval=60,
+            seed=1,
+        )
+        stats = asyncio.run(run_load_test(options, write=lambda line: None))
+
+        result: dict = stats.as_dict()
+        self.assertEqual(result["sessions"], 2)
+        for step in ("sign-in", "catalog", "basket", "order", "confirm", "payment"):
+            self.assertEqual(result["steps"][step]["error_rate"], 0, step)
+        self.assertEqual(result["steps"]["sign-up"]["requests"], 1)
+        self.assertEqual(result["steps"]["payment"]["requests"], 2)
+        self.assertEqual(
+            Order.objects.filter(
+                status__title="Оплачен", profile__user__username="loadtest_0"
+            ).count(),
+            2,
+        )
+        self.assertIn("payment", stats.format_report())
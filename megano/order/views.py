@@ -5,12 +5,14 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from basket.models import Basket, BasketProduct
+from basket.models import BasketProduct
 from basket.views import BasketView
 from catalogs.models import Product
-from order.models import Order, OrderProduct, Status, Delivery, Payment
+from megano.metrics import ORDERS_CREATED, STOCK_REJECTIONS
+from order.models import Order, OrderProduct
+from order.reference import get_delivery, get_payment, get_status
 from order.serializers import OrderSerializer, OrderProductSerializer
-from profile_user.models import Profile
+from site_auth.backends import get_user_basket, get_user_profile
 
 
 def remains_checking(product_list) -> tuple[bool, list]:
@@ -53,6 +55,7 @@ class OrdersView(APIView):
         # если какого-то товара не хватает, то осуществляются изменения в составе корзины
         # согласно имеющемуся количеству на складе и возвращается ответ 400.
         if not is_enough:
+            STOCK_REJECTIONS.inc("create")
             response = Response(
                 {"error": "Часть товара могла закончится, проверьте корзину"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -60,7 +63,7 @@ class OrdersView(APIView):
 
             # если пользователь аутентифицирован, то изменения производятся в корзине пользователя в базе данных
             if request.user.is_authenticated:
-                basket = Basket.objects.filter(user=request.user).first()
+                basket = get_user_basket(request.user)
                 for product in products_not_enough:
                     basket_product = BasketProduct.objects.filter(
                         basket=basket, product=product
@@ -88,17 +91,21 @@ class OrdersView(APIView):
 
         # если для создания заказа всех товаров хватает, то создается новый заказ, а товары в корзине удаляются
         else:
-            order_status = Status.objects.filter(title="Создан").first()
-            order = Order.objects.create(status=order_status)
+            order_status = get_status("Создан")
+
+            # по умолчанию для нового заказа устанавливается обычная доставка
+            ordinary_type = get_delivery("ordinary")
+            order = Order.objects.create(
+                status=order_status, deliveryType=ordinary_type
+            )
             response = Response({"orderId": order.pk})
 
             if request.user.is_authenticated:
-                profile, created = Profile.objects.get_or_create(user=request.user)
-                order.profile = profile
+                order.profile = get_user_profile(request.user)
                 order.save()
-                basket = Basket.objects.filter(user=request.user).first()
-                basket_products = BasketProduct.objects.filter(basket=basket)
-                basket_products.delete()
+                BasketProduct.objects.filter(
+                    basket=get_user_basket(request.user)
+                ).delete()
             else:
                 response.set_cookie(key="orderId", value=order.pk)
                 response.set_cookie(key="basket", value={})
@@ -111,23 +118,11 @@ class OrdersView(APIView):
                         product=product, order=order, quantity=product_data["count"]
                     )
 
-            # также проверяется количесто товаров с платной досставкой в составе заказа
-            not_free_order_products = OrderProduct.objects.filter(
-                order=order, product__freeDelivery=False
-            ).all()
-
-            ordinary_type = Delivery.objects.get(type="ordinary")
-            # если сумма заказа меньше минимально необходимой для бесплатной доставки и в составе заказа
-            # есть хотя бы один товар с платной доставкой, то в состав заказа также добавляется стоимость обычной доставки
-            if (
-                order.totalCost() < ordinary_type.min_amount_for_free
-                and len(not_free_order_products) > 0
-            ):
-                ordinary_delivery = Product.objects.filter(title="ordinary").first()
-                OrderProduct.objects.create(
-                    product=ordinary_delivery, order=order, quantity=1
-                )
+            # стоимость доставки рассчитывается один раз и сохраняется в самом заказе
+            order.calculate_delivery_cost()
+            order.save(update_fields=["deliveryCost"])
 
+            ORDERS_CREATED.inc()
             return response
 
     def get(self, request: Request):
@@ -143,12 +138,12 @@ class OrdersView(APIView):
         # если в куки хранится номер заказа, то переносим информацию о нем на пользователя, а сами куки очищаем
         if cookie_order != 0:
             order = Order.objects.get(pk=cookie_order)
-            order.profile = request.user.profile
+            order.profile = get_user_profile(request.user)
             order.save()
 
         # получаем их БД все заказы пользователя и, используя сериализатор, отправляем на фронтэнд
         orders = (
-            Order.objects.filter(profile=request.user.profile)
+            Order.objects.filter(profile=get_user_profile(request.user))
             .order_by("-createdAt")
             .prefetch_related("status")
             .prefetch_related("deliveryType")
@@ -208,12 +203,9 @@ class SingleOrderView(APIView):
         # если каких-либо товаров недостаточно, то переносим товары из заказа в максимально возможном количестве в
         # корзину, а сам заказ удаляем и возвращаем ответ со статусом 400 и сообщением об ошибке
         if not is_enough:
-            basket = Basket.objects.filter(user=request.user).first()
-            order_products = (
-                OrderProduct.objects.filter(order=order)
-                .exclude(product__description__iregex="доставка")
-                .all()
-            )
+            STOCK_REJECTIONS.inc("confirm")
+            basket = get_user_basket(request.user, create=True)
+            order_products = OrderProduct.objects.filter(order=order).all()
             for order_product in order_products:
                 if order_product.product.count > 0:
                     basket_product = BasketProduct.objects.filter(
@@ -257,59 +249,27 @@ class SingleOrderView(APIView):
         order.city = request.data["city"]
         order.address = request.data["address"]
 
-        delivery = Delivery.objects.filter(type=request.data["deliveryType"]).first()
-        payment = Payment.objects.filter(type=request.data["paymentType"]).first()
+        delivery = get_delivery(request.data["deliveryType"])
+        payment = get_payment(request.data["paymentType"])
 
-        new_status = Status.objects.filter(title="Ожидает оплаты").first()
+        new_status = get_status("Ожидает оплаты")
         order.status = new_status
 
         # если тип доставки выбран не был, то автоматически доставка устанавливается на обычную
         if not delivery:
-            delivery = Delivery.objects.filter(type="ordinary").first()
+            delivery = get_delivery("ordinary")
 
         order.deliveryType = delivery
 
         # если тип оплаты выбран не был, то автоматически оплата устанавливается на онлайн
         if not payment:
-            payment = Payment.objects.filter(type="online").first()
+            payment = get_payment("online")
 
         order.paymentType = payment
 
-        order.save()
-
-        # если тип доставки был выбран express, то мы определяем текущую доставку и меняем на express
-        if delivery.type == "express":
-            product = Product.objects.filter(title="express").first()
-            current_delivery = OrderProduct.objects.filter(
-                order=order, product__description__iregex="доставка"
-            ).first()
-
-            if not current_delivery:
-                OrderProduct.objects.create(order=order, product=product, quantity=1)
+        # пересчитываем стоимость доставки с учетом выбранного типа доставки
+        order.calculate_delivery_cost()
 
-            elif current_delivery.product.title == "ordinary":
-                current_delivery.delete()
-                OrderProduct.objects.create(order=order, product=product, quantity=1)
-
-        # если была выбрана обычная доставка, то определяем текущую доставку и заменяем ее на обычную
-        # при замене также учитываем общую сумму заказа и есть ли в составе заказа товары с платной доставкой
-        else:
-            product = Product.objects.filter(title="ordinary").first()
-            current_delivery = OrderProduct.objects.filter(
-                order=order, product__description__iregex="доставка"
-            ).first()
-            if current_delivery and current_delivery.product.title == "express":
-                current_delivery.delete()
-                not_free_order_products = OrderProduct.objects.filter(
-                    order=order, product__freeDelivery=False
-                ).all()
-                ordinary_type = Delivery.objects.get(type="ordinary")
-                if (
-                    order.totalCost() < ordinary_type.min_amount_for_free
-                    and len(not_free_order_products) > 0
-                ):
-                    OrderProduct.objects.create(
-                        order=order, product=product, quantity=1
-                    )
+        order.save()
 
         return Response({"orderId": order.pk})
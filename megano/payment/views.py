@@ -12,15 +12,22 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from catalogs.models import Product, Sale
-from order.models import Order, OrderProduct, Status
+from megano.metrics import ORDERS_PAID
+from megano.throttling import UserTokenBucketThrottle
+from site_auth.backends import get_user_profile
+from order.models import Order, OrderProduct
+from order.reference import get_status
 from .models import PaymentItem
 
 
 class PaymentView(APIView):
     """
-    API-класс с методом для валидации и создания платежа.
+    API-класс с методом для валидации и создания платежа. Частота попыток оплаты ограничена для пользователя.
     """
 
+    throttle_classes = (UserTokenBucketThrottle,)
+    throttle_scope = "payment"
+
     def post(self, request: Request, id: int) -> Response:
         # поменяли payment.js, строка 10, т.к. не отправлялся введенный номер карты на бэкэнд
 
@@ -114,7 +121,7 @@ class PaymentView(APIView):
         # в ином случае создается платеж PaymentItem
         if order.status.title == "Ожидает оплаты":
             PaymentItem.objects.create(
-                profile=request.user.profile,
+                profile=get_user_profile(request.user),
                 order=order,
                 number=number,
                 year=year,
@@ -126,14 +133,10 @@ class PaymentView(APIView):
                 {"error": "Заказ уже оплачен"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        order_products = (
-            OrderProduct.objects.filter(order=order)
-            .exclude(product__description__iregex="доставка")
-            .all()
-        )
+        order_products = OrderProduct.objects.filter(order=order).all()
 
         # после платежа заказу присваивается новый статус "Оплачен"
-        new_status = Status.objects.filter(title="Оплачен").first()
+        new_status = get_status("Оплачен")
         order.status = new_status
         order.save()
 
@@ -155,4 +158,5 @@ class PaymentView(APIView):
                 count=F("count") - ord_product.quantity
             )
 
+        ORDERS_PAID.inc()
         return Response(status=status.HTTP_200_OK)
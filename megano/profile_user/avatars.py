@@ -0,0 +1,146 @@
+"""
+Модуль с обработчиком загрузки аватара и функцией приведения аватара к единому виду.
+"""
+
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from PIL import Image, ImageOps
+
+# максимальный размер загружаемого файла аватара в байтах
+AVATAR_MAX_UPLOAD_SIZE: int = getattr(settings, "AVATAR_MAX_UPLOAD_SIZE", 2097152)
+
+# размер стороны квадрата, в который вписывается сохраняемый аватар
+AVATAR_SIZE: int = getattr(settings, "AVATAR_SIZE", 400)
+
+# максимальное количество пикселей в загружаемом изображении (защита от "бомб" распаковки)
+AVATAR_MAX_PIXELS: int = 40_000_000
+
+# допустимый запас на заголовки multipart-запроса сверх размера самого файла
+MULTIPART_OVERHEAD: int = 64 * 1024
+
+# сигнатуры форматов изображений, которые можно загрузить в качестве аватара
+IMAGE_SIGNATURES: tuple[bytes, ...] = (
+    b"\xff\xd8\xff",  # JPEG
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"GIF87a",  # GIF
+    b"GIF89a",  # GIF
+)
+
+TOO_LARGE_ERROR: str = "Ошибка загрузки, размер файла не должен быть более 2 МБ"
+NOT_IMAGE_ERROR: str = "Ошибка загрузки, файл не является изображением"
+
+# пул потоков для декодирования и уменьшения аватаров, ограничивающий количество одновременных обработок
+avatar_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "AVATAR_WORKERS", 2),
+    thread_name_prefix="avatar",
+)
+
+
+def is_image_header(data: bytes) -> bool:
+    """
+    Функция для проверки по первым байтам файла, является ли он изображением допустимого формата.
+
+    :param data: первые байты файла
+    :return: True, если файл начинается с сигнатуры JPEG, PNG, GIF или WebP
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return True
+    return data.startswith(IMAGE_SIGNATURES)
+
+
+class AvatarUploadHandler(FileUploadHandler):
+    """
+    Обработчик загрузки аватара. Файл хранится в памяти, а загрузка прерывается, как только
+    размер запроса или файла превышает допустимый. По первому фрагменту файла проверяется, что это изображение.
+    Текст ошибки сохраняется в атрибут error, чтобы представление могло вернуть понятный ответ.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, request=None, max_size: int = AVATAR_MAX_UPLOAD_SIZE) -> None:
+        super().__init__(request)
+        self.max_size: int = max_size
+        self.error: str | None = None
+        self.file: BytesIO | None = None
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        """
+        Метод, вызываемый до разбора запроса. Если заявленный размер запроса заведомо больше допустимого,
+        то тело запроса не читается вовсе, а возвращаются пустые данные.
+        """
+        if content_length > self.max_size + MULTIPART_OVERHEAD:
+            self.error = TOO_LARGE_ERROR
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, *args, **kwargs) -> None:
+        super().new_file(*args, **kwargs)
+        self.file = BytesIO()
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> None:
+        """
+        Метод, получающий очередной фрагмент файла. Загрузка прерывается, если первый фрагмент
+        не похож на изображение или если общий размер файла превысил допустимый.
+        """
+        if start == 0 and not is_image_header(raw_data):
+            self.error = NOT_IMAGE_ERROR
+            raise StopUpload(connection_reset=True)
+        if start + len(raw_data) > self.max_size:
+            self.error = TOO_LARGE_ERROR
+            raise StopUpload(connection_reset=True)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size: int) -> InMemoryUploadedFile:
+        self.file.seek(0)
+        return InMemoryUploadedFile(
+            file=self.file,
+            field_name=self.field_name,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+
+def normalize_avatar(file) -> ContentFile:
+    """
+    Функция для приведения аватара к единому виду: изображение поворачивается согласно EXIF,
+    уменьшается до AVATAR_SIZE пикселей и сохраняется в JPEG без метаданных.
+
+    :param file: загруженный файл изображения
+    :return: ContentFile с итоговым изображением и именем файла с расширением .jpg
+    """
+    with Image.open(file) as original:
+        if original.width * original.height > AVATAR_MAX_PIXELS:
+            raise ValueError("Слишком большое разрешение изображения")
+
+        # для JPEG изображение сразу декодируется в уменьшенном масштабе, что экономит память
+        original.draft("RGB", (AVATAR_SIZE, AVATAR_SIZE))
+        image = ImageOps.exif_transpose(original)
+
+    image.thumbnail((AVATAR_SIZE, AVATAR_SIZE), Image.Resampling.LANCZOS)
+
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=85, optimize=True)
+
+    stem: str = posixpath.splitext(posixpath.basename(file.name))[0]
+    return ContentFile(buffer.getvalue(), name=f"{stem}.jpg")
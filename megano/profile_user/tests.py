@@ -1,10 +1,13 @@
 import json
 import os
+import shutil
+import tempfile
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from megano import settings
@@ -33,8 +36,10 @@ class ProfileApiTestCase(TestCase):
         cls.changed_profile_info: dict = {'fullName': 'Тестерчик', 'email': 'testerchik@mail.ru', 'phone': '893409023'}
 
         # абсолютные пути к файлам, которые будут загружаться в тесте в качестве аватара
-        cls.profile_avatar: str = os.path.join(settings.BASE_DIR, "uploads\\profiles\\Velli.jpg")
-        cls.too_big_file: str = os.path.join(settings.BASE_DIR, "uploads\\profiles\\big_file.jpg")
+        cls.profile_avatar: str = os.path.join(settings.BASE_DIR, "uploads", "profiles", "Velli.jpg")
+
+        # временная папка, в которую сохраняются загружаемые в тестах аватары
+        cls.media_root: str = tempfile.mkdtemp()
 
         # новый пароль пользователя для обновления
         cls.new_password: str = '12345678'
@@ -85,21 +90,45 @@ class ProfileApiTestCase(TestCase):
         """
         Тест для проверки представления со сменой аватара.
         """
-        with open(self.profile_avatar, 'rb') as image_file:
+        with override_settings(MEDIA_ROOT=self.media_root), open(self.profile_avatar, 'rb') as image_file:
             response = self.client.post(reverse("profile_user:avatar-change"), {"avatar": image_file})
 
         self.assertEqual(response.status_code, 200)
-        self.assertIn(self.profile_avatar.split("\\")[-1][:-4], str(response.content))
+        self.assertIn(os.path.basename(self.profile_avatar)[:-4], str(response.content))
 
     def test_big_file_avatar_change(self) -> None:
         """
         Тест для проверки того, что в качестве аватара нельзя загрузить файл больше 2 мб.
         """
-        with open(self.too_big_file, 'rb') as image_file:
-            response = self.client.post(reverse("profile_user:avatar-change"), {"avatar": image_file})
+        too_big_file = SimpleUploadedFile("big_file.jpg", b"\xff\xd8\xff" + b"0" * 3 * 1024 * 1024)
+        response = self.client.post(reverse("profile_user:avatar-change"), {"avatar": too_big_file})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_not_image_avatar_change(self) -> None:
+        """
+        Тест для проверки того, что в качестве аватара нельзя загрузить файл, не являющийся изображением.
+        """
+        text_file = SimpleUploadedFile("avatar.jpg", b"not an image")
+        response = self.client.post(reverse("profile_user:avatar-change"), {"avatar": text_file})
 
         self.assertEqual(response.status_code, 400)
 
+    def test_user_context_queries(self) -> None:
+        """
+        Тест для проверки того, что пользователь загружается вместе с профилем и корзиной одним запросом,
+        а смена пароля не загружает пользователя повторно.
+        """
+        # первый запрос продлевает сессию, созданную при входе
+        self.client.get(reverse("profile_user:profile-info"))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("profile_user:profile-info"))
+        self.assertEqual(response.status_code, 200)
+
+        # запрос пользователя с профилем и корзиной и UPDATE пароля
+        with self.assertNumQueries(2):
+            self.client.post(reverse("profile_user:password-change"), {"password": self.new_password})
+
     def test_password_change(self) -> None:
         """
         Тест для проверки представления со сменой пароля.
@@ -119,3 +148,4 @@ class ProfileApiTestCase(TestCase):
         cls.user.delete()
         cls.extra_user.delete()
         cls.extra_profile.delete()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
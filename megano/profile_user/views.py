@@ -1,10 +1,17 @@
 from django.db import IntegrityError
+from PIL import Image
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.views import APIView
-from django.contrib.auth.models import User
 from profile_user.models import Profile
+from site_auth.backends import get_user_profile
+from .avatars import (
+    AvatarUploadHandler,
+    NOT_IMAGE_ERROR,
+    avatar_executor,
+    normalize_avatar,
+)
 from .serializers import ProfileSerializer
 
 
@@ -19,7 +26,7 @@ class ProfileApi(APIView):
         :param request:
         :return:
         """
-        profile = Profile.objects.get(user=request.user)
+        profile = get_user_profile(request.user)
         serialized = ProfileSerializer(profile)
         return Response(serialized.data)
 
@@ -31,17 +38,23 @@ class ProfileApi(APIView):
         :return:
         """
         data: dict = request.data
+        profile = get_user_profile(request.user)
+        fields: dict = {
+            "fullName": data["fullName"],
+            "email": data["email"],
+            "phone": data["phone"],
+        }
         try:
-            updated_lines = Profile.objects.filter(user=request.user).update(
-                fullName=data["fullName"], email=data["email"], phone=data["phone"]
-            )
+            Profile.objects.filter(pk=profile.pk).update(**fields)
         except IntegrityError:
             return Response(
                 {"error": "E-mail или/и телефон с такими данными уже существуют"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        profile = Profile.objects.get(user=request.user)
+        # профиль не перечитывается из БД - в нем меняются только что сохраненные поля
+        for field, value in fields.items():
+            setattr(profile, field, value)
         serialized = ProfileSerializer(profile)
         return Response(serialized.data)
 
@@ -54,31 +67,52 @@ class PasswordChangeAPI(APIView):
     def post(self, request: Request) -> Response:
         data = request.data.get("password", None)
         if data is not None:
-            cur_user = User.objects.get(username=request.user.username)
-            cur_user.set_password(data)
-            cur_user.save()
+            request.user.set_password(data)
+            request.user.save(update_fields=["password"])
         return Response(status=status.HTTP_200_OK)
 
 
 class AvatarChangeAPI(APIView):
     """
     API-класс с методом post для обновления аватара пользователя.
-    При загрузке файла более 2 мб возвращается сообщение об ошибке.
+    Загрузка прерывается, как только файл превышает 2 мб или если файл не является изображением.
+    Сохраняется уменьшенная копия аватара без метаданных.
     """
 
+    def initialize_request(self, request, *args, **kwargs):
+        """
+        Метод заменяет стандартные обработчики загрузки файлов на обработчик аватара.
+        Это необходимо сделать до того, как тело запроса будет прочитано (в том числе при проверке CSRF).
+        """
+        self.upload_handler = AvatarUploadHandler(request)
+        request.upload_handlers = [self.upload_handler]
+        return super().initialize_request(request, *args, **kwargs)
+
     def post(self, request: Request) -> Response:
-        user_profile = Profile.objects.get(user=request.user)
-        file = request.FILES["avatar"]
-        if file.size <= 2097152:
-            user_profile.avatar = file
-            user_profile.save()
-            response_dict: dict = {
-                "src": user_profile.avatar.url,
-                "alt": user_profile.avatar.name,
-            }
-            return Response(response_dict, status=status.HTTP_200_OK)
-        else:
+        user_profile = get_user_profile(request.user)
+        file = request.FILES.get("avatar")
+        if self.upload_handler.error or file is None:
+            return Response(
+                {
+                    "error": self.upload_handler.error
+                    or "Ошибка загрузки, файл не выбран"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # декодирование и уменьшение изображения выполняются в отдельном пуле потоков,
+        # чтобы одновременно обрабатывалось ограниченное количество изображений
+        try:
+            avatar = avatar_executor.submit(normalize_avatar, file).result()
+        except (OSError, ValueError, Image.DecompressionBombError):
             return Response(
-                {"error": "Ошибка загрузки, размер файла не должен быть более 2 МБ"},
+                {"error": NOT_IMAGE_ERROR},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+
+        user_profile.avatar.save(avatar.name, avatar)
+        response_dict: dict = {
+            "src": user_profile.avatar.url,
+            "alt": user_profile.avatar.name,
+        }
+        return Response(response_dict, status=status.HTTP_200_OK)
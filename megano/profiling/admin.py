@@ -0,0 +1,214 @@
+import os
+import tracemalloc
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.template.defaultfilters import filesizeformat
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.views.decorators.http import require_POST
+
+from .memory import compare_snapshots, request_snapshots
+from .models import MemorySnapshot, RequestProfile
+from .profiler import render_report
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Класс для просмотра профилей запросов в админ-панели. Профили только просматриваются и удаляются.
+    """
+
+    list_display = (
+        "pk",
+        "created_at",
+        "method",
+        "path",
+        "view",
+        "status_code",
+        "duration_ms",
+        "query_count",
+        "query_duration_ms",
+        "user",
+    )
+    list_display_links = "pk", "path"
+    list_filter = "view", "method"
+    search_fields = ("path",)
+    list_select_related = ("user",)
+    fields = (
+        "created_at",
+        "user",
+        ("method", "status_code"),
+        "path",
+        "view",
+        ("duration_ms", "query_count", "query_duration_ms"),
+        "download",
+        "report",
+    )
+    readonly_fields = (
+        "created_at",
+        "user",
+        "method",
+        "status_code",
+        "path",
+        "view",
+        "duration_ms",
+        "query_count",
+        "query_duration_ms",
+        "download",
+        "report",
+    )
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+    @admin.display(description="Время ответа, мс", ordering="duration")
+    def duration_ms(self, obj: RequestProfile) -> str:
+        return f"{obj.duration * 1000:.1f}"
+
+    @admin.display(description="Время запросов к БД, мс", ordering="query_duration")
+    def query_duration_ms(self, obj: RequestProfile) -> str:
+        return f"{obj.query_duration * 1000:.1f}"
+
+    @admin.display(description="Файл профиля")
+    def download(self, obj: RequestProfile) -> str:
+        """
+        Метод для отображения ссылки на скачивание файла профиля (открывается в snakeviz или pstats)
+        """
+        url: str = reverse("admin:profiling_requestprofile_download", args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.file)
+
+    @admin.display(description="Функции проекта")
+    def report(self, obj: RequestProfile) -> str:
+        """
+        Метод для отображения отчета по профилю, отфильтрованного по коду проекта
+        """
+        if not os.path.exists(obj.file_path):
+            return "Файл профиля не найден"
+        return format_html("<pre>{}</pre>", render_report(obj.file_path))
+
+    def get_urls(self):
+        urls = [
+            path(
+                "<int:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="profiling_requestprofile_download",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def download_view(self, request, pk: int) -> FileResponse:
+        """
+        Представление для скачивания файла профиля
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not os.path.exists(profile.file_path):
+            raise Http404("Файл профиля не найден")
+        return FileResponse(
+            open(profile.file_path, "rb"), as_attachment=True, filename=profile.file
+        )
+
+
+@admin.register(MemorySnapshot)
+class MemorySnapshotAdmin(admin.ModelAdmin):
+    """
+    Класс для просмотра и сравнения снимков памяти процессов сайта в админ-панели.
+    """
+
+    list_display = "pk", "created_at", "pid", "traced", "peak"
+    list_display_links = "pk", "created_at"
+    list_filter = ("pid",)
+    readonly_fields = "created_at", "pid", "traced", "peak", "file"
+    fields = readonly_fields
+    actions = ("compare",)
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+    @admin.display(description="Выделено памяти", ordering="traced_memory")
+    def traced(self, obj: MemorySnapshot) -> str:
+        return filesizeformat(obj.traced_memory)
+
+    @admin.display(description="Пик", ordering="peak_memory")
+    def peak(self, obj: MemorySnapshot) -> str:
+        return filesizeformat(obj.peak_memory)
+
+    def get_urls(self):
+        urls = [
+            path(
+                "request/",
+                self.admin_site.admin_view(require_POST(self.request_view)),
+                name="profiling_memorysnapshot_request",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def request_view(self, request) -> HttpResponseRedirect:
+        """
+        Представление для запроса снимков памяти у работающих процессов сайта (кнопка над списком снимков)
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        if not settings.MEMORY_TRACING:
+            self.message_user(
+                request,
+                "Диагностика памяти выключена (MEGANO_MEMORY_TRACING)",
+                messages.ERROR,
+            )
+        else:
+            request_snapshots()
+            self.message_user(
+                request,
+                "Процессы сайта сохранят снимки памяти после своего следующего запроса",
+            )
+        return HttpResponseRedirect(
+            reverse("admin:profiling_memorysnapshot_changelist")
+        )
+
+    @admin.action(description="Сравнить два выбранных снимка")
+    def compare(self, request, queryset):
+        """
+        Действие для сравнения двух снимков одного процесса: прирост памяти по модулям, строкам кода и представлениям
+        """
+        snapshots: list[MemorySnapshot] = list(queryset.order_by("created_at")[:3])
+        if len(snapshots) != 2 or snapshots[0].pid != snapshots[1].pid:
+            self.message_user(
+                request, "Выберите два снимка одного процесса", messages.ERROR
+            )
+            return None
+        if not all(os.path.exists(snapshot.file_path) for snapshot in snapshots):
+            self.message_user(request, "Файл снимка не найден", messages.ERROR)
+            return None
+
+        old, new = (
+            tracemalloc.Snapshot.load(snapshot.file_path) for snapshot in snapshots
+        )
+        groups = compare_snapshots(old, new)
+        return TemplateResponse(
+            request,
+            "admin/profiling/memorysnapshot/compare.html",
+            {
+                **self.admin_site.each_context(request),
+                "opts": self.model._meta,
+                "title": "Сравнение снимков памяти",
+                "old": snapshots[0],
+                "new": snapshots[1],
+                "groupings": [
+                    ("Модули", groups["modules"]),
+                    ("Строки кода", groups["lines"]),
+                    ("Представления", groups["views"]),
+                ],
+            },
+        )
@@ -0,0 +1,97 @@
+"""
+Команда для измерения пиковой памяти, выделяемой при обработке запросов к API.
+"""
+
+import json
+import statistics
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from django.test import Client
+
+from profiling.memory import measure_request
+
+# адреса по умолчанию - списки товаров, которые отдаются чаще всего
+DEFAULT_PATHS: tuple[str, ...] = (
+    "/api/catalog/?filter[name]=&filter[minPrice]=0&filter[maxPrice]=50000&filter[freeDelivery]=false"
+    "&filter[available]=true&currentPage=1&sort=price&sortType=inc&limit=20",
+    "/api/products/popular/",
+    "/api/products/limited/",
+    "/api/sales/?currentPage=1",
+    "/api/banners/",
+    "/api/categories/",
+    "/api/tags/",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет GET-запросы к адресам сайта внутри текущего процесса (без сервера) с включенным tracemalloc "
+        "и выводит пиковую и оставшуюся после запроса память для каждого адреса"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="Адреса запросов (по умолчанию основные списки товаров)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Сколько раз выполняется каждый запрос (первый запрос не учитывается)",
+        )
+        parser.add_argument(
+            "--frames",
+            type=int,
+            default=1,
+            help="Глубина трассировки tracemalloc",
+        )
+        parser.add_argument("--json", help="Сохранить результаты в JSON-файл")
+
+    def handle(self, *args, **options) -> None:
+        paths: list[str] = options["paths"] or list(DEFAULT_PATHS)
+        repeat: int = max(options["repeat"], 1)
+        client = Client(HTTP_HOST="127.0.0.1")
+
+        started: bool = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(options["frames"])
+        try:
+            results: list[dict] = []
+            for path in paths:
+                # первый запрос заполняет кэши и импортирует модули, поэтому он не учитывается
+                client.get(path)
+                allocations = [measure_request(client, path) for _ in range(repeat)]
+                results.append(
+                    {
+                        "path": path,
+                        "status": allocations[-1].status_code,
+                        "peak_max": max(item.peak for item in allocations),
+                        "peak_median": int(
+                            statistics.median(item.peak for item in allocations)
+                        ),
+                        "retained_median": int(
+                            statistics.median(item.retained for item in allocations)
+                        ),
+                    }
+                )
+        finally:
+            if started:
+                tracemalloc.stop()
+
+        self.stdout.write(
+            f"{'Адрес':40} {'Статус':>6} {'Пик (макс.)':>12} {'Пик (медиана)':>14} {'Осталось':>10}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['path'][:40]:40} {result['status']:>6} "
+                f"{filesizeformat(result['peak_max']):>12} "
+                f"{filesizeformat(result['peak_median']):>14} "
+                f"{filesizeformat(result['retained_median']):>10}"
+            )
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
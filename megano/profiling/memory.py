@@ -0,0 +1,297 @@
+"""
+Модуль с диагностикой роста памяти процессов сайта с помощью tracemalloc.
+
+При MEMORY_TRACING=True (переменная окружения MEGANO_MEMORY_TRACING=1) каждый процесс сайта при запуске
+включает tracemalloc, а MemorySnapshotMiddleware раз в MEMORY_SNAPSHOT_INTERVAL секунд сохраняет снимок
+выделенной памяти в папку PROFILES_DIR и в таблицу MemorySnapshot. Снимок сохраняется в фоновом потоке, поэтому ответ на запрос не задерживается.
+Кнопка "Сделать снимок сейчас" в админ-панели просит все процессы сохранить снимок после их следующего запроса:
+она меняет время изменения файла-метки в папке PROFILES_DIR, общей для всех процессов сервера.
+В админ-панели два снимка одного процесса сравниваются: прирост памяти группируется по модулям
+и строкам кода проекта и по представлениям, в коде которых была выделена память.
+
+Для измерения пиковой памяти отдельных запросов используется функция measure_request
+(и команда measure_memory на ее основе).
+"""
+
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+
+from megano.nplusone import is_project_file
+from .models import MemorySnapshot
+
+log = logging.getLogger(__name__)
+
+# файл-метка в PROFILES_DIR, время изменения которого - время последнего запроса снимков из админ-панели
+SNAPSHOT_REQUEST_FILE: str = "memory-snapshot-request"
+
+# группа для памяти, выделенной вне кода проекта или вне представлений
+OTHER_GROUP: str = "<прочее>"
+
+# трассировки самого tracemalloc и импорта модулей не учитываются
+SNAPSHOT_FILTERS: tuple[tracemalloc.Filter, ...] = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+@dataclass
+class AllocationGroup:
+    """
+    Группа выделений памяти: изменение размера и количества блоков между снимками и размер во втором снимке.
+    """
+
+    name: str
+    size_diff: int = 0
+    count_diff: int = 0
+    size: int = 0
+
+
+@dataclass
+class RequestAllocation:
+    """
+    Память, выделенная при обработке запроса: пик и остаток после запроса в байтах.
+    """
+
+    path: str
+    status_code: int
+    peak: int
+    retained: int
+
+
+def take_snapshot() -> MemorySnapshot:
+    """
+    Функция для сохранения снимка памяти текущего процесса в файл и в таблицу MemorySnapshot.
+    tracemalloc должен быть включен.
+
+    :return: созданная запись о снимке
+    """
+    snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    traced_memory, peak_memory = tracemalloc.get_traced_memory()
+
+    os.makedirs(settings.PROFILES_DIR, exist_ok=True)
+    name: str = (
+        f"memory-{os.getpid()}-{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        ".snapshot"
+    )
+    snapshot.dump(os.path.join(settings.PROFILES_DIR, name))
+    return MemorySnapshot.objects.create(
+        pid=os.getpid(),
+        traced_memory=traced_memory,
+        peak_memory=peak_memory,
+        file=name,
+    )
+
+
+def get_snapshot_request_path() -> str:
+    """
+    Функция для получения пути к файлу-метке запроса снимков памяти.
+    """
+    return os.path.join(settings.PROFILES_DIR, SNAPSHOT_REQUEST_FILE)
+
+
+def request_snapshots() -> None:
+    """
+    Функция для запроса снимков памяти у всех процессов сайта: каждый процесс сохранит снимок
+    после своего следующего запроса.
+    """
+    os.makedirs(settings.PROFILES_DIR, exist_ok=True)
+    path: str = get_snapshot_request_path()
+    with open(path, "a"):
+        pass
+    # время задается явно: время изменения, которое ставит файловая система, может отставать от time.time()
+    now: float = time.time()
+    os.utime(path, (now, now))
+
+
+def get_snapshot_request_time() -> float | None:
+    """
+    Функция для получения времени последнего запроса снимков памяти из админ-панели.
+
+    :return: время запроса (time.time()) или None, если снимки не запрашивались
+    """
+    try:
+        return os.stat(get_snapshot_request_path()).st_mtime
+    except OSError:
+        return None
+
+
+@functools.cache
+def get_view_ranges() -> dict[str, list[tuple[int, int, str]]]:
+    """
+    Функция для получения строк исходного кода представлений проекта из настроек адресов.
+
+    :return: словарь {файл: [(первая строка, последняя строка, название представления)]}
+    """
+    ranges: dict[str, list[tuple[int, int, str]]] = {}
+
+    def collect(patterns: Iterable) -> None:
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                collect(pattern.url_patterns)
+                continue
+            view = getattr(pattern.callback, "view_class", pattern.callback)
+            try:
+                filename: str = inspect.getsourcefile(view)
+                lines, start = inspect.getsourcelines(view)
+            except (OSError, TypeError):
+                continue
+            if filename and is_project_file(filename):
+                name: str = getattr(view, "__name__", type(view).__name__)
+                ranges.setdefault(filename, []).append(
+                    (start, start + len(lines) - 1, name)
+                )
+
+    collect(get_resolver().url_patterns)
+    return ranges
+
+
+def get_project_frame(traceback: tracemalloc.Traceback) -> tracemalloc.Frame | None:
+    """
+    Функция для получения ближайшей к месту выделения памяти строки кода проекта.
+    """
+    # кадры трассировки упорядочены от самого раннего вызова к месту выделения памяти
+    for frame in reversed(traceback):
+        if is_project_file(frame.filename):
+            return frame
+    return None
+
+
+def get_view(traceback: tracemalloc.Traceback) -> str:
+    """
+    Функция для получения представления, в коде которого (или в вызванных им функциях) выделена память.
+    """
+    view_ranges = get_view_ranges()
+    for frame in reversed(traceback):
+        for start, end, name in view_ranges.get(frame.filename, ()):
+            if start <= frame.lineno <= end:
+                return name
+    return OTHER_GROUP
+
+
+def compare_snapshots(
+    old: tracemalloc.Snapshot, new: tracemalloc.Snapshot, limit: int = 20
+) -> dict[str, list[AllocationGroup]]:
+    """
+    Функция для сравнения двух снимков памяти одного процесса.
+
+    :param old: более ранний снимок
+    :param new: более поздний снимок
+    :param limit: количество групп с наибольшим приростом памяти в каждой группировке
+    :return: словарь {"modules": [...], "lines": [...], "views": [...]} с группами по убыванию прироста памяти
+    """
+    groups: dict[str, dict[str, AllocationGroup]] = {
+        "modules": {},
+        "lines": {},
+        "views": {},
+    }
+    for stat in new.compare_to(old, "traceback"):
+        frame = get_project_frame(stat.traceback)
+        if frame is None:
+            module = line = OTHER_GROUP
+        else:
+            module = os.path.relpath(frame.filename, settings.BASE_DIR)
+            line = f"{module}:{frame.lineno}"
+        keys: dict[str, str] = {
+            "modules": module,
+            "lines": line,
+            "views": get_view(stat.traceback),
+        }
+        for grouping, key in keys.items():
+            group = groups[grouping].setdefault(key, AllocationGroup(key))
+            group.size_diff += stat.size_diff
+            group.count_diff += stat.count_diff
+            group.size += stat.size
+
+    return {
+        grouping: sorted(
+            by_key.values(), key=lambda group: group.size_diff, reverse=True
+        )[:limit]
+        for grouping, by_key in groups.items()
+    }
+
+
+def measure_request(client, path: str) -> RequestAllocation:
+    """
+    Функция для измерения памяти, выделенной при обработке GET-запроса. tracemalloc должен быть включен.
+
+    :param client: тестовый клиент Django
+    :param path: адрес запроса
+    :return: пиковая и оставшаяся после запроса память
+    """
+    tracemalloc.reset_peak()
+    before: int = tracemalloc.get_traced_memory()[0]
+    response = client.get(path)
+    current, peak = tracemalloc.get_traced_memory()
+    return RequestAllocation(
+        path=path,
+        status_code=response.status_code,
+        peak=peak - before,
+        retained=current - before,
+    )
+
+
+class MemorySnapshotMiddleware:
+    """
+    Middleware, которое включает tracemalloc в процессе сайта и сохраняет снимки памяти в фоновом потоке
+    раз в MEMORY_SNAPSHOT_INTERVAL секунд (первый снимок - после первого запроса) и по запросу из админ-панели.
+    """
+
+    def __init__(self, get_response) -> None:
+        if not settings.MEMORY_TRACING:
+            raise MiddlewareNotUsed()
+        if not tracemalloc.is_tracing():
+            # строки кода представлений определяются до включения tracemalloc, иначе это намного дольше
+            get_view_ranges()
+            tracemalloc.start(settings.MEMORY_TRACE_FRAMES)
+        self.get_response = get_response
+        self.next_snapshot: float = 0.0
+        self.last_snapshot: float = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self, request: HttpRequest):
+        response = self.get_response(request)
+        # снимок делает только один поток процесса, остальные не ждут его
+        if self.snapshot_due() and self.lock.acquire(blocking=False):
+            self.next_snapshot = time.monotonic() + settings.MEMORY_SNAPSHOT_INTERVAL
+            self.last_snapshot = time.time()
+            threading.Thread(
+                target=self.take_snapshot, name="memory-snapshot", daemon=True
+            ).start()
+        return response
+
+    def snapshot_due(self) -> bool:
+        """
+        Метод для проверки, пора ли сохранить снимок: прошел интервал или снимок запрошен из админ-панели.
+        Запрос проверяется одним вызовом stat, без обращения к кэшу (его попадания и промахи считаются в метриках).
+        """
+        if time.monotonic() >= self.next_snapshot:
+            return True
+        requested: float | None = get_snapshot_request_time()
+        return requested is not None and requested > self.last_snapshot
+
+    def take_snapshot(self) -> None:
+        try:
+            take_snapshot()
+        except Exception:
+            log.exception("Ошибка при сохранении снимка памяти")
+        finally:
+            # у фонового потока свое подключение к БД, которое нужно закрыть
+            connections.close_all()
+            self.lock.release()
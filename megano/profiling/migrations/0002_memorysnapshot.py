@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiling", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MemorySnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("file", models.CharField(max_length=100)),
+                ("pid", models.PositiveIntegerField()),
+                ("traced_memory", models.PositiveBigIntegerField()),
+                ("peak_memory", models.PositiveBigIntegerField()),
+            ],
+            options={
+                "verbose_name": "снимок памяти",
+                "verbose_name_plural": "снимки памяти",
+                "ordering": ["-created_at"],
+                "abstract": False,
+            },
+        ),
+    ]
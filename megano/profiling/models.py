@@ -0,0 +1,67 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class ProfileFile(models.Model):
+    """
+    Абстрактная модель для записей, данные которых хранятся в файле file в папке PROFILES_DIR.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    file = models.CharField(max_length=100)
+
+    class Meta:
+        abstract = True
+        ordering = ["-created_at"]
+
+    @property
+    def file_path(self) -> str:
+        """
+        Полный путь к файлу.
+        """
+        return os.path.join(settings.PROFILES_DIR, self.file)
+
+
+class RequestProfile(ProfileFile):
+    """
+    Модель, представляющая профиль одного запроса к сайту, снятый по требованию сотрудника.
+    Сам профиль (статистика cProfile) хранится в файле.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2000)
+    view = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    # время обработки запроса и время выполнения запросов к БД в секундах
+    duration = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    query_duration = models.FloatField()
+
+    class Meta(ProfileFile.Meta):
+        verbose_name = "профиль запроса"
+        verbose_name_plural = "профили запросов"
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path} ({self.duration * 1000:.0f} мс)"
+
+
+class MemorySnapshot(ProfileFile):
+    """
+    Модель, представляющая снимок памяти tracemalloc одного процесса сайта. Сам снимок хранится в файле.
+    """
+
+    pid = models.PositiveIntegerField()
+    # память, выделенная на момент снимка, и максимальная с момента включения tracemalloc в байтах
+    traced_memory = models.PositiveBigIntegerField()
+    peak_memory = models.PositiveBigIntegerField()
+
+    class Meta(ProfileFile.Meta):
+        verbose_name = "снимок памяти"
+        verbose_name_plural = "снимки памяти"
+
+    def __str__(self) -> str:
+        return f"Процесс {self.pid}, {self.created_at:%d.%m.%Y %H:%M:%S}"
@@ -0,0 +1,155 @@
+"""
+Модуль с профилированием отдельных запросов по требованию сотрудников.
+
+Сотрудник (is_staff) добавляет к адресу параметр ?_profile=1 или заголовок X-Profile: 1, и такой запрос
+выполняется под cProfile: статистика вызовов сохраняется в файл в папке PROFILES_DIR, а в таблицу
+RequestProfile записываются время ответа, количество и время запросов к БД. Номер профиля возвращается
+в заголовке ответа X-Profile-Id, а сам профиль смотрится в админ-панели (отчет по коду проекта)
+или скачивается и открывается в snakeviz.
+
+Для остальных запросов middleware только проверяет параметр и заголовок, а при REQUEST_PROFILER_ENABLED=False
+исключается из цепочки middleware совсем.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest
+from django.utils import timezone
+
+from .models import RequestProfile
+
+PROFILE_PARAM: str = "_profile"
+PROFILE_HEADER: str = "HTTP_X_PROFILE"
+
+
+class QueryTimer:
+    """
+    Обертка выполнения запросов к БД (connection.execute_wrapper), считающая количество и время запросов.
+    """
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.duration: float = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def is_profiling_requested(request: HttpRequest) -> bool:
+    """
+    Функция для проверки, что запрос нужно профилировать: указан параметр или заголовок, а пользователь - сотрудник.
+    """
+    if (
+        request.GET.get(PROFILE_PARAM) != "1"
+        and request.META.get(PROFILE_HEADER) != "1"
+    ):
+        return False
+    user = getattr(request, "user", None)
+    return user is not None and user.is_staff
+
+
+def get_view_name(request: HttpRequest) -> str:
+    """
+    Функция для получения названия представления запроса (класса или функции).
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return ""
+    view = getattr(match.func, "view_class", match.func)
+    return getattr(view, "__name__", type(view).__name__)
+
+
+def profile_request(request: HttpRequest, get_response):
+    """
+    Функция для выполнения запроса под cProfile с сохранением профиля в файл и в таблицу RequestProfile.
+
+    :param request: запрос
+    :param get_response: следующий обработчик в цепочке middleware
+    :return: ответ с номером профиля в заголовке X-Profile-Id
+    """
+    timer = QueryTimer()
+    profiler = cProfile.Profile()
+    started: float = time.perf_counter()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timer))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration: float = time.perf_counter() - started
+
+    os.makedirs(settings.PROFILES_DIR, exist_ok=True)
+    name: str = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.prof"
+    profiler.dump_stats(os.path.join(settings.PROFILES_DIR, name))
+
+    profile = RequestProfile.objects.create(
+        user=request.user,
+        method=request.method,
+        path=request.get_full_path()[:2000],
+        view=get_view_name(request),
+        status_code=response.status_code,
+        duration=duration,
+        query_count=timer.count,
+        query_duration=timer.duration,
+        file=name,
+    )
+    response["X-Profile-Id"] = str(profile.pk)
+    return response
+
+
+def get_project_code_re() -> str:
+    """
+    Функция для получения регулярного выражения, которому соответствуют функции кода проекта в статистике pstats.
+    """
+    return rf"^(?!.*(site|dist)-packages){re.escape(str(settings.BASE_DIR) + os.sep)}"
+
+
+def render_report(path: str, limit: int = 30) -> str:
+    """
+    Функция для получения текстового отчета по профилю: функции проекта по убыванию общего времени
+    и функции, которые они вызывают (в том числе Django и DRF), с временем каждого вызова.
+
+    :param path: путь к файлу профиля
+    :param limit: количество функций проекта в отчете
+    :return: текст отчета с путями относительно папки проекта
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(path, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(get_project_code_re(), limit)
+    stats.print_callees(get_project_code_re(), limit)
+    return stream.getvalue().replace(str(settings.BASE_DIR) + os.sep, "")
+
+
+class RequestProfilerMiddleware:
+    """
+    Middleware, которое профилирует запросы сотрудников с параметром ?_profile=1 или заголовком X-Profile: 1.
+    Должен находиться после AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response) -> None:
+        if not settings.REQUEST_PROFILER_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        if not is_profiling_requested(request):
+            return self.get_response(request)
+        return profile_request(request, self.get_response)
@@ -0,0 +1,22 @@
+"""
+Модуль с обработчиками сигналов приложения профилирования.
+"""
+
+import os
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import MemorySnapshot, RequestProfile
+
+
+@receiver(post_delete, sender=RequestProfile)
+@receiver(post_delete, sender=MemorySnapshot)
+def delete_profile_file(instance: RequestProfile | MemorySnapshot, **kwargs) -> None:
+    """
+    Обработчик удаления профиля запроса или снимка памяти: вместе с записью удаляется и файл.
+    """
+    try:
+        os.remove(instance.file_path)
+    except FileNotFoundError:
+        pass
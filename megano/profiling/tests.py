@@ -0,0 +1,254 @@
+import inspect
+import os
+import shutil
+import tempfile
+import threading
+import tracemalloc
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from catalogs.views import BannersView
+from .memory import (
+    SNAPSHOT_REQUEST_FILE,
+    compare_snapshots,
+    get_view,
+    measure_request,
+    take_snapshot,
+)
+from .models import MemorySnapshot, RequestProfile
+
+# админ-панель в тестах работает без манифеста статических файлов (collectstatic не запускается)
+TEST_STORAGES: dict = {
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+class RequestProfilerTestCase(TestCase):
+    """
+    Класс с методами для тестирования профилирования запросов по требованию сотрудников.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания сотрудника и обычного пользователя.
+        """
+        cls.staff = User.objects.create_superuser(username="admin", password="Test24@")
+        cls.user = User.objects.create_user(username="tester", password="Test24@")
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом: профили сохраняются во временную папку.
+        """
+        self.profiles_dir: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiles_dir, ignore_errors=True)
+        settings_override = override_settings(PROFILES_DIR=self.profiles_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @override_settings(STORAGES=TEST_STORAGES)
+    def test_profile_request(self) -> None:
+        """
+        Тест для проверки, что запрос сотрудника с параметром профилируется, а отчет и файл доступны в админ-панели.
+        """
+        self.client.force_login(self.staff)
+        response = self.client.get("/api/banners/", {"_profile": "1"})
+        self.assertEqual(response.status_code, 200)
+
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual(profile.view, "BannersView")
+        self.assertEqual(profile.path, "/api/banners/?_profile=1")
+        self.assertEqual(profile.user, self.staff)
+        self.assertGreater(profile.query_count, 0)
+        self.assertTrue(os.path.exists(profile.file_path))
+
+        response = self.client.get(
+            f"/admin/profiling/requestprofile/{profile.pk}/change/"
+        )
+        self.assertContains(response, "catalogs/views.py")
+        response = self.client.get(
+            f"/admin/profiling/requestprofile/{profile.pk}/download/"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            open(profile.file_path, "rb").read(),
+        )
+
+        profile.delete()
+        self.assertFalse(os.path.exists(profile.file_path))
+
+    def test_not_profiled(self) -> None:
+        """
+        Тест для проверки, что запросы без параметра и запросы обычных пользователей не профилируются,
+        а заголовок X-Profile работает так же, как параметр.
+        """
+        self.client.force_login(self.user)
+        response = self.client.get("/api/banners/", {"_profile": "1"})
+        self.assertNotIn("X-Profile-Id", response)
+
+        self.client.force_login(self.staff)
+        response = self.client.get("/api/banners/")
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+        response = self.client.get("/api/banners/", headers={"X-Profile": "1"})
+        self.assertIn("X-Profile-Id", response)
+        self.assertEqual(
+            os.listdir(self.profiles_dir), [RequestProfile.objects.get().file]
+        )
+
+
+class MemoryDiagnosticsTestCase(TestCase):
+    """
+    Класс с методами для тестирования диагностики памяти с помощью tracemalloc.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Метод для создания сотрудника.
+        """
+        cls.staff = User.objects.create_superuser(username="admin", password="Test24@")
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом: снимки сохраняются во временную папку,
+        а tracemalloc, включенный в тесте, выключается после него.
+        """
+        self.profiles_dir: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiles_dir, ignore_errors=True)
+        settings_override = override_settings(PROFILES_DIR=self.profiles_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        if not tracemalloc.is_tracing():
+            self.addCleanup(tracemalloc.stop)
+
+    @override_settings(STORAGES=TEST_STORAGES)
+    def test_compare_snapshots(self) -> None:
+        """
+        Тест для проверки, что прирост памяти между снимками относится к строке кода, в которой выделена память,
+        и что снимки сравниваются в админ-панели.
+        """
+        tracemalloc.start(10)
+        old = take_snapshot()
+        self.allocated = [bytearray(100_000) for _ in range(10)]
+        new = take_snapshot()
+        tracemalloc.stop()
+        self.assertEqual(MemorySnapshot.objects.count(), 2)
+
+        groups = compare_snapshots(
+            tracemalloc.Snapshot.load(old.file_path),
+            tracemalloc.Snapshot.load(new.file_path),
+        )
+        self.assertEqual(groups["modules"][0].name, "profiling/tests.py")
+        self.assertTrue(groups["lines"][0].name.startswith("profiling/tests.py:"))
+        self.assertGreaterEqual(groups["lines"][0].size_diff, 1_000_000)
+
+        self.client.force_login(self.staff)
+        response = self.client.post(
+            "/admin/profiling/memorysnapshot/",
+            {"action": "compare", "_selected_action": [old.pk, new.pk]},
+        )
+        self.assertContains(response, "Сравнение снимков памяти")
+        self.assertContains(response, groups["lines"][0].name)
+
+    def test_view_attribution(self) -> None:
+        """
+        Тест для проверки, что выделение памяти в коде представления относится к этому представлению.
+        """
+        lines, start = inspect.getsourcelines(BannersView)
+        filename: str = inspect.getsourcefile(BannersView)
+        self.assertEqual(
+            get_view(tracemalloc.Traceback(((filename, start + 1),))), "BannersView"
+        )
+        self.assertEqual(get_view(tracemalloc.Traceback(((filename, 1),))), "<прочее>")
+
+    def test_measure_memory(self) -> None:
+        """
+        Тест для проверки измерения пиковой памяти запроса и команды measure_memory.
+        """
+        tracemalloc.start()
+        allocation = measure_request(self.client, "/api/banners/")
+        self.assertEqual(allocation.status_code, 200)
+        self.assertGreater(allocation.peak, 0)
+        self.assertGreaterEqual(allocation.peak, allocation.retained)
+
+        out = StringIO()
+        call_command("measure_memory", "/api/banners/", "--repeat", "2", stdout=out)
+        self.assertRegex(out.getvalue(), r"/api/banners/ +200 ")
+        # команда не выключает tracemalloc, который был включен до нее
+        self.assertTrue(tracemalloc.is_tracing())
+
+
+@override_settings(MEMORY_TRACING=True)
+class MemorySnapshotMiddlewareTestCase(TransactionTestCase):
+    """
+    Класс с методами для тестирования сохранения снимков памяти процессом сайта.
+    Снимки сохраняются в фоновом потоке со своим подключением к БД, поэтому тесты выполняются без общей транзакции.
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка, который выполняется перед каждым тестом: снимки сохраняются во временную папку,
+        а tracemalloc, включенный в тесте, выключается после него.
+        """
+        self.profiles_dir: str = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiles_dir, ignore_errors=True)
+        settings_override = override_settings(PROFILES_DIR=self.profiles_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        if not tracemalloc.is_tracing():
+            self.addCleanup(tracemalloc.stop)
+
+    def get(self, path: str = "/api/banners/"):
+        """
+        Метод для выполнения запроса и ожидания фонового потока, сохраняющего снимок.
+        """
+        response = self.client.get(path)
+        for thread in threading.enumerate():
+            if thread.name == "memory-snapshot":
+                thread.join()
+        return response
+
+    def test_snapshot_middleware(self) -> None:
+        """
+        Тест для проверки, что процесс сохраняет снимок памяти после первого запроса и затем не чаще интервала.
+        """
+        self.get()
+        self.get()
+        self.assertTrue(tracemalloc.is_tracing())
+        snapshot = MemorySnapshot.objects.get()
+        self.assertEqual(snapshot.pid, os.getpid())
+        self.assertTrue(os.path.exists(snapshot.file_path))
+
+    @override_settings(STORAGES=TEST_STORAGES)
+    def test_request_snapshot(self) -> None:
+        """
+        Тест для проверки, что снимок, запрошенный в админ-панели, сохраняется после следующего запроса.
+        """
+        self.get()
+        self.assertEqual(MemorySnapshot.objects.count(), 1)
+
+        self.client.force_login(
+            User.objects.create_superuser(username="admin", password="Test24@")
+        )
+        response = self.get("/admin/profiling/memorysnapshot/")
+        self.assertContains(response, "Сделать снимок сейчас")
+        self.assertEqual(MemorySnapshot.objects.count(), 1)
+
+        response = self.client.post("/admin/profiling/memorysnapshot/request/")
+        self.assertRedirects(response, "/admin/profiling/memorysnapshot/")
+        # запрос передается другим процессам через файл-метку в общей папке снимков
+        self.assertTrue(
+            os.path.exists(os.path.join(self.profiles_dir, SNAPSHOT_REQUEST_FILE))
+        )
+        self.get()
+        self.assertEqual(MemorySnapshot.objects.count(), 2)
+        self.get()
+        self.assertEqual(MemorySnapshot.objects.count(), 2)
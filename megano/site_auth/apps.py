@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class SiteAuthConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "site_auth"
+
+    def ready(self) -> None:
+        from megano.throttling import check_throttle_cache
+
+        checks.register(check_throttle_cache, checks.Tags.caches, deploy=True)
@@ -0,0 +1,64 @@
+"""
+Модуль с бэкендом аутентификации, который загружает пользователя вместе с его профилем и корзиной.
+
+AuthenticationMiddleware получает пользователя текущего запроса через get_user бэкенда, поэтому пользователь,
+профиль и корзина загружаются одним запросом с JOIN и дальше доступны всем представлениям запроса
+через request.user.profile и request.user.basket без повторных запросов к БД.
+Для получения профиля и корзины в представлениях используются функции get_user_profile и get_user_basket,
+которые создают недостающий профиль или корзину.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from basket.models import Basket
+from profile_user.models import Profile
+
+UserModel = get_user_model()
+
+
+class UserContextBackend(ModelBackend):
+    """
+    Бэкенд аутентификации по логину и паролю (как ModelBackend), загружающий пользователя запроса
+    вместе с профилем и корзиной.
+    """
+
+    def get_user(self, user_id) -> UserModel | None:
+        try:
+            user = UserModel._default_manager.select_related("profile", "basket").get(
+                pk=user_id
+            )
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def get_user_profile(user) -> Profile:
+    """
+    Функция для получения профиля аутентифицированного пользователя. Если профиля нет, то он создается.
+
+    :param user: пользователь запроса
+    :return: профиль пользователя
+    """
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        profile, _ = Profile.objects.get_or_create(user=user)
+        return profile
+
+
+def get_user_basket(user, create: bool = False) -> Basket | None:
+    """
+    Функция для получения корзины аутентифицированного пользователя.
+
+    :param user: пользователь запроса
+    :param create: создать корзину, если ее нет
+    :return: корзина пользователя или None, если ее нет и create=False
+    """
+    try:
+        return user.basket
+    except Basket.DoesNotExist:
+        if not create:
+            return None
+        basket, _ = Basket.objects.get_or_create(user=user)
+        return basket
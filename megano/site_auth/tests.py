@@ -1,3 +1,211 @@
-from django.test import TestCase
+import json
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from catalogs.models import Product
+from megano.sessions import SESSION_REFRESHED_KEY
+from megano.throttling import TokenBucketThrottle, check_throttle_cache
+from profile_user.models import Profile
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+            "login_ip": "5/min",
+            "login_username": "2/min",
+        },
+    }
+)
+class ThrottlingTestCase(TestCase):
+    """
+    Класс с методами для тестирования ограничения частоты запросов ведром токенов.
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: ведра токенов предыдущих тестов удаляются из кэша.
+        """
+        cache.clear()
+
+    def sign_in(self, username: str, ip: str, forwarded_for: str | None = None):
+        """
+        Метод для попытки входа в формате фронтенда (JSON в единственном ключе формы).
+        """
+        headers: dict = {"REMOTE_ADDR": ip}
+        if forwarded_for:
+            headers["HTTP_X_FORWARDED_FOR"] = forwarded_for
+        return self.client.post(
+            "/api/sign-in/",
+            json.dumps({"username": username, "password": "wrong"}),
+            content_type="application/x-www-form-urlencoded",
+            **headers,
+        )
+
+    def test_username_and_ip_buckets(self) -> None:
+        """
+        Тест для проверки ограничения по логину с разных IP-адресов и по IP-адресу для разных логинов:
+        отклоненный запрос не обращается к БД.
+        """
+        self.assertEqual(self.sign_in("victim", "10.0.0.1").status_code, 400)
+        self.assertEqual(self.sign_in("Victim", "10.0.0.2").status_code, 400)
+        with self.assertNumQueries(0):
+            response = self.sign_in("victim", "10.0.0.3")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+        for number in range(4):
+            self.assertEqual(self.sign_in(f"user{number}", "10.0.0.1").status_code, 400)
+        self.assertEqual(self.sign_in("other", "10.0.0.1").status_code, 429)
+        self.assertEqual(self.sign_in("other", "10.0.0.4").status_code, 400)
+
+    def test_spoofed_forwarded_for(self) -> None:
+        """
+        Тест для проверки, что без доверенных прокси заголовок X-Forwarded-For не влияет на ограничение по IP,
+        а за прокси (NUM_PROXIES = 1) учитывается только адрес, добавленный самим прокси.
+        """
+        for number in range(5):
+            response = self.sign_in(f"user{number}", "10.0.0.1", f"192.168.0.{number}")
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            self.sign_in("other", "10.0.0.1", "192.168.0.100").status_code, 429
+        )
+
+        cache.clear()
+        with override_settings(
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}
+        ):
+            for number in range(5):
+                response = self.sign_in(
+                    f"user{number}", "127.0.0.1", f"192.168.0.{number}, 10.0.0.1"
+                )
+                self.assertEqual(response.status_code, 400)
+            response = self.sign_in("other", "127.0.0.1", "192.168.0.100, 10.0.0.1")
+            self.assertEqual(response.status_code, 429)
+            response = self.sign_in("other", "127.0.0.1", "10.0.0.2")
+            self.assertEqual(response.status_code, 400)
+
+    def test_bucket_refill(self) -> None:
+        """
+        Тест для проверки пополнения ведра: токен возвращается через период / количество запросов.
+        """
+        with mock.patch.object(TokenBucketThrottle, "timer", return_value=1000.0):
+            self.sign_in("victim", "10.0.0.1")
+            self.sign_in("victim", "10.0.0.1")
+            self.assertEqual(self.sign_in("victim", "10.0.0.1").status_code, 429)
+        with mock.patch.object(TokenBucketThrottle, "timer", return_value=1030.0):
+            self.assertEqual(self.sign_in("victim", "10.0.0.1").status_code, 400)
+            self.assertEqual(self.sign_in("victim", "10.0.0.1").status_code, 429)
+
+    def test_review_throttle_only_for_post(self) -> None:
+        """
+        Тест для проверки, что ограничение отзывов не касается их чтения.
+        """
+        product = Product.objects.create(title="Платье", price=Decimal(100))
+        url: str = f"/api/product/{product.pk}/reviews/"
+        rates: dict = {
+            **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+            "review_user": "1/hour",
+        }
+        user = User.objects.create_user(username="tester", password="Test24@")
+        self.client.force_login(user)
+        with override_settings(
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}
+        ):
+            for _ in range(3):
+                self.assertEqual(self.client.get(url).status_code, 200)
+            response = self.client.post(url, {"author": "Тестер", "rate": 5})
+            self.assertEqual(response.status_code, 201)
+            response = self.client.post(url, {"author": "Тестер", "rate": 4})
+            self.assertEqual(response.status_code, 429)
+
+    def test_shared_cache_check(self) -> None:
+        """
+        Тест для проверки предупреждения "check --deploy": ведра в памяти процесса не ограничивают частоту
+        запросов к другим процессам сайта, поэтому для продакшена нужен общий кэш.
+        """
+        self.assertEqual(
+            [message.id for message in check_throttle_cache()], ["megano.W001"]
+        )
+        shared_cache: dict = {
+            "default": {
+                "BACKEND": "megano.metrics.InstrumentedCache",
+                "OPTIONS": {
+                    "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                },
+                "LOCATION": "throttle_cache",
+            }
+        }
+        with override_settings(CACHES=shared_cache):
+            self.assertEqual(check_throttle_cache(), [])
+
+
+class SessionRefreshTestCase(TestCase):
+    """
+    Класс с методами для тестирования сохранения сессии только при изменении или раз в SESSION_REFRESH_INTERVAL.
+    """
+
+    def setUp(self) -> None:
+        """
+        Метод-настройка: вход пользователя через API, как на сайте.
+        """
+        cache.clear()
+        user = User.objects.create_user(username="tester", password="Test24@")
+        Profile.objects.create(user=user)
+        response = self.client.post(
+            "/api/sign-in/",
+            json.dumps({"username": "tester", "password": "Test24@"}),
+            content_type="application/x-www-form-urlencoded",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def get_session_writes(self) -> int:
+        """
+        Метод для подсчета записей в таблицу сессий при запросе профиля.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/profile/")
+        self.assertEqual(response.status_code, 200)
+        return sum(
+            not query["sql"].startswith("SELECT") and "django_session" in query["sql"]
+            for query in context.captured_queries
+        )
+
+    def test_session_saved_once_per_interval(self) -> None:
+        """
+        Тест для проверки, что неизмененная сессия сохраняется только после истечения интервала продления.
+        """
+        self.assertEqual(self.get_session_writes(), 0)
+        self.assertEqual(self.get_session_writes(), 0)
+
+        refreshed: int = self.client.session[SESSION_REFRESHED_KEY]
+        later: int = refreshed + settings.SESSION_REFRESH_INTERVAL
+        with mock.patch("megano.sessions.time.time", return_value=later):
+            self.assertEqual(self.get_session_writes(), 1)
+            self.assertEqual(self.get_session_writes(), 0)
+        self.assertEqual(self.client.session[SESSION_REFRESHED_KEY], later)
+
+    def test_logout(self) -> None:
+        """
+        Тест для проверки, что выход по-прежнему завершает сессию, а анонимные запросы ее не создают.
+        """
+        session_key: str = self.client.session.session_key
+        self.assertEqual(self.client.post("/api/sign-out/").status_code, 200)
+        self.assertNotIn("_auth_user_id", self.client.session)
+        self.assertFalse(Session.objects.filter(pk=session_key).exists())
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/api/banners/")
+        self.assertFalse(
+            any("django_session" in query["sql"] for query in context.captured_queries)
+        )
+        self.assertEqual(Session.objects.count(), 0)
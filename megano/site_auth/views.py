@@ -4,16 +4,23 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.views import APIView
-from rest_framework.authentication import authenticate
+from rest_framework.authentication import SessionAuthentication, authenticate
 from django.contrib.auth.models import User
+from megano.throttling import IPTokenBucketThrottle, UsernameTokenBucketThrottle
 from profile_user.models import Profile
 
 
 class Login(APIView):
     """
     API-класс с методом post для аутентификации пользователя.
+    Частота попыток входа ограничена для IP-адреса и для логина до проверки пароля.
     """
 
+    # без BasicAuthentication, чтобы заголовок Authorization не приводил к проверке пароля до ограничения частоты
+    authentication_classes = (SessionAuthentication,)
+    throttle_classes = (IPTokenBucketThrottle, UsernameTokenBucketThrottle)
+    throttle_scope = "login"
+
     def post(self, request: Request) -> Response:
         data = json.loads(list(request.data.keys())[0])
         username = data["username"]
@@ -41,8 +48,13 @@ class Logout(APIView):
 class Registration(APIView):
     """
     API-класс с методом post для регистрации нового пользователя.
+    Частота регистраций ограничена для IP-адреса.
     """
 
+    authentication_classes = (SessionAuthentication,)
+    throttle_classes = (IPTokenBucketThrottle,)
+    throttle_scope = "sign_up"
+
     def post(self, request: Request) -> Response:
         data = json.loads(list(request.data.keys())[0])
         username = data["username"]